@@ -0,0 +1,414 @@
+"""
+Démon d'alertes : évalue des règles sur chaque nouvelle bougie clôturée, sans tableau de bord.
+
+Pour chaque (symbole, intervalle), un SymbolMonitor fait avancer un MACDState en O(1) et passe
+les valeurs à ses règles, elles aussi en O(1) par bougie :
+    - MACDCrossRule : croisement DIF / DEA
+    - DEASlopeRule  : changement de sens de la DEA (même seuil « flat » que le tableau de bord)
+    - LevelBreakRule : clôture qui traverse un support ou une résistance classé ; l'histogramme des
+      prix de la fenêtre glissante est tenu à jour en O(1) par bougie, et les niveaux en sont tirés
+      toutes les `refit` bougies (classement O(n × window) vectorisé, voir la classe)
+
+Les alertes partent vers des sorties interchangeables (console, fichier JSON lines, webhook),
+avec un délai minimal par règle et par symbole entre deux alertes.
+
+Usage :
+    python alerts.py --symbols ETHUSDC BTCUSDC --interval 1m --file alerts.jsonl --fetch
+"""
+import argparse
+import heapq
+import json
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import requests
+
+import kline_store
+from analysis_tools import MACDState, classify_support_resistance
+from kline_cache import interval_to_seconds
+
+
+class Rule:
+    """
+    Règle d'alerte évaluée à chaque bougie clôturée.
+
+    Args:
+        name (str): nom de la règle (clé du délai entre alertes).
+        cooldown (float): délai minimal entre deux alertes de cette règle pour un symbole (secondes).
+    """
+
+    def __init__(self, name, cooldown=0.0):
+        self.name = name
+        self.cooldown = cooldown
+
+    def evaluate(self, tick):
+        """
+        Args:
+            tick (dict): bougie et indicateurs courants / précédents (voir SymbolMonitor.on_candle).
+
+        Returns:
+            str or None: message d'alerte, ou None.
+        """
+        raise NotImplementedError
+
+
+class MACDCrossRule(Rule):
+    """
+    Croisement de la DIF (MACD) et de la DEA (signal).
+    """
+
+    def __init__(self, cooldown=0.0):
+        super().__init__("macd_cross", cooldown)
+
+    def evaluate(self, tick):
+        if tick["prev_dif"] is None:
+            return None
+        before = tick["prev_dif"] - tick["prev_dea"]
+        after = tick["dif"] - tick["dea"]
+        if before <= 0 < after:
+            return f"DIF passe au-dessus de la DEA ({tick['dif']:.4f} > {tick['dea']:.4f})"
+        if before >= 0 > after:
+            return f"DIF passe sous la DEA ({tick['dif']:.4f} < {tick['dea']:.4f})"
+        return None
+
+
+class DEASlopeRule(Rule):
+    """
+    Changement de sens de la DEA (tendance "up" / "down" du tableau de bord, "flat" ignoré).
+
+    Args:
+        flat (float): variation absolue en dessous de laquelle la DEA est considérée plate.
+    """
+
+    def __init__(self, flat=1e-6, cooldown=0.0):
+        super().__init__("dea_slope", cooldown)
+        self.flat = flat
+        self.trend = {}  # Dernière tendance non plate par symbole
+
+    def evaluate(self, tick):
+        if tick["prev_dea"] is None:
+            return None
+        dea_diff = tick["dea"] - tick["prev_dea"]
+        if abs(dea_diff) < self.flat:
+            return None
+        trend = "up" if dea_diff > 0 else "down"
+        previous = self.trend.get(tick["symbol"])
+        self.trend[tick["symbol"]] = trend
+        if previous is not None and previous != trend:
+            return f"Tendance DEA : {previous} -> {trend}"
+        return None
+
+
+class _BinWindow:
+    """
+    Fenêtre glissante de clôtures et histogramme de leurs classes de largeur `precision`.
+
+    Chaque classe garde la file des rangs de ses clôtures : ajout et expiration en O(1), effectif
+    = longueur de la file, première apparition = tête de file. top() donne donc le même résultat
+    que find_resistance_levels sur la fenêtre, en O(B log n) pour B classes présentes.
+    """
+
+    def __init__(self, window, precision):
+        self.window = window
+        self.precision = precision
+        self.count = 0
+        self._closes = np.empty(window)
+        self._bins = [None] * window  # classe de chaque case du tampon (None : clôture non finie)
+        self._ranks = {}              # classe -> rangs de ses clôtures dans la fenêtre
+
+    def append(self, close):
+        slot = self.count % self.window
+        expired = self._bins[slot]
+        if expired is not None:
+            ranks = self._ranks[expired]
+            ranks.popleft()
+            if not ranks:
+                del self._ranks[expired]
+        # round() arrondit au pair le plus proche, comme np.round dans top_bins
+        current = round(close / self.precision) if math.isfinite(close) else None
+        if current is not None:
+            self._ranks.setdefault(current, deque()).append(self.count)
+        self._bins[slot] = current
+        self._closes[slot] = close
+        self.count += 1
+
+    def top(self, n):
+        ranks = self._ranks
+        best = heapq.nsmallest(n, ranks, key=lambda b: (-len(ranks[b]), ranks[b][0]))
+        return [b * self.precision for b in best]
+
+    def closes(self):
+        if self.count < self.window:
+            return self._closes[:self.count]
+        return np.roll(self._closes, -(self.count % self.window))
+
+
+class LevelBreakRule(Rule):
+    """
+    Clôture qui traverse un support (vers le bas) ou une résistance (vers le haut).
+
+    L'histogramme des clôtures des `window` dernières bougies est tenu à jour à chaque bougie
+    (une classe ajoutée, une expirée : O(1)). Toutes les `refit` bougies, les `n` classes les plus
+    fréquentes en sont tirées (O(B log n), B classes présentes) puis classées par
+    classify_support_resistance (O(n × window), vectorisé) : coût amorti O(1 + n × window / refit)
+    par bougie. Entre deux recalculs, chaque bougie ne compare que `n` niveaux.
+
+    Args:
+        n (int): nombre de niveaux suivis.
+        precision (int or float): largeur de regroupement des prix.
+        seuil (float): écart relatif de classify_support_resistance.
+        window (int): nombre de clôtures utilisées pour les niveaux.
+        refit (int): nombre de bougies entre deux recalculs.
+    """
+
+    def __init__(self, n=5, precision=10, seuil=0.001, window=1440, refit=60, cooldown=0.0):
+        super().__init__("level_break", cooldown)
+        self.n = n
+        self.precision = precision
+        self.seuil = seuil
+        self.window = window
+        self.refit = refit
+        self._state = {}  # symbole -> [fenêtre de clôtures (_BinWindow), niveaux classés]
+
+    def _levels(self, closes):
+        levels = closes.top(self.n)
+        classification = classify_support_resistance(pd.DataFrame({"price": closes.closes()}), levels,
+                                                     seuil=self.seuil)
+        return [(level, kind) for level, kind in classification.items() if kind != "neutral"]
+
+    def evaluate(self, tick):
+        state = self._state.get(tick["symbol"])
+        if state is None:
+            state = self._state[tick["symbol"]] = [_BinWindow(self.window, self.precision), []]
+        closes, levels = state
+
+        message = None
+        prev_close, close = tick["prev_close"], tick["close"]
+        if prev_close is not None:
+            for level, kind in levels:
+                if kind == "resistance" and prev_close < level <= close:
+                    message = f"Cassure de la résistance {level:.2f} (clôture {close:.2f})"
+                    break
+                if kind == "support" and prev_close > level >= close:
+                    message = f"Cassure du support {level:.2f} (clôture {close:.2f})"
+                    break
+
+        closes.append(close)
+        if closes.count % self.refit == 0:
+            state[1] = self._levels(closes)
+        return message
+
+
+class StdoutSink:
+    """
+    Affiche les alertes dans la console.
+    """
+
+    def emit(self, alert):
+        print(f"[{alert['time']}] {alert['symbol']} {alert['interval']} {alert['rule']} : {alert['message']}")
+
+
+class FileSink:
+    """
+    Ajoute les alertes à un fichier JSON lines (une alerte par ligne).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, alert):
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(alert) + "\n")
+
+
+class WebhookSink:
+    """
+    Envoie chaque alerte en JSON (POST) à une URL. Sans URL, se contente d'afficher la requête (bouchon).
+    """
+
+    def __init__(self, url=None, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def emit(self, alert):
+        if self.url is None:
+            print(f"webhook (bouchon) <- {json.dumps(alert)}")
+            return
+        try:
+            requests.post(self.url, json=alert, timeout=self.timeout)
+        except requests.RequestException as exc:  # Une sortie indisponible ne doit pas arrêter le démon
+            print(f"Webhook {self.url} en échec : {exc!r}")
+
+
+def default_rules(cooldown=15 * 60):
+    """
+    Règles par défaut : croisement MACD, changement de sens de la DEA, cassures de niveaux.
+    """
+    return [MACDCrossRule(cooldown), DEASlopeRule(cooldown=cooldown), LevelBreakRule(cooldown=cooldown)]
+
+
+class SymbolMonitor:
+    """
+    Suivi incrémental d'un (symbole, intervalle) : MACDState + évaluation des règles.
+
+    Args:
+        symbol (str): symbole suivi.
+        interval (str): intervalle des bougies.
+        rules (list of Rule): règles évaluées à chaque bougie.
+        sinks (list): sorties des alertes (objets avec une méthode emit(alert)).
+        fast, slow, signal (int): périodes du MACD.
+    """
+
+    def __init__(self, symbol, interval, rules, sinks, fast=12, slow=26, signal=9):
+        self.symbol = symbol
+        self.interval = interval
+        self.rules = rules
+        self.sinks = sinks
+        self.macd = MACDState(fast, slow, signal)
+        self.last_open_time = None
+        self.alerts = 0
+        self._prev = {"prev_close": None, "prev_dif": None, "prev_dea": None}
+        self._last_fired = {}
+
+    def on_candle(self, open_time, close, emit=True):
+        """
+        Intègre une bougie clôturée (les bougies déjà vues sont ignorées) et évalue les règles.
+
+        Args:
+            open_time (int): temps d'ouverture (ms).
+            close (float): prix de clôture.
+            emit (bool): si faux, met seulement l'état à jour (préchauffage sur l'historique).
+
+        Returns:
+            list of dict: alertes émises.
+        """
+        if self.last_open_time is not None and open_time <= self.last_open_time:
+            return []
+        self.last_open_time = open_time
+        dif, dea, _ = self.macd.update(close)
+        tick = {"symbol": self.symbol, "open_time": open_time, "close": close, "dif": dif, "dea": dea,
+                **self._prev}
+        self._prev = {"prev_close": close, "prev_dif": dif, "prev_dea": dea}
+
+        fired = []
+        for rule in self.rules:
+            message = rule.evaluate(tick)
+            if message is None or not emit:
+                continue
+            # Délai entre alertes mesuré en temps des bougies (identique en direct et en rejeu)
+            last = self._last_fired.get(rule.name)
+            if last is not None and open_time - last < rule.cooldown * 1000:
+                continue
+            self._last_fired[rule.name] = open_time
+            alert = {
+                "time": str(np.datetime64(int(open_time), "ms")),
+                "symbol": self.symbol,
+                "interval": self.interval,
+                "rule": rule.name,
+                "price": close,
+                "message": message,
+            }
+            for sink in self.sinks:
+                sink.emit(alert)
+            fired.append(alert)
+        self.alerts += len(fired)
+        return fired
+
+
+class AlertDaemon:
+    """
+    Surveille le stockage colonnaire et passe chaque nouvelle bougie clôturée aux SymbolMonitor.
+
+    Les bougies sont écrites par un autre processus (ingesteur, batch_fetcher) ou, avec `fetch`,
+    récupérées par le démon lui-même à chaque tour via batch_fetcher.fetch_batch.
+
+    Args:
+        symbols (list of str): symboles suivis.
+        interval (str): intervalle des bougies.
+        sinks (list): sorties des alertes.
+        rules_factory (callable): fonction sans argument retournant les règles d'un symbole.
+        root (str): racine du stockage colonnaire.
+        warmup (int): bougies d'historique intégrées sans alerte au démarrage.
+        fetch (bool): récupère les bougies auprès de l'API à chaque tour.
+    """
+
+    def __init__(self, symbols, interval="1m", sinks=None, rules_factory=default_rules,
+                 root=kline_store.STORE_ROOT, warmup=1440, fetch=False):
+        self.interval = interval
+        self.interval_ms = interval_to_seconds(interval) * 1000
+        self.root = root
+        self.warmup = warmup
+        self.fetch = fetch
+        sinks = sinks if sinks is not None else [StdoutSink()]
+        self.monitors = {s: SymbolMonitor(s, interval, rules_factory(), sinks) for s in symbols}
+        self._stopping = threading.Event()
+
+    def poll(self, now_ms=None):
+        """
+        Un tour de surveillance : lit les dernières bougies de chaque symbole et évalue les nouvelles.
+
+        Returns:
+            list of dict: alertes émises pendant ce tour.
+        """
+        if self.fetch:
+            from batch_fetcher import fetch_batch  # Dépendance réseau seulement si demandée
+            fetch_batch([(s, self.interval) for s in self.monitors], lookback=self.warmup, root=self.root)
+
+        now_ms = now_ms if now_ms is not None else time.time() * 1000
+        fired = []
+        for symbol, monitor in self.monitors.items():
+            # Préchauffage propre à chaque symbole : son premier historique lu (même plus tard,
+            # ex: symbole encore vide au premier tour) initialise les règles sans alerter
+            warm = monitor.last_open_time is not None
+            lookback = max(2, int((now_ms - monitor.last_open_time) // self.interval_ms) + 2) if warm \
+                else self.warmup
+            candles = kline_store.load_latest(symbol, self.interval, lookback, self.root)
+            closed = candles.open_time + self.interval_ms <= now_ms  # La bougie en cours est ignorée
+            for open_time, close in zip(candles.open_time[closed].tolist(), candles.close[closed].tolist()):
+                fired += monitor.on_candle(open_time, close, emit=warm)
+        return fired
+
+    def run(self, every=5.0):
+        """
+        Boucle principale : un tour toutes les `every` secondes jusqu'à stop().
+        """
+        while not self._stopping.is_set():
+            try:
+                self.poll()
+            except Exception as exc:  # Une erreur de lecture ou réseau ne doit pas arrêter le démon
+                print(f"Tour d'alertes en échec : {exc!r}")
+            self._stopping.wait(every)
+
+    def stop(self):
+        self._stopping.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Démon d'alertes MACD / niveaux")
+    parser.add_argument("--symbols", nargs="+", default=["ETHUSDC"])
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--root", default=kline_store.STORE_ROOT)
+    parser.add_argument("--every", type=float, default=5.0, help="secondes entre deux tours")
+    parser.add_argument("--cooldown", type=float, default=15 * 60, help="délai minimal entre deux alertes d'une règle")
+    parser.add_argument("--file", help="fichier JSON lines des alertes")
+    parser.add_argument("--webhook", nargs="?", const="", help="URL du webhook (sans URL : bouchon)")
+    parser.add_argument("--fetch", action="store_true", help="récupère les bougies auprès de l'API")
+    args = parser.parse_args()
+
+    sinks = [StdoutSink()]
+    if args.file:
+        sinks.append(FileSink(args.file))
+    if args.webhook is not None:
+        sinks.append(WebhookSink(args.webhook or None))
+    daemon = AlertDaemon(args.symbols, args.interval, sinks, lambda: default_rules(args.cooldown),
+                         root=args.root, fetch=args.fetch)
+    print(f"Surveillance de {', '.join(args.symbols)} ({args.interval}), un tour toutes les {args.every}s")
+    try:
+        daemon.run(args.every)
+    except KeyboardInterrupt:
+        daemon.stop()
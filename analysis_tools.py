@@ -1,9 +1,12 @@
 import json
-from collections import Counter
-import pandas as pd
+import threading
+import numpy as np
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
 
+from level_detection import top_bins
+from metrics import timed
+
 def load_prices_from_json(filename):
     """
     Charge une liste de prix à partir d'un fichier JSON.
@@ -34,21 +37,15 @@ def find_resistance_levels(prices, n=5, precision=10):
     Returns:
         List[float]: niveaux de résistance estimés (arrondis)
     """
-    # Arrondi des prix à la précision donnée pour regrouper les niveaux proches
-    rounded_prices = [round(price / precision) * precision for price in prices]
-    
-    # Compte les occurrences de chaque niveau arrondi
-    counter = Counter(rounded_prices)
-    
-    # Récupère les n niveaux les plus fréquents (niveau, nombre d'occurrences)
-    most_common = counter.most_common(n)
-    
-    # Retourne uniquement les niveaux (sans les comptes)
-    return [level for level, _ in most_common]
+    # Arrondi des prix à la précision donnée, comptage par np.bincount et sélection des
+    # n niveaux les plus fréquents (ex aequo départagés par ordre d'apparition, comme Counter.most_common)
+    return top_bins(prices, n, precision)
 
+@timed("macd.vectorized")
 def calculate_macd(df, fast=12, slow=26, signal=9):
     """
     Calcule les indicateurs MACD à partir d'un DataFrame contenant une colonne 'price'.
+    Le DataFrame d'entrée n'est pas modifié : les colonnes sont ajoutées sur une copie.
     
     Args:
         df (pd.DataFrame): DataFrame avec une colonne "price"
@@ -59,6 +56,8 @@ def calculate_macd(df, fast=12, slow=26, signal=9):
     Returns:
         pd.DataFrame: DataFrame enrichi avec les colonnes MACD (diff), DEA (signal) et Histogramme
     """
+    df = df.copy()
+
     # Calcul EMA rapide (fast)
     df["EMA_fast"] = df["price"].ewm(span=fast, adjust=False).mean()
     # Calcul EMA lente (slow)
@@ -73,11 +72,170 @@ def calculate_macd(df, fast=12, slow=26, signal=9):
 
     df["price_diff"] = df["price"].diff() # La méthode Pandas "diff" calcule la différence entre une valeur et la précédente
 
-    df["trend"] = df["price_diff"].apply( # Création d'une colonne "trend" dans le df pour catégoriser la tendance
-        lambda x: "up" if x > 0 else ("down" if x < 0 else "flat"))
+    # Catégorisation de la tendance par le signe de la variation (NaN de la première ligne = "flat")
+    df["trend"] = TREND_LABELS[np.sign(df["price_diff"].fillna(0).to_numpy()).astype(int) + 1]
     
     return df
 
+# Libellés indexés par np.sign(variation) + 1
+TREND_LABELS = np.array(["down", "flat", "up"])
+
+def _ewm_alpha(span):
+    # Même calcul que pandas : span -> centre de masse -> alpha
+    com = (span - 1) / 2
+    return 1. / (1. + com)
+
+def _ewm_step(weighted, cur, alpha):
+    # Une itération de ewm(adjust=False).mean(), avec les mêmes opérations flottantes que pandas
+    if weighted is None:
+        return cur
+    old_wt = 1. - alpha
+    if weighted != cur:
+        weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+    return weighted
+
+class MACDState:
+    """
+    État incrémental du MACD : EMA rapide, EMA lente et DEA.
+
+    Chaque nouvelle bougie est intégrée en O(1) avec `update`. Alimenté avec la même suite de prix,
+    l'état reproduit exactement calculate_macd (pandas ewm avec adjust=False).
+    `peek` calcule les valeurs pour une bougie encore en cours sans modifier l'état.
+
+    Args:
+        fast (int): période de l'EMA rapide
+        slow (int): période de l'EMA lente
+        signal (int): période de l'EMA du signal (DEA)
+    """
+
+    __slots__ = ("alpha_fast", "alpha_slow", "alpha_signal", "ema_fast", "ema_slow", "dea", "count")
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.alpha_fast = _ewm_alpha(fast)
+        self.alpha_slow = _ewm_alpha(slow)
+        self.alpha_signal = _ewm_alpha(signal)
+        self.ema_fast = None
+        self.ema_slow = None
+        self.dea = None
+        self.count = 0
+
+    def _advance(self, price):
+        ema_fast = _ewm_step(self.ema_fast, price, self.alpha_fast)
+        ema_slow = _ewm_step(self.ema_slow, price, self.alpha_slow)
+        dea = _ewm_step(self.dea, ema_fast - ema_slow, self.alpha_signal)
+        return ema_fast, ema_slow, dea
+
+    def peek(self, price):
+        """
+        Valeurs (macd_diff, macd_dea, histogramme) si `price` était la prochaine clôture, sans modifier l'état.
+        """
+        ema_fast, ema_slow, dea = self._advance(float(price))
+        return ema_fast - ema_slow, dea, ema_fast - ema_slow - dea
+
+    def update(self, price):
+        """
+        Intègre la clôture d'une nouvelle bougie et retourne (macd_diff, macd_dea, histogramme).
+        """
+        self.ema_fast, self.ema_slow, self.dea = self._advance(float(price))
+        self.count += 1
+        return self.ema_fast - self.ema_slow, self.dea, self.ema_fast - self.ema_slow - self.dea
+
+class MACDSeries:
+    """
+    Série MACD tenue à jour bougie par bougie pour le tableau de bord.
+
+    À chaque appel de `sync`, seules les bougies clôturées depuis l'appel précédent passent dans
+    MACDState (la dernière bougie, encore en cours, est évaluée avec `peek`) : le coût par minute
+    est constant au lieu de recalculer toute la fenêtre. Les valeurs sont conservées dans des
+    tableaux préalloués (au plus `maxlen` valeurs, compactés par moitié).
+
+    L'état démarre sur la première fenêtre chargée puis continue au fil des bougies : il peut
+    différer très légèrement d'un recalcul sur la seule fenêtre courante (écart qui décroît
+    en (1 - alpha)^k), ce qui est même plus juste puisque l'historique est plus long.
+
+    Args:
+        fast (int): période de l'EMA rapide
+        slow (int): période de l'EMA lente
+        signal (int): période de l'EMA du signal (DEA)
+        maxlen (int): nombre maximal de valeurs conservées
+    """
+
+    def __init__(self, fast=12, slow=26, signal=9, maxlen=100_000):
+        self.periods = (fast, slow, signal)
+        self.maxlen = maxlen
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.state = MACDState(*self.periods)
+        self._open_time = np.empty(self.maxlen * 2, dtype=np.int64)
+        self._values = np.empty((self.maxlen * 2, 3))
+        self._start = 0
+        self._end = 0
+
+    def _append(self, open_time, values):
+        if self._end == len(self._open_time):
+            # Compactage : on ne garde que les `maxlen` dernières valeurs (amorti O(1) par bougie)
+            keep = min(self.maxlen, self._end - self._start) - 1
+            self._open_time[:keep] = self._open_time[self._end - keep:self._end]
+            self._values[:keep] = self._values[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        self._open_time[self._end] = open_time
+        self._values[self._end] = values
+        self._end += 1
+
+    @timed("macd.incremental")
+    def sync(self, candles):
+        """
+        Met à jour la série avec les bougies reçues et retourne le MACD aligné sur elles.
+
+        Args:
+            candles (Candles): fenêtre de bougies courante (la dernière est supposée en cours).
+
+        Returns:
+            tuple: (macd_diff, macd_dea, histogramme), trois np.ndarray de longueur len(candles).
+        """
+        # Plusieurs sessions Dash peuvent appeler sync en même temps
+        with self._lock:
+            return self._sync(candles)
+
+    def _sync(self, candles):
+        if len(candles) == 0:
+            return np.empty(0), np.empty(0), np.empty(0)
+        if len(candles) > self.maxlen:
+            # Fenêtre plus longue que la capacité (ex: une année de bougies) : tableaux agrandis
+            self.maxlen = len(candles)
+            self._reset()
+
+        open_time = candles.open_time
+        close = candles.close
+        known = self._open_time[self._start:self._end]
+
+        # La fenêtre doit contenir la dernière bougie intégrée parmi ses bougies clôturées,
+        # sinon (fenêtre plus ancienne, ou trou plus long que la fenêtre) on repart de zéro
+        first_new = 0
+        if len(known):
+            first_new = np.searchsorted(open_time, known[-1])
+            if open_time[0] < known[0] or first_new >= len(candles) - 1 or open_time[first_new] != known[-1]:
+                self._reset()
+                first_new = 0
+            else:
+                first_new += 1
+
+        # Bougies clôturées pas encore intégrées (toutes sauf la dernière, encore en cours)
+        for i in range(first_new, len(candles) - 1):
+            self._append(open_time[i], self.state.update(close[i]))
+
+        start = self._start + np.searchsorted(self._open_time[self._start:self._end], open_time[0])
+        committed = self._values[start:self._end]
+        if len(committed) != len(candles) - 1:
+            # Fenêtre avec des trous par rapport à l'historique intégré : recalcul complet
+            self._reset()
+            return self._sync(candles)
+        last = np.array([self.state.peek(close[-1])])
+        values = np.concatenate((committed, last))
+        return values[:, 0], values[:, 1], values[:, 2]
+
 def create_macd_figure(df):
     """
     Crée une figure Plotly pour afficher le MACD avec DIF et DEA.
@@ -131,32 +289,209 @@ def create_macd_figure(df):
 
     return fig
 
+def create_line_figure(df):
+    """
+    Crée une figure Plotly de la courbe des prix de clôture.
+
+    Args:
+        df (pd.DataFrame): DataFrame contenant les colonnes "time" et "close"
+
+    Returns:
+        plotly.graph_objs._figure.Figure: figure interactive Plotly
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df["time"],
+        y=df["close"],
+        mode="lines",
+        name="Prix",
+        line=dict(color="blue", width=2)
+    ))
+
+    fig.update_layout(
+        xaxis_title="Temps",
+        yaxis_title="Prix (USDT)",
+        template="plotly_white",
+        uirevision="prix"  # <- Ceci permet de garder le zoom/pan
+    )
+
+    return fig
+
+def volume_colors(df):
+    """
+    Couleur de chaque barre de volume : vert si la bougie clôture au-dessus de son ouverture, sinon rouge.
+    """
+    return np.where(df["close"] >= df["open"], "green", "red")
+
+def create_candlestick_figure(df):
+    """
+    Crée une figure Plotly en chandeliers (OHLC) avec le volume en dessous.
+
+    Args:
+        df (pd.DataFrame): DataFrame contenant les colonnes "time", "open", "high", "low", "close", "volume"
+
+    Returns:
+        plotly.graph_objs._figure.Figure: figure interactive Plotly
+    """
+    fig = make_subplots(
+        rows=2, cols=1, shared_xaxes=True,
+        row_heights=[0.75, 0.25], vertical_spacing=0.03
+    )
+
+    # Chandeliers : les lignes de résistance (add_shape) restent sur ce premier axe (x / y)
+    fig.add_trace(
+        go.Candlestick(
+            x=df["time"],
+            open=df["open"],
+            high=df["high"],
+            low=df["low"],
+            close=df["close"],
+            name="Prix",
+        ),
+        row=1, col=1
+    )
+
+    # Barres de volume colorées selon le sens de la bougie
+    fig.add_trace(
+        go.Bar(
+            x=df["time"],
+            y=df["volume"],
+            name="Volume",
+            marker=dict(color=volume_colors(df)),
+            showlegend=False
+        ),
+        row=2, col=1
+    )
+
+    fig.update_layout(
+        xaxis_rangeslider_visible=False,
+        template="plotly_white",
+        uirevision="prix"  # <- Ceci permet de garder le zoom/pan
+    )
+    fig.update_xaxes(title_text="Temps", row=2, col=1)
+    fig.update_yaxes(title_text="Prix (USDT)", row=1, col=1)
+    fig.update_yaxes(title_text="Volume", row=2, col=1)
+
+    return fig
+
+
+def create_indicator_figure(df, panels):
+    """
+    Crée une figure Plotly d'indicateurs empilés, un panneau par indicateur, sur un axe des temps partagé.
+
+    Args:
+        df (pd.DataFrame): DataFrame contenant "time", "close" et les colonnes des indicateurs
+        panels (list of tuple): (titre, colonnes, overlay) par panneau ; avec overlay=True,
+            la clôture est tracée sous les séries (indicateurs exprimés en prix)
+
+    Returns:
+        plotly.graph_objs._figure.Figure: figure interactive Plotly
+    """
+    rows = max(len(panels), 1)
+    fig = make_subplots(
+        rows=rows, cols=1, shared_xaxes=True, vertical_spacing=0.04,
+        subplot_titles=[title for title, _, _ in panels] or None
+    )
+    for row, (title, columns, overlay) in enumerate(panels, start=1):
+        if overlay:
+            fig.add_trace(
+                go.Scatter(x=df["time"], y=df["close"], mode="lines", name="Prix",
+                           line=dict(color="lightgray"), showlegend=False),
+                row=row, col=1
+            )
+        for column in columns:
+            fig.add_trace(
+                go.Scatter(x=df["time"], y=df[column], mode="lines", name=column),
+                row=row, col=1
+            )
+
+    fig.update_layout(
+        height=max(250 * rows, 300),
+        template="plotly_white",
+        uirevision="indicateurs"  # <- Ceci permet de garder le zoom/pan
+    )
+    fig.update_xaxes(title_text="Temps", row=rows, col=1)
+
+    return fig
+
+
+def create_correlation_heatmap(matrix, symbols, latest=None, base=None):
+    """
+    Crée une carte de chaleur des corrélations glissantes entre paires (voir cross_asset.py).
+
+    Args:
+        matrix (np.ndarray): matrice des corrélations (symboles × symboles), NaN si inconnue
+        symbols (list of str): symboles des lignes et colonnes
+        latest (dict, optional): dernières statistiques par rapport à la référence ("beta", "zscore")
+        base (str, optional): symbole de référence
+
+    Returns:
+        plotly.graph_objs._figure.Figure: figure interactive Plotly
+    """
+    text = [["" if np.isnan(value) else f"{value:.2f}" for value in row] for row in matrix]
+    fig = go.Figure(go.Heatmap(
+        z=np.where(np.isnan(matrix), None, matrix).tolist(), x=symbols, y=symbols,
+        text=text, texttemplate="%{text}", zmin=-1, zmax=1, colorscale="RdBu", reversescale=True,
+        hovertemplate="%{y} / %{x} : %{z:.3f}<extra></extra>"
+    ))
+    title = "Corrélations des rendements (fenêtre glissante)"
+    if latest is not None and base is not None:
+        details = [f"{symbol} β {beta:.2f} z {zscore:+.1f}"
+                   for symbol, beta, zscore in zip(symbols, latest["beta"], latest["zscore"])
+                   if symbol != base and np.isfinite(beta) and np.isfinite(zscore)]
+        if details:
+            title += f"<br><sup>Par rapport à {base} : " + " · ".join(details) + "</sup>"
+    fig.update_layout(
+        title=title,
+        height=450,
+        template="plotly_white",
+        yaxis=dict(autorange="reversed"),
+        uirevision="correlations"
+    )
+    return fig
 
 # Note : L'exemple d'utilisation (chargement des prix, calcul des résistances, affichage des résultats)
 # doit être placé dans un script principal, pas dans ce module, pour garder la modularité.
 
 def classify_support_resistance(df, levels, seuil=0.03):
-    close_prices = df['price'].values
-    level_classification = {}
+    """
+    Classe chaque niveau en support, résistance ou neutre selon le comportement du prix autour de lui.
 
-    for level in levels:
-        support_count = 0
-        resistance_count = 0
-        neutral_count = 0
+    Pour chaque point proche du niveau (écart relatif <= seuil), on regarde le point précédent
+    et le suivant : tous deux au-dessus = rebond sur un support, tous deux en dessous = rejet
+    sous une résistance, sinon neutre. Le niveau prend la catégorie strictement majoritaire.
+    Tous les niveaux sont traités en une seule passe vectorisée (tableaux niveaux x prix).
 
-        for i in range(1, len(close_prices)-1):
-            if abs(close_prices[i] - level) / level <= seuil:
-                prev = close_prices[i - 1]
-                curr = close_prices[i]
-                nxt = close_prices[i + 1]
+    Args:
+        df (pd.DataFrame): DataFrame avec une colonne "price"
+        levels (List[float]): niveaux à classer
+        seuil (float): écart relatif maximal pour considérer un prix comme proche du niveau
 
-                if prev > level and nxt > level:
-                    support_count += 1
-                elif prev < level and nxt < level:
-                    resistance_count += 1
-                else:
-                    neutral_count += 1
+    Returns:
+        dict: {niveau: 'support' | 'resistance' | 'neutral'}
+    """
+    close_prices = np.asarray(df['price'].values, dtype=np.float64)
+    levels = list(levels)
+    if not levels:
+        return {}
+
+    # Niveaux en colonne, prix décalés en ligne : une ligne de comparaison par niveau
+    level_values = np.asarray(levels, dtype=np.float64)[:, None]
+    prev = close_prices[:-2]
+    curr = close_prices[1:-1]
+    nxt = close_prices[2:]
+
+    near = np.abs(curr - level_values) / level_values <= seuil
+    support = near & (prev > level_values) & (nxt > level_values)
+    resistance = near & (prev < level_values) & (nxt < level_values)
+
+    support_counts = support.sum(axis=1)
+    resistance_counts = resistance.sum(axis=1)
+    neutral_counts = near.sum(axis=1) - support_counts - resistance_counts
 
+    level_classification = {}
+    for level, support_count, resistance_count, neutral_count in zip(
+            levels, support_counts, resistance_counts, neutral_counts):
         if support_count > resistance_count and support_count > neutral_count:
             level_classification[level] = 'support'
         elif resistance_count > support_count and resistance_count > neutral_count:
@@ -165,5 +500,3 @@ def classify_support_resistance(df, levels, seuil=0.03):
             level_classification[level] = 'neutral'
 
     return level_classification
-
-
@@ -1,14 +1,21 @@
 # === Import des modules nécessaires ===
+import os
+
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
 
 # Import des fonctions internes du projet
 from callbacks import register_callbacks  # Pour enregistrer les interactions
-from analysis_tools import load_prices_from_json, calculate_macd, create_macd_figure
+from data_utils import attach_shared_feed, start_live_feed
+import metrics
+from compute_worker import indicator_worker
+from indicators import INDICATORS
+from resample import TIMEFRAMES
 
 # === Initialisation de l'application Dash ===
 app = dash.Dash(__name__)
+server = app.server  # Application WSGI (ex: gunicorn -w 4 app:server)
 
 # === Définition du layout principal de l'application ===
 app.layout = html.Div([
@@ -35,6 +42,8 @@ app.layout = html.Div([
     #         "fontStyle": "bold"
     #     }),
     html.Div(id="macd-trend-text", style={"textAlign": "center", "fontSize": "18px", "marginTop": "10px"}),
+    # Qualité des données affichées : bougies manquantes, doublons corrigés, dernière bougie (voir data_quality.py)
+    html.Div(id="data-quality", style={"textAlign": "center", "fontSize": "14px", "marginTop": "5px"}),
 
 
     html.H2("Historique des prix ETHUSDT sur la dernière journée"),
@@ -43,6 +52,33 @@ app.layout = html.Div([
     html.Div([
         html.Button("Recharger les données", id="reload-button", n_clicks=0),
         html.Button("Droites de résistances", id="toggle-resistances", n_clicks=0),
+        dcc.RadioItems(
+            id="chart-type",
+            options=[
+                {"label": "Courbe", "value": "line"},
+                {"label": "Chandeliers + volume", "value": "candles"},
+            ],
+            value="line",
+            inline=True,
+            style={"display": "inline-block", "marginLeft": "20px"}
+        ),
+        # Unité de temps des bougies (dérivée des bougies 1m, voir resample.py)
+        dcc.RadioItems(
+            id="timeframe",
+            options=[{"label": timeframe, "value": timeframe} for timeframe in TIMEFRAMES],
+            value="1m",
+            inline=True,
+            style={"display": "inline-block", "marginLeft": "20px"}
+        ),
+        # Plage de l'historique affichée (vide = dernière journée, mise à jour en continu)
+        dcc.DatePickerRange(
+            id="history-range",
+            display_format="YYYY-MM-DD",
+            clearable=True,
+            start_date_placeholder_text="Début",
+            end_date_placeholder_text="Fin",
+            style={"display": "inline-block", "marginLeft": "20px"}
+        ),
     ], style={"margin-bottom": "10px"}),
 
     # ✅ 3. Conteneur des sliders (pour configurer l'analyse des résistances)
@@ -74,6 +110,22 @@ app.layout = html.Div([
                 ),
                 style={"width": "400px", "margin-bottom": "20px"}
             ),
+
+            html.Label("Méthode de détection des niveaux"),
+            html.Div(
+                dcc.Dropdown(
+                    id="level-method",
+                    options=[
+                        {"label": "Fréquence des prix", "value": "frequency"},
+                        {"label": "Profil de volume", "value": "volume"},
+                        {"label": "Densité (KDE)", "value": "kde"},
+                        {"label": "Sommets / creux (swings)", "value": "swings"},
+                    ],
+                    value="frequency",
+                    clearable=False,
+                ),
+                style={"width": "400px", "margin-bottom": "20px"}
+            ),
         ],
         style={"display": "none", "margin-top": "10px"}  # Caché par défaut
     ),
@@ -82,14 +134,40 @@ app.layout = html.Div([
     dcc.Graph(id="historical-graph"),  # Graphe principal des prix
     dcc.Graph(id="macd-graph"),        # Graphe MACD
 
-    # ✅ 5. Intervalle automatique de mise à jour (toutes les 60 secondes)
+    # Panneaux d'indicateurs empilés sous le MACD (voir indicators.py)
+    dcc.Checklist(
+        id="indicator-panels",
+        options=[{"label": indicator.label, "value": name}
+                 for name, indicator in INDICATORS.items() if name != "macd"],
+        value=[],
+        inline=True,
+        style={"marginTop": "10px"}
+    ),
+    dcc.Graph(id="indicator-graph", style={"display": "none"}),
+
+    # Corrélations, bêtas et z-scores d'écart entre paires (voir cross_asset.py)
+    dcc.Checklist(
+        id="cross-asset-panel",
+        options=[{"label": "Corrélations multi-actifs", "value": "on"}],
+        value=[],
+        inline=True,
+        style={"marginTop": "10px"}
+    ),
+    dcc.Graph(id="correlation-heatmap", style={"display": "none"}),
+
+    # ✅ 5. Intervalle automatique de mise à jour (toutes les 5 secondes : relit le cache ou le flux temps réel)
     dcc.Interval(
         id='interval-component',
-        interval=60 * 1000,  # 60 secondes
+        interval=5 * 1000,  # 5 secondes
         n_intervals=0,
         max_intervals=-1     # Infini
     ),
 
+    # Version de l'instantané affiché (voir compute_worker.py) : déclenche le redessin des figures
+    dcc.Store(id="snapshot-version"),
+    # Largeur du graphique en pixels : fixe le nombre de points envoyés (voir downsampling.py)
+    dcc.Store(id="graph-width"),
+
     # ✅ 6. Popup de confirmation (apparaît brièvement après mise à jour)
     html.Div("Valeurs mises à jour !", id="popup-message", style={
         "display": "none",
@@ -116,6 +194,31 @@ app.layout = html.Div([
 # === Enregistrement des callbacks (interactions) dans l'app ===
 register_callbacks(app)
 
+# Premier affichage : dès la première requête (la page elle-même), le premier instantané est préparé
+# en tâche de fond pendant que le navigateur charge les scripts de Dash (voir IndicatorWorker.warm_up)
+@server.before_request
+def warm_up_snapshot():
+    indicator_worker.warm_up()
+
+# Durées par étape sur /metrics (format Prometheus) et profilage à la demande (voir metrics.py)
+metrics.install(app.server)
+
+# SHARED_FEED=1 : déploiement multi-processus, les bougies viennent du processus ingestor.py
+# (mémoire partagée) ; chaque processus Dash calcule ses instantanés à la demande, sans thread de fond.
+if os.environ.get("SHARED_FEED"):
+    attach_shared_feed(symbol="ETHUSDC", interval="1m")
+
 # === Lancement de l'application (uniquement si ce fichier est exécuté directement) ===
 if __name__ == "__main__":
-    app.run(debug=True)
+    # LIVE_FEED=1 : bougies reçues en continu par WebSocket (voir live_feed.py / replay_server.py)
+    if os.environ.get("LIVE_FEED"):
+        start_live_feed(symbol="ETHUSDC", interval="1m", lookback=1440)
+        indicator_worker.start()
+        # Pas de rechargement automatique : il relancerait le processus et donc un second flux
+        app.run(debug=True, use_reloader=False)
+    else:
+        # Calcul de fond des indicateurs, uniquement dans le processus servant les requêtes
+        # (avec le rechargement automatique, WERKZEUG_RUN_MAIN n'est défini que dans le processus enfant)
+        if os.environ.get("WERKZEUG_RUN_MAIN"):
+            indicator_worker.start()
+        app.run(debug=True)
@@ -0,0 +1,223 @@
+"""
+Construction d'un historique profond : récupère des mois de bougies via /api/v3/klines.
+
+La plage demandée est découpée en jours UTC (une partition du stockage colonnaire), traités du plus
+récent au plus ancien. Chaque jour est récupéré par pages de 1000 bougies (startTime / endTime),
+les jours étant traités en parallèle sur une session HTTP partagée et sous le seau à jetons de
+batch_fetcher.py (limite de poids Binance). Un jour récupéré est écrit dans sa partition par le
+thread principal (un seul écrivain), puis noté dans un fichier de reprise : une commande
+interrompue reprend là où elle s'était arrêtée. Le jour en cours n'est jamais noté comme terminé.
+
+repair_gaps (option --repair) ne redemande que les plages manquantes de l'index de qualité
+(voir data_quality.py).
+
+Usage :
+    python backfill.py --symbol ETHUSDC --days 365
+    python backfill.py --start 2024-01-01 --end 2024-07-01 --workers 16
+    python backfill.py --days 365 --repair
+    python mock_binance.py --port 8000 & python backfill.py --days 365 --base-url http://127.0.0.1:8000
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import kline_store
+from batch_fetcher import PAGE_LIMIT, TokenBucket, fetch_klines_with_retry, make_session, pages
+from candles import Candles
+from get_daily_prices import BINANCE_API_URL
+from history_index import to_ms
+from kline_cache import interval_to_seconds
+
+CHECKPOINT_FILE = ".backfill.json"
+
+
+def checkpoint_path(symbol, interval, root=kline_store.STORE_ROOT):
+    """
+    Fichier de reprise d'un marché (prices_history/<symbole>/<intervalle>/.backfill.json).
+    """
+    return os.path.join(root, symbol, interval, CHECKPOINT_FILE)
+
+
+def load_checkpoint(path):
+    """
+    Returns:
+        set of str: jours (YYYY-MM-DD) déjà entièrement récupérés.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return set(json.load(f)["days"])
+
+
+def save_checkpoint(path, days):
+    # Temporaire puis renommage : une interruption pendant l'écriture ne corrompt pas la reprise
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"days": sorted(days)}, f)
+    os.replace(tmp, path)
+
+
+def backfill(symbol="ETHUSDC", interval="1m", start=None, end=None, base_url=BINANCE_API_URL,
+             max_workers=8, bucket=None, root=kline_store.STORE_ROOT, resume=True, progress=None):
+    """
+    Remplit le stockage colonnaire entre `start` et `end`.
+
+    Args:
+        symbol (str): symbole du marché (ex: "ETHUSDC").
+        interval (str): intervalle des bougies (ex: "1m").
+        start: début de la plage (voir history_index.to_ms).
+        end: fin de la plage, exclue (par défaut maintenant).
+        base_url (str): URL de base de l'API.
+        max_workers (int): nombre de jours récupérés simultanément.
+        bucket (TokenBucket, optional): limiteur partagé (par défaut la limite Binance).
+        root (str): racine du stockage colonnaire.
+        resume (bool): ignore les jours notés dans le fichier de reprise.
+        progress (callable, optional): appelée avec (jours terminés, jours à récupérer, bougies écrites).
+
+    Returns:
+        dict: {"days": jours récupérés, "skipped": jours déjà faits, "candles": bougies écrites,
+               "requests": requêtes envoyées, "seconds": durée}.
+    """
+    started = time.perf_counter()
+    now_ms = int(time.time() * 1000)
+    end_ms = min(now_ms, to_ms(end)) if end is not None else now_ms
+    start_ms = to_ms(start)
+    interval_ms = interval_to_seconds(interval) * 1000
+
+    # Jours de la plage, du plus récent au plus ancien
+    first_day = start_ms - start_ms % kline_store.DAY_MS
+    days = [day for day in range(first_day, end_ms, kline_store.DAY_MS)][::-1]
+    path = checkpoint_path(symbol, interval, root)
+    done = load_checkpoint(path) if resume else set()
+    todo = [day for day in days if kline_store.day_of(day) not in done]
+
+    bucket = bucket or TokenBucket()
+    session = make_session(max_workers)
+    stats = {"days": 0, "skipped": len(days) - len(todo), "candles": 0, "requests": 0}
+
+    def fetch_day(day_start):
+        day_pages = pages(max(day_start, start_ms), min(day_start + kline_store.DAY_MS, end_ms), interval_ms)
+        raw = []
+        for page_start, page_end in day_pages:
+            raw.extend(fetch_klines_with_retry(session, bucket, symbol, interval, limit=PAGE_LIMIT,
+                                               start_time=page_start, end_time=page_end, base_url=base_url))
+        return Candles.from_binance(raw), len(day_pages)
+
+    with session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch_day, day): day for day in todo}
+        for future in as_completed(futures):
+            day = futures[future]
+            candles, n_requests = future.result()
+            candles = candles[(candles.open_time >= start_ms) & (candles.open_time < end_ms)]
+            kline_store.append_klines(symbol, interval, candles, root)
+            stats["requests"] += n_requests
+            stats["candles"] += len(candles)
+            stats["days"] += 1
+            # Jour complet (ni en cours, ni tronqué par les bornes) : plus jamais redemandé
+            if day >= start_ms and day + kline_store.DAY_MS <= end_ms:
+                done.add(kline_store.day_of(day))
+                save_checkpoint(path, done)
+            if progress is not None:
+                progress(stats["days"], len(todo), stats["candles"])
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def repair_gaps(symbol="ETHUSDC", interval="1m", start=None, end=None, base_url=BINANCE_API_URL,
+                max_workers=8, bucket=None, root=kline_store.STORE_ROOT):
+    """
+    Redemande uniquement les plages manquantes signalées par l'index de qualité (voir data_quality.py).
+
+    Les trous toujours vides après la nouvelle demande sont notés comme non récupérables
+    (absents chez Binance) et ne sont plus redemandés.
+
+    Args:
+        symbol (str): symbole du marché.
+        interval (str): intervalle des bougies.
+        start: début de la plage réparée (voir history_index.to_ms, par défaut tout le stockage).
+        end: fin de la plage réparée, exclue (par défaut maintenant).
+        base_url (str): URL de base de l'API.
+        max_workers (int): nombre de plages récupérées simultanément.
+        bucket (TokenBucket, optional): limiteur partagé.
+        root (str): racine du stockage colonnaire.
+
+    Returns:
+        dict: {"gaps": trous redemandés, "candles": bougies récupérées, "unfillable": trous restés vides}.
+    """
+    start_ms = None if start is None else to_ms(start)
+    end_ms = None if end is None else to_ms(end)
+    interval_ms = interval_to_seconds(interval) * 1000
+
+    todo = []
+    for day, quality in kline_store.quality_index(symbol, interval, root, start_ms, end_ms).items():
+        unfillable = {tuple(gap) for gap in quality.get("unfillable", [])}
+        for gap in quality["gaps"]:
+            if tuple(gap) in unfillable:
+                continue
+            lo = gap[0] if start_ms is None else max(gap[0], start_ms)
+            hi = gap[1] if end_ms is None else min(gap[1], end_ms)
+            if hi > lo:
+                todo.append((day, gap, lo, hi))
+    stats = {"gaps": len(todo), "candles": 0, "unfillable": 0}
+    if not todo:
+        return stats
+
+    bucket = bucket or TokenBucket()
+    session = make_session(max_workers)
+
+    def fetch_gap(lo, hi):
+        raw = []
+        for page_start, page_end in pages(lo, hi, interval_ms):
+            raw.extend(fetch_klines_with_retry(session, bucket, symbol, interval, limit=PAGE_LIMIT,
+                                               start_time=page_start, end_time=page_end, base_url=base_url))
+        return Candles.from_binance(raw)
+
+    with session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch_gap, lo, hi): (day, gap) for day, gap, lo, hi in todo}
+        for future in as_completed(futures):
+            day, gap = futures[future]
+            candles = future.result()
+            if len(candles):
+                kline_store.append_klines(symbol, interval, candles, root)
+                stats["candles"] += len(candles)
+            else:
+                kline_store.mark_unfillable(symbol, interval, day, [gap], root)
+                stats["unfillable"] += 1
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Récupère un historique profond de bougies (reprise possible)")
+    parser.add_argument("--symbol", default="ETHUSDC")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--days", type=int, default=30, help="jours à remonter (si --start est absent)")
+    parser.add_argument("--start", help="début de la plage (ex: 2024-01-01)")
+    parser.add_argument("--end", help="fin de la plage, exclue (par défaut maintenant)")
+    parser.add_argument("--workers", type=int, default=8, help="jours récupérés simultanément")
+    parser.add_argument("--base-url", default=BINANCE_API_URL)
+    parser.add_argument("--root", default=kline_store.STORE_ROOT)
+    parser.add_argument("--no-resume", action="store_true", help="ignore le fichier de reprise")
+    parser.add_argument("--repair", action="store_true", help="redemande seulement les trous de la plage")
+    args = parser.parse_args()
+
+    end = args.end
+    start = args.start or int(time.time() * 1000) - args.days * kline_store.DAY_MS
+
+    if args.repair:
+        stats = repair_gaps(args.symbol, args.interval, start, end, base_url=args.base_url,
+                            max_workers=args.workers, root=args.root)
+        print(f"{stats['gaps']} trou(s) redemandé(s), {stats['candles']} bougies récupérées, "
+              f"{stats['unfillable']} absent(s) chez Binance")
+    else:
+        def report(finished, total, candles):
+            if finished % 10 == 0 or finished == total:
+                print(f"{finished}/{total} jours, {candles} bougies")
+
+        stats = backfill(args.symbol, args.interval, start, end, base_url=args.base_url,
+                         max_workers=args.workers, root=args.root, resume=not args.no_resume, progress=report)
+        print(f"{stats['days']} jours récupérés ({stats['skipped']} déjà faits), {stats['candles']} bougies, "
+              f"{stats['requests']} requêtes en {stats['seconds']:.1f} s")
@@ -0,0 +1,250 @@
+"""
+Backtest vectorisé des signaux affichés par le tableau de bord.
+
+Deux stratégies rejouent l'historique stocké :
+    - "macd"   : croisements DIF / DEA de calculate_macd (position longue quand DIF > DEA,
+                 ou l'inverse avec `invert=True`, qui correspond au statut vert du tableau de bord : DEA > DIF)
+    - "levels" : contacts avec les niveaux de find_resistance_levels classés par
+                 classify_support_resistance (achat sur un support, vente sur une résistance)
+    - "combined" : positions de "levels" prises uniquement dans le sens du MACD
+
+Pas de boucle par bougie : les signaux, positions, frais et rendements sont des opérations NumPy
+sur toute la série. Seul le recalcul des niveaux boucle, une fois par fenêtre de calibration.
+Les niveaux d'une fenêtre sont calculés sur la fenêtre précédente uniquement (pas de biais
+d'anticipation), et un signal de la bougie t n'est exécuté qu'à partir de la bougie t + 1.
+
+Usage :
+    python backtest.py --symbol ETHUSDC --start 2025-01-01 --end 2025-12-31
+"""
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from analysis_tools import calculate_macd, classify_support_resistance, find_resistance_levels
+from kline_cache import interval_to_seconds
+
+# Frais de négociation Binance (taker, sans réduction BNB) et glissement supposé, par unité échangée
+DEFAULT_FEE = 0.001
+DEFAULT_SLIPPAGE = 0.0005
+
+# Paramètres propres à chaque famille de signaux
+MACD_PARAMS = ("fast", "slow", "signal", "invert")
+LEVEL_PARAMS = ("n", "precision", "seuil", "window")
+
+
+def macd_positions(close, fast=12, slow=26, signal=9, invert=False, allow_short=False):
+    """
+    Positions de la stratégie de croisement MACD.
+
+    Args:
+        close (np.ndarray): prix de clôture.
+        fast, slow, signal (int): périodes de calculate_macd.
+        invert (bool): position longue quand DEA > DIF (statut vert du tableau de bord).
+        allow_short (bool): position vendeuse (-1) au lieu de neutre (0) dans l'autre cas.
+
+    Returns:
+        np.ndarray: position souhaitée à la clôture de chaque bougie (1, 0 ou -1).
+    """
+    macd = calculate_macd(pd.DataFrame({"price": close}), fast=fast, slow=slow, signal=signal)
+    above = macd["macd_diff"].to_numpy() > macd["macd_dea"].to_numpy()
+    if invert:
+        above = ~above
+    return np.where(above, 1.0, -1.0 if allow_short else 0.0)
+
+
+def level_signals(close, n=5, precision=10, seuil=0.001, window=1440):
+    """
+    Signaux de contact avec les niveaux de support / résistance.
+
+    Pour chaque fenêtre de `window` bougies, les niveaux et leur classification sont calculés
+    sur la fenêtre précédente ; une bougie dont la clôture est à moins de `seuil` (relatif)
+    d'un support donne +1, d'une résistance -1 (0 si les deux ou aucun).
+
+    Returns:
+        np.ndarray: signal de chaque bougie (1, 0 ou -1).
+    """
+    signals = np.zeros(len(close))
+    for start in range(window, len(close), window):
+        history = close[start - window:start]
+        levels = find_resistance_levels(history, n=n, precision=precision)
+        classification = classify_support_resistance(pd.DataFrame({"price": history}), levels, seuil=seuil)
+        supports = np.array([lvl for lvl in levels if classification.get(lvl) == "support"])
+        resistances = np.array([lvl for lvl in levels if classification.get(lvl) == "resistance"])
+
+        segment = close[start:start + window]
+        near_support = np.zeros(len(segment), dtype=bool)
+        near_resistance = np.zeros(len(segment), dtype=bool)
+        if len(supports):
+            near_support = (np.abs(segment - supports[:, None]) / supports[:, None] <= seuil).any(axis=0)
+        if len(resistances):
+            near_resistance = (np.abs(segment - resistances[:, None]) / resistances[:, None] <= seuil).any(axis=0)
+        signals[start:start + window] = near_support.astype(float) - near_resistance.astype(float)
+    return signals
+
+
+def hold_positions(signals, allow_short=False):
+    """
+    Transforme des signaux ponctuels en positions tenues jusqu'au signal opposé.
+
+    Args:
+        signals (np.ndarray): +1 (achat), -1 (vente), 0 (rien).
+        allow_short (bool): une vente ouvre une position vendeuse au lieu de solder la position.
+
+    Returns:
+        np.ndarray: position à la clôture de chaque bougie.
+    """
+    # Indice du dernier signal non nul à chaque bougie (propagation vers l'avant, sans boucle)
+    last = np.where(signals != 0, np.arange(len(signals)), -1)
+    np.maximum.accumulate(last, out=last)
+    positions = np.where(last >= 0, signals[last], 0.0)
+    if not allow_short:
+        positions = np.maximum(positions, 0.0)
+    return positions
+
+
+def combined_positions(macd, levels):
+    """
+    Positions de la stratégie sur niveaux, conservées seulement quand le MACD va dans le même sens.
+
+    Args:
+        macd (np.ndarray): positions de macd_positions.
+        levels (np.ndarray): positions de hold_positions(level_signals(...)).
+
+    Returns:
+        np.ndarray: position à la clôture de chaque bougie.
+    """
+    return np.where(np.sign(levels) == np.sign(macd), levels, 0.0)
+
+
+def simulate(close, positions, fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE, capital=1000.0,
+             periods_per_year=365 * 24 * 60):
+    """
+    Simule l'exécution de positions cibles et calcule PnL, drawdown et statistiques des trades.
+
+    La position décidée à la clôture de la bougie t est tenue pendant la bougie t + 1 ; chaque
+    changement de position paie `fee + slippage` par unité de capital échangée.
+
+    Args:
+        close (np.ndarray): prix de clôture.
+        positions (np.ndarray): position cible à chaque clôture (fraction du capital, signée).
+        fee (float): frais relatifs par unité échangée.
+        slippage (float): glissement relatif par unité échangée.
+        capital (float): capital initial (devise de cotation).
+        periods_per_year (int): bougies par an, pour annualiser le ratio de Sharpe.
+
+    Returns:
+        dict: total_return, pnl, max_drawdown, sharpe, trades, win_rate, exposure, equity (np.ndarray).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    positions = np.nan_to_num(np.asarray(positions, dtype=np.float64))
+    if len(close) < 2:
+        return {"total_return": 0.0, "pnl": 0.0, "max_drawdown": 0.0, "sharpe": 0.0,
+                "trades": 0, "win_rate": 0.0, "exposure": 0.0, "equity": np.full(len(close), capital)}
+
+    held = positions[:-1]  # Position tenue pendant chaque bougie suivante
+    returns = held * np.diff(close) / close[:-1]
+    turnover = np.abs(np.diff(np.concatenate(([0.0], held))))
+    returns -= turnover * (fee + slippage)
+
+    equity = capital * np.cumprod(1 + np.concatenate(([0.0], returns)))
+    drawdown = 1 - equity / np.maximum.accumulate(equity)
+
+    # Trades : suites de bougies de même position non nulle, rendement composé de chacune
+    changes = np.flatnonzero(np.diff(held) != 0) + 1
+    starts = np.concatenate(([0], changes))
+    trade_returns = np.multiply.reduceat(1 + returns, starts) - 1
+    in_market = held[starts] != 0
+    trade_returns = trade_returns[in_market]
+
+    std = returns.std()
+    return {
+        "total_return": equity[-1] / capital - 1,
+        "pnl": equity[-1] - capital,
+        "max_drawdown": drawdown.max(),
+        "sharpe": returns.mean() / std * np.sqrt(periods_per_year) if std > 0 else 0.0,
+        "trades": int(in_market.sum()),
+        "win_rate": float((trade_returns > 0).mean()) if len(trade_returns) else 0.0,
+        "exposure": float((held != 0).mean()),
+        "equity": equity,
+    }
+
+
+def backtest(candles, strategy="macd", fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE, interval="1m",
+             allow_short=False, **params):
+    """
+    Rejoue une série de bougies avec une stratégie et retourne son rapport (voir simulate).
+
+    Args:
+        candles (Candles): bougies triées par open_time.
+        strategy (str): "macd", "levels" ou "combined".
+        fee (float): frais relatifs par unité échangée.
+        slippage (float): glissement relatif par unité échangée.
+        interval (str): intervalle des bougies (pour annualiser).
+        allow_short (bool): autorise les positions vendeuses.
+        **params: paramètres de macd_positions (fast, slow, signal, invert)
+            et / ou de level_signals (n, precision, seuil, window).
+
+    Returns:
+        dict: rapport de simulate.
+    """
+    close = candles.close
+    macd_params = {k: params.pop(k) for k in MACD_PARAMS if k in params}
+    if strategy == "macd":
+        positions = macd_positions(close, allow_short=allow_short, **macd_params)
+    elif strategy == "levels":
+        positions = hold_positions(level_signals(close, **params), allow_short=allow_short)
+    elif strategy == "combined":
+        positions = combined_positions(macd_positions(close, allow_short=allow_short, **macd_params),
+                                       hold_positions(level_signals(close, **params), allow_short=allow_short))
+    else:
+        raise ValueError(f"Stratégie de backtest inconnue : {strategy}")
+    periods_per_year = 365 * 24 * 3600 // interval_to_seconds(interval)
+    return simulate(close, positions, fee=fee, slippage=slippage, periods_per_year=periods_per_year)
+
+
+def run_grid(candles, strategy, grid, **options):
+    """
+    Backtest de toutes les combinaisons d'une grille de paramètres.
+
+    Args:
+        candles (Candles): bougies rejouées.
+        strategy (str): "macd", "levels" ou "combined".
+        grid (dict): {paramètre: liste de valeurs}, ex: {"fast": [8, 12], "slow": [26, 30]}.
+        **options: options communes de backtest (fee, slippage, interval, allow_short).
+
+    Returns:
+        pd.DataFrame: une ligne par combinaison, triée par rendement total décroissant.
+    """
+    names = list(grid)
+    rows = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(zip(names, values))
+        report = backtest(candles, strategy, **options, **params)
+        report.pop("equity")
+        rows.append({**params, **report})
+    return pd.DataFrame(rows).sort_values("total_return", ascending=False, ignore_index=True)
+
+
+if __name__ == "__main__":
+    from history_index import load_range
+
+    parser = argparse.ArgumentParser(description="Backtest des signaux MACD et support / résistance")
+    parser.add_argument("--symbol", default="ETHUSDC")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--start", required=True, help="début (ex: 2025-01-01)")
+    parser.add_argument("--end", required=True, help="fin exclue (ex: 2026-01-01)")
+    parser.add_argument("--fee", type=float, default=DEFAULT_FEE)
+    parser.add_argument("--slippage", type=float, default=DEFAULT_SLIPPAGE)
+    parser.add_argument("--short", action="store_true", help="autorise les positions vendeuses")
+    args = parser.parse_args()
+
+    candles = load_range(args.symbol, args.start, args.end, args.interval)
+    print(f"{len(candles)} bougies {args.symbol} {args.interval}")
+    options = dict(fee=args.fee, slippage=args.slippage, interval=args.interval, allow_short=args.short)
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(run_grid(candles, "macd", {"fast": [8, 12], "slow": [21, 26], "signal": [9],
+                                         "invert": [False, True]}, **options))
+        print(run_grid(candles, "levels", {"n": [5, 10], "precision": [5, 10, 20], "seuil": [0.001]},
+                       **options))
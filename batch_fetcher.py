@@ -0,0 +1,181 @@
+"""
+Récupération concurrente des bougies pour de nombreuses paires (symbole, intervalle).
+
+- une seule requests.Session dont le pool de connexions HTTP est partagé par les threads ;
+- un seau à jetons (token bucket) qui respecte la limite de poids de l'API Binance ;
+- des nouvelles tentatives avec délai exponentiel et gigue sur les erreurs temporaires ;
+- chaque résultat est écrit dans sa propre partition du stockage colonnaire.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import kline_store
+from candles import Candles
+from get_daily_prices import BINANCE_API_URL, fetch_klines
+from kline_cache import interval_to_seconds
+
+# Limite de poids Binance par minute et par IP (REQUEST_WEIGHT de /api/v3/exchangeInfo)
+BINANCE_WEIGHT_PER_MINUTE = 6000
+
+# Codes HTTP temporaires : limite atteinte (429), IP bannie temporairement (418), erreurs serveur
+RETRYABLE_STATUS = {418, 429, 500, 502, 503, 504}
+
+
+PAGE_LIMIT = 1000  # Maximum de bougies par requête /api/v3/klines
+
+
+def klines_weight(limit):
+    """
+    Poids d'une requête /api/v3/klines (barème Binance actuel : 2 quel que soit `limit`).
+    """
+    return 2
+
+
+def pages(start_ms, end_ms, interval_ms):
+    """
+    Pages de PAGE_LIMIT bougies (startTime, endTime inclus) couvrant [start_ms, end_ms).
+    """
+    page_ms = PAGE_LIMIT * interval_ms
+    return [(start, min(start + page_ms, end_ms) - 1) for start in range(start_ms, end_ms, page_ms)]
+
+
+class TokenBucket:
+    """
+    Seau à jetons partagé entre threads.
+
+    Args:
+        rate (float): jetons ajoutés par seconde.
+        capacity (float): nombre maximal de jetons (rafale autorisée).
+    """
+
+    def __init__(self, rate=BINANCE_WEIGHT_PER_MINUTE / 60, capacity=BINANCE_WEIGHT_PER_MINUTE):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Bloque jusqu'à ce que `tokens` jetons soient disponibles, puis les consomme.
+
+        Returns:
+            float: temps d'attente en secondes.
+
+        Raises:
+            ValueError: si `tokens` dépasse la capacité (le seau ne les contiendrait jamais).
+        """
+        if tokens > self.capacity:
+            raise ValueError(f"{tokens} jetons demandés pour une capacité de {self.capacity}")
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                missing = (tokens - self._tokens) / self.rate
+            time.sleep(missing)
+            waited += missing
+
+
+def make_session(pool_size=32):
+    """
+    Crée une session HTTP avec un pool de connexions persistantes dimensionné pour `pool_size` threads.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_klines_with_retry(session, bucket, symbol, interval, limit=1000, start_time=None,
+                            base_url=BINANCE_API_URL, retries=5, backoff=0.5, end_time=None):
+    """
+    fetch_klines limité par le seau à jetons, avec nouvelles tentatives sur les erreurs temporaires.
+
+    Le délai avant la tentative k est tiré uniformément dans [0, backoff * 2^k] (« full jitter »),
+    ou vaut l'en-tête Retry-After renvoyé par Binance s'il est présent.
+
+    Returns:
+        list of list: bougies brutes.
+    """
+    for attempt in range(retries + 1):
+        bucket.acquire(klines_weight(limit))
+        try:
+            return fetch_klines(symbol=symbol, interval=interval, limit=limit, start_time=start_time,
+                                end_time=end_time, base_url=base_url, session=session)
+        except requests.HTTPError as exc:
+            status = exc.response.status_code
+            if status not in RETRYABLE_STATUS or attempt == retries:
+                raise
+            retry_after = exc.response.headers.get("Retry-After")
+            delay = float(retry_after) if retry_after else random.uniform(0, backoff * 2 ** attempt)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            delay = random.uniform(0, backoff * 2 ** attempt)
+        time.sleep(delay)
+
+
+def fetch_batch(pairs, lookback=1440, base_url=BINANCE_API_URL, max_workers=16, bucket=None,
+                root=kline_store.STORE_ROOT, incremental=True, retries=5):
+    """
+    Récupère en parallèle les bougies de plusieurs paires (symbole, intervalle) et les stocke.
+
+    En mode incrémental, chaque paire ne demande que les bougies depuis sa dernière bougie stockée
+    (comme update_daily_prices) ; sinon les `lookback` dernières bougies. La plage est demandée par
+    pages de PAGE_LIMIT bougies : un trou plus long qu'une page (longue coupure) est comblé en entier.
+
+    Args:
+        pairs (list of tuple): paires (symbole, intervalle), ex: [("ETHUSDC", "1m"), ("BTCUSDC", "5m")].
+        lookback (int): fenêtre demandée quand la paire n'a pas encore d'historique.
+        base_url (str): URL de base de l'API.
+        max_workers (int): nombre de requêtes simultanées.
+        bucket (TokenBucket, optional): limiteur partagé (par défaut la limite Binance).
+        root (str): racine du stockage colonnaire.
+        incremental (bool): ne demande que les nouvelles bougies.
+        retries (int): nombre de nouvelles tentatives par paire.
+
+    Returns:
+        dict: {(symbole, intervalle): Candles reçues, ou l'exception levée pour cette paire}.
+    """
+    bucket = bucket or TokenBucket()
+    session = make_session(max_workers)
+
+    def fetch_one(pair):
+        symbol, interval = pair
+        interval_ms = interval_to_seconds(interval) * 1000
+        now_ms = int(time.time() * 1000)
+        start_ms = now_ms - now_ms % interval_ms - (lookback - 1) * interval_ms
+        if incremental:
+            last_open = kline_store.last_open_time(symbol, interval, root)
+            if last_open is not None and last_open >= start_ms:
+                start_ms = last_open
+        raw = []
+        for page_start, page_end in pages(start_ms, now_ms + 1, interval_ms):
+            raw.extend(fetch_klines_with_retry(
+                session, bucket, symbol, interval, limit=PAGE_LIMIT, start_time=page_start,
+                end_time=page_end, base_url=base_url, retries=retries,
+            ))
+        candles = Candles.from_binance(raw)
+        kline_store.append_klines(symbol, interval, candles, root)
+        return candles
+
+    results = {}
+    with session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {pair: executor.submit(fetch_one, pair) for pair in pairs}
+        for pair, future in futures.items():
+            try:
+                results[pair] = future.result()
+            except Exception as exc:  # Une paire en échec n'interrompt pas les autres
+                results[pair] = exc
+    return results
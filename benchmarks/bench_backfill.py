@@ -0,0 +1,48 @@
+"""
+Benchmark de backfill.backfill contre le serveur local mock_binance.py.
+
+Remplit `--days` jours de bougies 1m dans un stockage temporaire, vérifie qu'aucune bougie ne
+manque, puis relance la commande : grâce au fichier de reprise, seul le jour en cours est redemandé.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_backfill --days 365 --workers 8 --latency 0.05
+"""
+import argparse
+import tempfile
+import time
+
+import kline_store
+from backfill import backfill
+from batch_fetcher import TokenBucket
+from benchmarks.bench_batch_fetch import MockServerProcess
+from history_index import load_range
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="latence simulée (secondes)")
+    args = parser.parse_args()
+
+    now_ms = int(time.time() * 1000)
+    start = now_ms - now_ms % kline_store.DAY_MS - args.days * kline_store.DAY_MS
+    with MockServerProcess(latency=args.latency) as server, tempfile.TemporaryDirectory() as root:
+        # Limite Binance réelle (6000 de poids par minute), sans la rafale initiale de tout un seau
+        stats = backfill("ETHUSDC", "1m", start, base_url=server.url, max_workers=args.workers,
+                         bucket=TokenBucket(capacity=100), root=root)
+        print(f"{stats['days']} jours, {stats['candles']} bougies, {stats['requests']} requêtes "
+              f"en {stats['seconds']:.1f} s ({stats['candles'] / stats['seconds']:.0f} bougies/s)")
+
+        candles = load_range("ETHUSDC", start, now_ms, root=root)
+        expected = (now_ms - start) // 60_000 + 1
+        print(f"stockage : {len(candles)} bougies sur {expected} attendues, "
+              f"{len(kline_store.list_partitions('ETHUSDC', '1m', root))} partitions")
+
+        stats = backfill("ETHUSDC", "1m", start, base_url=server.url, max_workers=args.workers, root=root)
+        print(f"reprise : {stats['days']} jour(s) redemandé(s), {stats['skipped']} déjà faits, "
+              f"{stats['seconds']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark de batch_fetcher.fetch_batch contre le serveur local mock_binance.py.
+
+Compare, pour N symboles, la boucle séquentielle (une requête et une connexion par symbole,
+comme get_daily_prices) à la récupération concurrente sur une session partagée.
+Le mock ajoute une latence par réponse pour simuler l'aller-retour réseau.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_batch_fetch --symbols 60 --latency 0.05
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+
+import kline_store
+from batch_fetcher import PAGE_LIMIT, TokenBucket, fetch_batch, klines_weight
+from candles import Candles
+from get_daily_prices import fetch_klines
+from mock_binance import MockBinanceServer
+
+
+class MockServerProcess:
+    """
+    Lance MockBinanceServer dans un processus séparé : la génération des réponses ne partage pas
+    le GIL avec le client mesuré. Les compteurs du serveur sont exposés via une mémoire partagée.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._rows = multiprocessing.Value("q", 0)
+        self._ready = multiprocessing.Event()
+        self._port = multiprocessing.Value("i", 0)
+        self._process = None
+
+    @staticmethod
+    def _serve(latency, port, rows, ready):
+        server = MockBinanceServer(latency=latency)
+        record = server.record
+
+        def record_shared(n_rows, nbytes):
+            record(n_rows, nbytes)
+            with rows.get_lock():
+                rows.value += n_rows
+
+        server.record = record_shared
+        port.value = server.server_address[1]
+        ready.set()
+        server.serve_forever()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._port.value}"
+
+    @property
+    def rows_served(self):
+        return self._rows.value
+
+    def __enter__(self):
+        self._process = multiprocessing.Process(
+            target=self._serve, args=(self.latency, self._port, self._rows, self._ready), daemon=True
+        )
+        self._process.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05, help="latence simulée (secondes)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 16, 32])
+    args = parser.parse_args()
+
+    pairs = [(f"SYM{i:03d}USDC", "1m") for i in range(args.symbols)]
+    with MockServerProcess(latency=args.latency) as server:
+        with tempfile.TemporaryDirectory() as root:
+            start = time.perf_counter()
+            for symbol, interval in pairs:
+                candles = Candles.from_binance(fetch_klines(symbol, interval, limit=1000, base_url=server.url))
+                kline_store.append_klines(symbol, interval, candles, root)
+            sequential = time.perf_counter() - start
+            print(f"séquentiel          : {sequential:6.2f} s pour {len(pairs)} symboles")
+
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as root:
+                start = time.perf_counter()
+                results = fetch_batch(pairs, lookback=1000, base_url=server.url, max_workers=workers, root=root)
+                elapsed = time.perf_counter() - start
+                errors = sum(isinstance(r, Exception) for r in results.values())
+                print(f"concurrent ({workers:>2} thr) : {elapsed:6.2f} s  x{sequential / elapsed:.1f}  erreurs : {errors}")
+
+                # Deuxième passage incrémental : une ou deux bougies par symbole
+                rows_before = server.rows_served
+                start = time.perf_counter()
+                fetch_batch(pairs, lookback=1000, base_url=server.url, max_workers=workers, root=root)
+                print(f"  incrémental       : {time.perf_counter() - start:6.2f} s, "
+                      f"{(server.rows_served - rows_before) / len(pairs):.1f} bougies/symbole")
+
+        # Limiteur : une requête de poids klines_weight par paire, 20 jetons/s au-delà de la rafale
+        weight = klines_weight(PAGE_LIMIT)
+        with tempfile.TemporaryDirectory() as root:
+            start = time.perf_counter()
+            fetch_batch(pairs, lookback=1000, base_url=server.url, max_workers=32, root=root,
+                        bucket=TokenBucket(rate=20, capacity=20))
+            print(f"limité à 20 de poids/s : {time.perf_counter() - start:6.2f} s "
+                  f"(attendu ≈ {(len(pairs) * weight - 20) / 20:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
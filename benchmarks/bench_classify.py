@@ -0,0 +1,86 @@
+"""
+Benchmark de classify_support_resistance : implémentation vectorisée contre l'ancienne boucle Python.
+
+Vérifie que les deux versions donnent exactement la même classification, puis mesure
+le temps pour 20 niveaux sur 1 jour, 1 semaine et 4 semaines de bougies 1m.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_classify
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis_tools import classify_support_resistance, find_resistance_levels
+
+
+def classify_support_resistance_loop(df, levels, seuil=0.03):
+    # Ancienne implémentation (boucle Python par niveau et par prix), gardée comme référence
+    close_prices = df['price'].values
+    level_classification = {}
+
+    for level in levels:
+        support_count = 0
+        resistance_count = 0
+        neutral_count = 0
+
+        for i in range(1, len(close_prices)-1):
+            if abs(close_prices[i] - level) / level <= seuil:
+                prev = close_prices[i - 1]
+                nxt = close_prices[i + 1]
+
+                if prev > level and nxt > level:
+                    support_count += 1
+                elif prev < level and nxt < level:
+                    resistance_count += 1
+                else:
+                    neutral_count += 1
+
+        if support_count > resistance_count and support_count > neutral_count:
+            level_classification[level] = 'support'
+        elif resistance_count > support_count and resistance_count > neutral_count:
+            level_classification[level] = 'resistance'
+        else:
+            level_classification[level] = 'neutral'
+
+    return level_classification
+
+
+def synthetic_prices(n, seed=0, start=3000.0):
+    """
+    Marche aléatoire de `n` prix de clôture 1m, arrondis au centime comme sur Binance.
+    """
+    rng = np.random.default_rng(seed)
+    return np.round(start * np.exp(np.cumsum(rng.normal(0, 0.0008, n))), 2)
+
+
+def best_time(func, repeat=3):
+    # Meilleur temps sur `repeat` exécutions (réduit le bruit de la machine)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'bougies':>8} {'niveaux':>8} {'boucle (ms)':>12} {'vectorisé (ms)':>15} {'gain':>7}")
+    for days in (1, 7, 28):
+        n = days * 1440
+        df = pd.DataFrame({"price": synthetic_prices(n, seed=days)})
+        levels = find_resistance_levels(df["price"].values, n=20, precision=10)
+
+        for seuil in (0.001, 0.03):
+            expected = classify_support_resistance_loop(df, levels, seuil=seuil)
+            result = classify_support_resistance(df, levels, seuil=seuil)
+            assert result == expected, f"Résultats différents pour {n} bougies (seuil={seuil})"
+
+        loop = best_time(lambda: classify_support_resistance_loop(df, levels, seuil=0.001), repeat=1)
+        vectorized = best_time(lambda: classify_support_resistance(df, levels, seuil=0.001))
+        print(f"{n:>8} {len(levels):>8} {loop * 1000:>12.1f} {vectorized * 1000:>15.2f} {loop / vectorized:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Analyse multi-actifs (cross_asset.py) sur un historique profond : 50 symboles × 1 an de bougies 1m.
+
+Un stockage colonnaire synthétique est écrit (modèle à un facteur : chaque symbole suit le
+« marché » avec son propre bêta, plus un bruit propre et quelques minutes manquantes), puis :
+    - iter_rolling_stats le parcourt jour par jour : débit et pic de mémoire (tracemalloc),
+      comparé à la taille du seul tableau des clôtures de toute la plage ;
+    - coût d'une bougie avec CrossAssetMonitor.update (incrémental) et par bloc ;
+    - écart maximal entre les deux chemins de calcul.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_cross_asset --symbols 50 --days 365
+    python -m benchmarks.bench_cross_asset --root /tmp/store_50x365   # stockage conservé entre deux runs
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import kline_store
+from candles import Candles
+from cross_asset import CrossAssetMonitor, align_closes, iter_rolling_stats
+
+INTERVAL_MS = 60_000
+DAY_ROWS = 1440
+
+
+def symbols_for(n):
+    return ["BTCUSDC"] + [f"ALT{i:02d}USDC" for i in range(1, n)]
+
+
+def write_synthetic_store(root, symbols, days, end_ms, seed=0):
+    """
+    Écrit `days` partitions journalières par symbole (modèle à un facteur, 0,1 % de minutes manquantes).
+    """
+    rng = np.random.default_rng(seed)
+    n = len(symbols)
+    betas = np.concatenate(([1.0], rng.uniform(0.3, 1.8, n - 1)))
+    noise = np.concatenate(([2e-4], rng.uniform(3e-4, 1.5e-3, n - 1)))
+    levels = np.log(rng.uniform(0.1, 60_000, n))
+    first_day = end_ms - days * kline_store.DAY_MS
+    for day_start in range(first_day, end_ms, kline_store.DAY_MS):
+        open_time = day_start + np.arange(DAY_ROWS, dtype=np.int64) * INTERVAL_MS
+        market = rng.normal(0, 8e-4, DAY_ROWS)
+        log_prices = levels + np.cumsum(market[:, None] * betas + rng.normal(0, 1, (DAY_ROWS, n)) * noise, axis=0)
+        levels = log_prices[-1]
+        present = rng.random((DAY_ROWS, n)) > 0.001
+        day = kline_store.day_of(day_start)
+        for column, symbol in enumerate(symbols):
+            keep = present[:, column]
+            kline_store.write_partition(symbol, "1m", day, Candles(
+                open_time=open_time[keep], close=np.exp(log_prices[keep, column]),
+                close_time=open_time[keep] + INTERVAL_MS - 1,
+            ), root)
+
+
+def full_pass(root, symbols, start_ms, end_ms, window, chunk):
+    """
+    Parcourt toute la plage ; ne garde que la dernière bougie (comme un tableau de bord ou une alerte).
+
+    Returns:
+        tuple: (bougies traitées, secondes, pic de mémoire en octets, dernières statistiques)
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = 0
+    last = None
+    for block in iter_rolling_stats(symbols, symbols[0], start_ms, end_ms, window=window, chunk=chunk, root=root):
+        rows += len(block["open_time"])
+        last = {name: value[-1] for name, value in block.items()}
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, seconds, peak, last
+
+
+def incremental_cost(root, symbols, end_ms, window, n_updates=2000):
+    """
+    Coût moyen d'une bougie (µs) en incrémental et par bloc, et écart maximal entre les deux chemins.
+    """
+    start_ms = end_ms - (window + n_updates) * INTERVAL_MS
+    open_time, closes = align_closes(symbols, start_ms, end_ms, "1m", root)
+    head, tail = slice(0, window), slice(window, None)
+
+    block = CrossAssetMonitor(symbols, symbols[0], window)
+    block.update_block(open_time[head], closes[head])
+    started = time.perf_counter()
+    expected = block.update_block(open_time[tail], closes[tail])
+    block_us = (time.perf_counter() - started) / n_updates * 1e6
+
+    incremental = CrossAssetMonitor(symbols, symbols[0], window)
+    incremental.update_block(open_time[head], closes[head])
+    started = time.perf_counter()
+    results = [incremental.update(t, row) for t, row in zip(open_time[tail], closes[tail])]
+    update_us = (time.perf_counter() - started) / n_updates * 1e6
+
+    error = max(np.nanmax(np.abs(np.array([result[name] for result in results]) - expected[name]))
+                for name in ("corr", "beta", "zscore"))
+    return update_us, block_us, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--window", type=int, default=1440, help="fenêtre glissante (bougies)")
+    parser.add_argument("--chunk", type=int, default=1440, help="bougies par bloc")
+    parser.add_argument("--root", help="stockage à réutiliser (créé s'il n'existe pas)")
+    args = parser.parse_args()
+
+    symbols = symbols_for(args.symbols)
+    end_ms = int(time.time() * 1000)
+    end_ms -= end_ms % kline_store.DAY_MS
+    start_ms = end_ms - args.days * kline_store.DAY_MS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.root or tmp
+        if not kline_store.list_partitions(symbols[-1], "1m", root):
+            print(f"Écriture du stockage synthétique ({args.symbols} symboles × {args.days} jours)...")
+            started = time.perf_counter()
+            # Une fenêtre de plus avant la plage : elle est lue pour les premières bougies
+            write_synthetic_store(root, symbols, args.days + -(-args.window // DAY_ROWS), end_ms)
+            print(f"  {time.perf_counter() - started:.1f} s")
+        else:
+            end_ms = kline_store.last_open_time(symbols[0], "1m", root) + INTERVAL_MS
+            start_ms = end_ms - args.days * kline_store.DAY_MS
+
+        rows, seconds, peak, last = full_pass(root, symbols, start_ms, end_ms, args.window, args.chunk)
+        full_matrix = rows * len(symbols) * 8
+        print(f"Parcours complet : {rows} bougies × {len(symbols)} symboles en {seconds:.1f} s "
+              f"({rows / seconds:,.0f} bougies/s)")
+        print(f"  pic de mémoire {peak / 1e6:.1f} Mo (clôtures de toute la plage : {full_matrix / 1e6:.0f} Mo)")
+        print(f"  dernière bougie : corrélation médiane {np.nanmedian(last['corr'][1:]):.2f}, "
+              f"bêta médian {np.nanmedian(last['beta'][1:]):.2f}")
+
+        update_us, block_us, error = incremental_cost(root, symbols, end_ms, args.window)
+        print(f"Une bougie : {update_us:.0f} µs en incrémental, {block_us:.0f} µs par bloc ; "
+              f"écart maximal {error:.1e}")
+        if not args.root:
+            print(f"Stockage : {sum(len(files) for _, _, files in os.walk(root))} fichiers (supprimés)")
+
+
+if __name__ == "__main__":
+    main()
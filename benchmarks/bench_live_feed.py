@@ -0,0 +1,60 @@
+"""
+Test de charge du flux temps réel : serveur de rejeu local + plusieurs ingesteurs.
+
+Rejoue des bougies synthétiques à 100x (ou plus) la vitesse réelle vers `clients` ingesteurs
+et mesure le débit de messages, la latence d'émission -> tampon et la cohérence du tampon final.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_live_feed --speed 100 --clients 4 --candles 50
+"""
+import argparse
+import time
+
+from candles import Candles
+from live_feed import KlineStreamIngestor
+from mock_binance import synthetic_klines
+from replay_server import KlineReplayServer
+from ring_buffer import CandleRingBuffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--speed", type=float, default=100.0)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--candles", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=5, help="messages par bougie")
+    args = parser.parse_args()
+
+    candles = Candles.from_binance(synthetic_klines("ETHUSDC", "1m", limit=args.candles, now_ms=1_700_000_000_000))
+    with KlineReplayServer(speed=args.speed, ticks=args.ticks, candles=candles) as server:
+        ingestors = [
+            KlineStreamIngestor("ETHUSDC", "1m", CandleRingBuffer(args.candles), ws_url=server.url,
+                                rest_url=None, persist=False).start_in_thread()
+            for _ in range(args.clients)
+        ]
+        expected = args.candles * args.ticks
+        start = time.perf_counter()
+        latencies = []
+        while any(i.messages < expected for i in ingestors):
+            time.sleep(0.05)
+            latencies += [i.last_latency_ms for i in ingestors if i.last_latency_ms is not None]
+            if time.perf_counter() - start > 60 * args.candles / args.speed * 2 + 10:
+                break
+        elapsed = time.perf_counter() - start
+        for ingestor in ingestors:
+            ingestor.stop()
+
+    received = sum(i.messages for i in ingestors)
+    consistent = all((i.buffer.snapshot().close == candles.close).all() for i in ingestors)
+    print(f"vitesse x{args.speed:g}, {args.clients} clients, {args.candles} bougies x {args.ticks} messages")
+    print(f"messages reçus : {received}/{expected * args.clients} en {elapsed:.2f} s "
+          f"({received / elapsed:.0f} msg/s)")
+    if latencies:
+        latencies.sort()
+        print(f"latence émission -> tampon : médiane {latencies[len(latencies) // 2]:.2f} ms, "
+              f"max {latencies[-1]:.2f} ms")
+    print(f"tampons identiques à la source : {consistent}")
+
+
+if __name__ == "__main__":
+    main()
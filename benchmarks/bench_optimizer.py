@@ -0,0 +1,48 @@
+"""
+Passage à l'échelle de l'optimiseur : même balayage avec 1, 2, 4... processus.
+
+Les prix (marche aléatoire synthétique) sont partagés par fichier mappé en mémoire ; le tableau
+de résultats doit être identique quel que soit le nombre de processus.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_optimizer --days 90 --samples 200 --workers 1 2 4
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from benchmarks.bench_backtest import random_walk
+from optimizer import DEFAULT_SPACE, optimize, random_space
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    close = random_walk(args.days * 1440).close
+    combos = random_space(DEFAULT_SPACE, args.samples)
+    print(f"{len(combos)} combinaisons, {len(close)} bougies, {os.cpu_count()} cœur(s) disponibles")
+
+    reference = None
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        table = optimize(close, combos, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        same = reference is None or table.equals(reference)
+        reference = table if reference is None else reference
+        print(f"  {workers:>2} processus : {elapsed:6.2f} s  ({len(combos) / elapsed:6.1f} combinaisons/s, "
+              f"x{baseline / elapsed:.2f})  résultats identiques : {same}")
+
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(reference.head(5))
+
+
+if __name__ == "__main__":
+    main()
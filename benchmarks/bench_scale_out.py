@@ -0,0 +1,196 @@
+"""
+Test de charge du déploiement multi-processus : débit du tableau de bord selon le nombre de processus Dash.
+
+Un processus ingestor.py (interrogation REST du serveur local mock_binance.py) publie les bougies
+en mémoire partagée ; N processus Dash (SHARED_FEED=1, un serveur WSGI mono-thread chacun, comme
+des workers gunicorn synchrones) les lisent. Des processus clients enchaînent des chargements de
+page (callbacks refresh_snapshot, update_price_figure et update_macd), répartis à tour de rôle sur
+les processus Dash, pendant `--duration` secondes ; le débit est mesuré pour chaque valeur de `--workers`.
+
+Le gain attendu est proportionnel au nombre de cœurs disponibles (affiché au début).
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_scale_out --workers 1 2 4 --clients 8 --duration 10
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+import requests
+
+from benchmarks.bench_batch_fetch import MockServerProcess
+from shared_buffer import SharedCandleRingBuffer, shared_buffer_name
+
+SYMBOL = "ETHUSDC"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run_ingestor(store, rest_url):
+    import ingestor
+
+    os.chdir(store)
+    ingestor.run_ingestor(SYMBOL, "1m", mode="rest", poll=1.0, rest_url=rest_url, unlink=True)
+
+
+def _serve_dash(store, port):
+    # Processus Dash sans état : bougies lues dans la mémoire partagée de l'ingesteur
+    os.chdir(store)
+    os.environ["SHARED_FEED"] = "1"
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # Pas de log par requête
+    from werkzeug.serving import make_server
+
+    import app
+
+    make_server("127.0.0.1", port, app.server, threaded=False).serve_forever()
+
+
+def callback_request(output, outputs, inputs, state=(), changed=()):
+    """
+    Corps d'une requête POST /_dash-update-component, telle qu'envoyée par le navigateur.
+
+    Args:
+        output (str): identifiant du callback (clé de app.callback_map).
+        outputs (list of tuple): (id, propriété) des sorties.
+        inputs (list of tuple): (id, propriété, valeur) des entrées.
+        state (list of tuple): (id, propriété, valeur) des états.
+        changed (list of str): propriétés à l'origine de l'appel ("id.propriété").
+    """
+    def props(items):
+        return [{"id": id_, "property": prop, "value": value} for id_, prop, value in items]
+
+    outputs = [{"id": id_, "property": prop} for id_, prop in outputs]
+    return {"output": output, "outputs": outputs if len(outputs) > 1 else outputs[0],
+            "inputs": props(inputs), "state": props(state), "changedPropIds": list(changed)}
+
+
+def refresh_request():
+    """
+    Requête du callback refresh_snapshot d'une nouvelle page (premier tick de l'intervalle).
+    """
+    return callback_request(
+        "..snapshot-version.data...historical-graph.relayoutData...macd-graph.relayoutData..",
+        [("snapshot-version", "data"), ("historical-graph", "relayoutData"), ("macd-graph", "relayoutData")],
+        [("reload-button", "n_clicks", 0), ("interval-component", "n_intervals", 0),
+         ("history-range", "start_date", None), ("history-range", "end_date", None), ("timeframe", "value", "1m")],
+        [("snapshot-version", "data", None)],
+        ["interval-component.n_intervals"],
+    )
+
+
+def page_load(session, url):
+    """
+    Chargement d'une page : instantané courant puis figures de prix et MACD.
+    """
+    response = session.post(f"{url}/_dash-update-component", json=refresh_request(), timeout=60)
+    response.raise_for_status()
+    key = response.json()["response"]["snapshot-version"]["data"]
+
+    price = callback_request(
+        "historical-graph.figure", [("historical-graph", "figure")],
+        [("snapshot-version", "data", key), ("chart-type", "value", "line")],
+        [("num-resistances-slider", "value", 5), ("precision-slider", "value", 10),
+         ("level-method", "value", "frequency"), ("resistance-sliders-container", "style", {"display": "none"}),
+         ("historical-graph", "relayoutData", None), ("graph-width", "data", 1200)],
+        ["snapshot-version.data"],
+    )
+    macd = callback_request(
+        "..macd-graph.figure...macd-status.children...macd-status.style...macd-trend-text.children..",
+        [("macd-graph", "figure"), ("macd-status", "children"), ("macd-status", "style"),
+         ("macd-trend-text", "children")],
+        [("snapshot-version", "data", key)],
+        [("macd-graph", "relayoutData", None), ("graph-width", "data", 1200)],
+        ["snapshot-version.data"],
+    )
+    for body in (price, macd):
+        session.post(f"{url}/_dash-update-component", json=body, timeout=60).raise_for_status()
+
+
+def _client(urls, offset, duration, start, counts, index):
+    session = requests.Session()
+    done = 0
+    while time.time() < start:
+        time.sleep(0.01)
+    deadline = start + duration
+    while time.time() < deadline:
+        page_load(session, urls[(offset + done) % len(urls)])
+        done += 1
+    counts[index] = done
+
+
+def _wait_ready(url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{url}/metrics", timeout=5).raise_for_status()
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise TimeoutError(f"{url} ne répond pas")
+
+
+def run_load(store, n_workers, n_clients, duration):
+    """
+    Débit (chargements de page par seconde) de `n_workers` processus Dash sous `n_clients` clients.
+    """
+    ports = [_free_port() for _ in range(n_workers)]
+    workers = [multiprocessing.Process(target=_serve_dash, args=(store, port), daemon=True) for port in ports]
+    for worker in workers:
+        worker.start()
+    urls = [f"http://127.0.0.1:{port}" for port in ports]
+    try:
+        for url in urls:
+            _wait_ready(url)
+            page_load(requests.Session(), url)  # Premier calcul de l'instantané, hors mesure
+        counts = multiprocessing.Array("q", n_clients)
+        start = time.time() + 0.5
+        clients = [multiprocessing.Process(target=_client, args=(urls, i, duration, start, counts, i))
+                   for i in range(n_clients)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        return sum(counts) / duration
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="durée de chaque mesure (secondes)")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cœur(s) disponible(s)")
+    with tempfile.TemporaryDirectory() as store, MockServerProcess() as server:
+        ingestor = multiprocessing.Process(target=_run_ingestor, args=(store, server.url), daemon=True)
+        ingestor.start()
+        buffer = SharedCandleRingBuffer.attach(shared_buffer_name(SYMBOL, "1m"), timeout=30)
+        while len(buffer) == 0:
+            time.sleep(0.1)
+        try:
+            baseline = None
+            print(f"{'processus':>10}{'pages/s':>10}{'accélération':>14}")
+            for n_workers in args.workers:
+                rate = run_load(store, n_workers, args.clients, args.duration)
+                baseline = baseline or rate
+                print(f"{n_workers:>10}{rate:>10.1f}{rate / baseline:>13.2f}x")
+        finally:
+            buffer.close()
+            ingestor.terminate()
+            ingestor.join()
+
+
+if __name__ == "__main__":
+    main()
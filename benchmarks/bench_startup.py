@@ -0,0 +1,133 @@
+"""
+Benchmark du démarrage du serveur : temps d'import et délai avant le premier affichage.
+
+Mesure, dans des processus neufs (meilleur de `--repeat`) :
+    - le temps d'import de dash seul (plancher incompressible) et de app.py, et si pandas est
+      chargé à l'import (il ne doit l'être qu'au premier calcul) ;
+    - le démarrage d'un processus serveur (import de app.py puis serveur WSGI) jusqu'à la première
+      réponse de la page, puis le premier affichage (callbacks refresh_snapshot, figure de prix et MACD) :
+        * stockage local rempli, Binance lent (mock_binance.py avec `--latency`) : l'affichage
+          vient du stockage, la récupération tourne en tâche de fond ;
+        * stockage vide, Binance lent : l'affichage attend la récupération ;
+        * stockage local rempli, Binance injoignable : l'affichage ne doit pas échouer.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_startup --repeat 5 --latency 2
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+import kline_store
+from benchmarks.bench_batch_fetch import MockServerProcess
+from benchmarks.bench_scale_out import _free_port, page_load
+from benchmarks.bench_suite import synthetic_raw_klines
+from candles import Candles
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start, "pandas" in sys.modules)
+"""
+
+SERVER_SNIPPET = """
+import logging
+from werkzeug.serving import make_server
+import app
+logging.getLogger("werkzeug").setLevel(logging.ERROR)
+make_server("127.0.0.1", {port}, app.server, threaded=True).serve_forever()
+"""
+
+
+def _env(**extra):
+    return dict(os.environ, PYTHONPATH=REPO, **extra)
+
+
+def import_time(module, repeat):
+    """
+    Meilleur temps d'import de `module` dans un processus neuf, et présence de pandas ensuite.
+    """
+    best, pandas_loaded = float("inf"), None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET.format(module=module)], cwd=REPO,
+                             env=_env(), capture_output=True, text=True, check=True).stdout.split()
+        best = min(best, float(out[0]))
+        pandas_loaded = out[1] == "True"
+    return best, pandas_loaded
+
+
+def server_startup(store, binance_url, settle=0.0):
+    """
+    Lance un processus serveur dans `store` et mesure (secondes depuis le lancement) la première
+    réponse de la page puis la fin du premier affichage.
+    """
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", SERVER_SNIPPET.format(port=port)], cwd=store,
+                               env=_env(BINANCE_API_URL=binance_url),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        session = requests.Session()
+        while True:
+            try:
+                session.get(url, timeout=30).raise_for_status()
+                break
+            except requests.ConnectionError:
+                time.sleep(0.005)
+        layout = time.perf_counter() - start
+        try:
+            page_load(session, url)
+            first_paint = time.perf_counter() - start
+        except requests.RequestException:
+            first_paint = None
+        time.sleep(settle)  # Laisse finir la récupération de fond avant l'arrêt
+        return layout, first_paint
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def seed_store(store, n=1440):
+    # Une journée de bougies déjà stockées, se terminant maintenant
+    candles = Candles.from_binance(synthetic_raw_klines(n, end_ms=int(time.time() * 1000)))
+    kline_store.append_klines("ETHUSDC", "1m", candles, os.path.join(store, kline_store.STORE_ROOT))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=2.0, help="latence simulée de Binance (secondes)")
+    args = parser.parse_args()
+
+    print(f"{'import':<44}{'temps s':>10}   pandas chargé")
+    for module in ("dash", "app"):
+        seconds, pandas_loaded = import_time(module, args.repeat)
+        print(f"{module:<44}{seconds:>10.3f}   {'oui' if pandas_loaded else 'non'}")
+
+    print(f"\n{'démarrage du serveur':<44}{'page s':>10}{'affichage s':>14}")
+    with MockServerProcess(latency=args.latency) as server:
+        scenarios = [
+            (f"stockage rempli, Binance lent ({args.latency:g} s)", True, server.url),
+            (f"stockage vide, Binance lent ({args.latency:g} s)", False, server.url),
+            ("stockage rempli, Binance injoignable", True, f"http://127.0.0.1:{_free_port()}"),
+        ]
+        for name, seeded, binance_url in scenarios:
+            with tempfile.TemporaryDirectory() as store:
+                if seeded:
+                    seed_store(store)
+                layout, first_paint = server_startup(store, binance_url, args.latency)
+            paint = "échec" if first_paint is None else f"{first_paint:.3f}"
+            print(f"{name:<44}{layout:>10.3f}{paint:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Suite de benchmarks des chemins critiques (analyse et chargement des données), avec référence JSON.
+
+Pour chaque taille de données synthétiques (1 jour, 1 mois, 1 an de bougies 1m), mesure le temps
+(meilleur de `--repeat` exécutions) et le pic de mémoire (tracemalloc, exécution séparée) de :
+    - Candles.from_binance et process_klines_data (décodage des bougies Binance)
+    - calculate_macd, find_resistance_levels, classify_support_resistance
+    - le parcours complet du tableau de bord, appel Binance simulé : récupération + stockage
+      (update_daily_prices), instantané du calcul de fond, puis les callbacks de figures
+      (premier appel "_cold", qui construit la figure, et appels suivants servis par l'instantané)
+
+Les résultats sont écrits en JSON (`--save`) ; avec `--baseline`, chaque mesure est comparée à la
+référence stockée et les régressions au-delà de `--tolerance` font échouer la commande.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_suite --sizes 1d 1mo --save benchmarks/baseline.json
+    python -m benchmarks.bench_suite --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import get_daily_prices
+from analysis_tools import calculate_macd, classify_support_resistance, find_resistance_levels
+from candles import Candles
+from data_utils import process_klines_data
+from mock_binance import synthetic_candles, synthetic_klines
+
+# Tailles des jeux de données synthétiques, en bougies 1m
+SIZES = {"1d": 1440, "1mo": 30 * 1440, "1y": 365 * 1440}
+
+# Début des données synthétiques (2025-01-01 UTC)
+START_MS = 1_735_689_600_000
+
+
+def synthetic_raw_klines(n, symbol="ETHUSDC", end_ms=None):
+    """
+    `n` bougies 1m au format brut de l'API Binance (prix en chaînes), se terminant à `end_ms`.
+    """
+    end_ms = START_MS + n * 60_000 if end_ms is None else end_ms - end_ms % 60_000
+    return synthetic_candles(symbol, end_ms - np.arange(n, 0, -1, dtype=np.int64) * 60_000, 60_000)
+
+
+def measure(func, repeat=3, memory=True):
+    """
+    Temps (meilleur de `repeat` exécutions) et pic de mémoire allouée pendant un appel.
+
+    Args:
+        func (callable): fonction mesurée, sans argument.
+        repeat (int): nombre d'exécutions chronométrées.
+        memory (bool): mesure aussi le pic de mémoire (exécution supplémentaire).
+
+    Returns:
+        dict: {"seconds": float, "peak_mb": float or None}
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    if not memory:
+        return {"seconds": min(timings), "peak_mb": None}
+    # Mesure mémoire à part : tracemalloc ralentit les allocations
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "peak_mb": peak / 1e6}
+
+
+def bench_functions(size, raw, repeat):
+    candles = Candles.from_binance(raw)
+    df = candles.to_frame()
+    levels = find_resistance_levels(candles.close, n=20, precision=10)
+    return {
+        f"from_binance[{size}]": measure(lambda: Candles.from_binance(raw), repeat),
+        f"process_klines_data[{size}]": measure(lambda: process_klines_data(candles), repeat),
+        f"calculate_macd[{size}]": measure(lambda: calculate_macd(df), repeat),
+        f"find_resistance_levels[{size}]": measure(lambda: find_resistance_levels(candles.close, n=20,
+                                                                                  precision=10), repeat),
+        f"classify_support_resistance[{size}]": measure(lambda: classify_support_resistance(df, levels,
+                                                                                            seuil=0.001), repeat),
+    }
+
+
+def dashboard_callbacks():
+    # Fonctions des callbacks du tableau de bord, par nom (sans passer par le serveur Dash)
+    import dash
+
+    from callbacks import register_callbacks
+
+    app = dash.Dash(__name__)
+    register_callbacks(app)
+    return {entry["callback"].__wrapped__.__name__: entry["callback"].__wrapped__
+            for entry in app.callback_map.values() if "callback" in entry}  # Sans les callbacks clientside
+
+
+def bench_end_to_end(size, n, repeat):
+    """
+    Parcours complet d'une mise à jour du tableau de bord sur `n` bougies, sans réseau.
+    """
+    import callbacks
+    import compute_worker
+    import data_utils
+    from compute_worker import IndicatorWorker
+
+    def fake_fetch(symbol="ETHUSDC", interval="1m", limit=1000, start_time=None, end_time=None, **kwargs):
+        # Appel Binance simulé, avec la même limite de MAX_LIMIT bougies par requête que l'API
+        return synthetic_klines(symbol, interval, limit=limit, start_time=start_time, end_time=end_time)
+
+    results = {}
+    cwd = os.getcwd()
+    real_fetch = get_daily_prices.fetch_klines
+    real_worker = compute_worker.indicator_worker
+    with tempfile.TemporaryDirectory() as tmp:
+        # Stockage dans un répertoire temporaire (chemin relatif prices_history/ par défaut)
+        os.chdir(tmp)
+        get_daily_prices.fetch_klines = fake_fetch
+        try:
+            results[f"fetch_and_store[{size}]"] = measure(
+                lambda: get_daily_prices.update_daily_prices(lookback=n), 1)
+            results[f"incremental_update[{size}]"] = measure(
+                lambda: get_daily_prices.update_daily_prices(lookback=n), repeat)
+
+            def snapshot():
+                worker = IndicatorWorker(lookback=n)
+                data_utils.kline_cache.invalidate()
+                return worker.refresh()
+
+            results[f"worker_snapshot[{size}]"] = measure(snapshot, repeat)
+
+            worker = IndicatorWorker(lookback=n)
+            compute_worker.indicator_worker = worker
+            callbacks.indicator_worker = worker
+            derived = worker.refresh()
+            key = {"range": None, "timeframe": None, "version": list(derived.version)}
+            funcs = dashboard_callbacks()
+            slider_style = {"display": "block"}
+            calls = {
+                "update_price_figure": lambda: funcs["update_price_figure"](
+                    key, "candles", 10, 10, "frequency", slider_style, None, 1200),
+                "update_level_overlays": lambda: funcs["update_level_overlays"](
+                    20, 5, "kde", slider_style, key),
+                "update_macd": lambda: funcs["update_macd"](key, None, 1200),
+                "update_indicator_panels": lambda: funcs["update_indicator_panels"](key, ["rsi", "bollinger"]),
+            }
+            for name, call in calls.items():
+                # Premier appel (figure et niveaux construits puis mémorisés par l'instantané) puis régime établi
+                results[f"{name}_cold[{size}]"] = measure(call, 1, memory=False)
+                results[f"{name}[{size}]"] = measure(call, repeat)
+        finally:
+            get_daily_prices.fetch_klines = real_fetch
+            compute_worker.indicator_worker = real_worker
+            callbacks.indicator_worker = real_worker
+            os.chdir(cwd)
+    return results
+
+
+def _mb(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def compare(results, baseline, tolerance, min_delta_ms=1.0):
+    """
+    Compare les mesures à une référence et affiche les écarts.
+
+    Les écarts de temps inférieurs à `min_delta_ms` (bruit de mesure des fonctions très rapides)
+    et de mémoire inférieurs à 1 Mo ne comptent pas comme des régressions.
+
+    Returns:
+        list of str: mesures en régression (temps ou mémoire au-delà de 1 + tolerance fois la référence).
+    """
+    regressions = []
+    print(f"\n{'mesure':<42}{'temps ms':>10}{'réf.':>10}{'ratio':>8}{'pic Mo':>10}{'réf.':>10}")
+    for name, value in results.items():
+        ref = baseline.get(name)
+        if ref is None:
+            print(f"{name:<42}{value['seconds'] * 1000:>10.1f}{'-':>10}{'':>8}{_mb(value['peak_mb']):>10}{'-':>10}")
+            continue
+        ratio = value["seconds"] / ref["seconds"] if ref["seconds"] else 1.0
+        mem_ratio = value["peak_mb"] / ref["peak_mb"] if value["peak_mb"] and ref["peak_mb"] else 1.0
+        flag = ""
+        slower = ratio > 1 + tolerance and (value["seconds"] - ref["seconds"]) * 1000 > min_delta_ms
+        bigger = mem_ratio > 1 + tolerance and value["peak_mb"] - ref["peak_mb"] > 1.0
+        if slower or bigger:
+            regressions.append(name)
+            flag = "  <- régression"
+        print(f"{name:<42}{value['seconds'] * 1000:>10.1f}{ref['seconds'] * 1000:>10.1f}{ratio:>8.2f}"
+              f"{_mb(value['peak_mb']):>10}{_mb(ref['peak_mb']):>10}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-e2e", action="store_true", help="sans le parcours complet du tableau de bord")
+    parser.add_argument("--save", help="fichier JSON où écrire les résultats")
+    parser.add_argument("--baseline", help="fichier JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="écart relatif toléré (0.25 = +25 %%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="écart de temps absolu ignoré")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        n = SIZES[size]
+        print(f"{size} : {n} bougies 1m")
+        results.update(bench_functions(size, synthetic_raw_klines(n), args.repeat))
+        if not args.skip_e2e:
+            results.update(bench_end_to_end(size, n, args.repeat))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    else:
+        baseline = {}
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+
+    if args.save:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nrésultats écrits dans {args.save}")
+
+    if regressions:
+        print(f"\n{len(regressions)} régression(s) : {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
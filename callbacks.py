@@ -1,252 +1,461 @@
 import dash
-from dash import Output, Input, State, callback_context
-import plotly.graph_objs as go
-from data_utils import load_data_from_json, process_klines_data
-from analysis_tools import find_resistance_levels, calculate_macd, create_macd_figure, classify_support_resistance
-import pandas as pd
-import json
-from dash.dependencies import Input, Output, State
+from dash import Output, Input, State, Patch, callback_context
 from dash import html
+import re
+import time
+import numpy as np
+import requests
+import data_quality
+import kline_store
+from analysis_tools import create_correlation_heatmap
+from cross_asset import cross_asset_view
+from compute_worker import indicator_worker
+from metrics import timed
+from resample import interval_ms
+
+LEVEL_COLORS = {
+    "support": "green",
+    "resistance": "red",
+    "neutral": "yellow"
+}
+
+DATA_QUALITY_STYLE = {"textAlign": "center", "fontSize": "14px", "marginTop": "5px"}
+
+POPUP_STYLE = {
+    "display": "block",
+    "position": "fixed",
+    "top": "20px",
+    "right": "20px",
+    "background-color": "lightgreen",
+    "padding": "10px",
+    "border-radius": "5px",
+    "box-shadow": "0 0 5px #333",
+    "zIndex": 1000,
+}
+
+def level_overlays(derived, n, precision, method, visible):
+    """
+    Droites de niveaux et trace de survol correspondante pour un instantané.
+
+    Les droites sont des formes (layout.shapes) ; les valeurs au survol sont regroupées dans
+    une seule trace de marqueurs invisibles, toujours en première position de la figure de prix
+    (LEVEL_TRACE, quel que soit le nombre de traces du type de graphe) : un changement de slider
+    ne remplace que ces deux éléments (voir update_level_overlays).
+
+    Args:
+        derived (DerivedSnapshot): instantané courant (voir compute_worker.py).
+        n (int): nombre de niveaux.
+        precision (int or float): largeur de regroupement des prix.
+        method (str): méthode de détection des niveaux.
+        visible (bool): droites affichées (sinon formes et trace vides).
+
+    Returns:
+        tuple: (shapes, trace)
+            shapes (list of dict): une ligne horizontale par niveau.
+            trace (dict): trace Plotly des valeurs au survol.
+    """
+    levels = derived.levels(n=n, precision=precision, strategy=method) if visible else []
+    times = derived.candles.times
+    x0, x1 = np.datetime_as_string(times[[0, -1]]).tolist() if len(times) else (None, None)
+
+    shapes = [dict(
+        type="line", x0=x0, x1=x1, y0=r, y1=r,
+        line=dict(color=LEVEL_COLORS[classification], width=2, dash="dot"),
+        layer="below",
+    ) for r, classification in levels]
+
+    trace = dict(
+        type="scatter", name="Niveaux", uid="niveaux", mode="markers",
+        x=[x1] * len(levels),
+        y=[r for r, _ in levels],
+        marker=dict(color=[LEVEL_COLORS[c] for _, c in levels], size=8, opacity=0),
+        showlegend=False, hoverinfo="text",
+        hovertext=[f"{c.capitalize()} : {r:.2f} USDT" for r, c in levels],
+    )
+    return shapes, trace
+
+# Indice de la trace des niveaux dans la figure de prix : elle précède les traces du type de graphe
+LEVEL_TRACE = 0
+
+def sliders_visible(slider_style):
+    return (slider_style or {}).get("display") == "block"
+
+# Largeur supposée des graphiques tant que le navigateur ne l'a pas transmise (pixels)
+DEFAULT_GRAPH_WIDTH = 1200
+
+_X_RANGE_KEY = re.compile(r"^xaxis\d*\.(range|autorange)")
+
+def relayout_range(relayout_data):
+    """
+    Plage de temps visible décrite par un événement relayoutData de Plotly (zoom, déplacement).
+
+    Args:
+        relayout_data (dict or None): ex: {"xaxis.range[0]": "...", "xaxis.range[1]": "..."},
+            {"xaxis2.range": [...]} (sous-graphes partagés) ou {"xaxis.autorange": True}.
+
+    Returns:
+        tuple or None or bool: (début, fin) visibles ; None si tout l'axe est affiché ;
+        False si l'événement ne touche pas l'axe des temps (autosize, zoom vertical...).
+    """
+    keys = [key for key in (relayout_data or {}) if _X_RANGE_KEY.match(key)]
+    if not keys:
+        return False
+    axis = keys[0].split(".")[0]
+    if relayout_data.get(f"{axis}.autorange"):
+        return None
+    if f"{axis}.range" in relayout_data:
+        return tuple(relayout_data[f"{axis}.range"][:2])
+    if f"{axis}.range[0]" in relayout_data and f"{axis}.range[1]" in relayout_data:
+        return relayout_data[f"{axis}.range[0]"], relayout_data[f"{axis}.range[1]"]
+    return False
+
+def lod_points(kind, width):
+    """
+    Budget de points pour la largeur affichée : environ un point par pixel pour les courbes,
+    une bougie pour trois pixels pour les chandeliers.
+    """
+    width = width or DEFAULT_GRAPH_WIDTH
+    return max(width // 3, 50) if kind == "candles" else max(width, 100)
+
+def lod_for(derived, kind, relayout_data, width):
+    """
+    Traces ré-échantillonnées pour le zoom courant, ou None si la figure est vue en entier.
+    """
+    x_range = relayout_range(relayout_data)
+    if not x_range:
+        return None
+    return derived.lod_traces(kind, x_range, lod_points(kind, width))
+
+def with_traces(fig, traces):
+    """
+    Copie de `fig` dont les premières traces reçoivent les tableaux de `traces`
+    (propriétés pointées comme "marker.color" comprises), sans modifier la figure partagée.
+    """
+    data = list(fig["data"])
+    for i, arrays in enumerate(traces):
+        trace = dict(data[i])
+        for prop, values in arrays.items():
+            if "." in prop:
+                parent, child = prop.split(".")
+                trace[parent] = dict(trace.get(parent, {}), **{child: values})
+            else:
+                trace[prop] = values
+        data[i] = trace
+    return dict(fig, data=data)
+
+def traces_patch(traces, first=0):
+    """
+    Mise à jour partielle remplaçant uniquement les tableaux de données des traces,
+    la première étant à l'indice `first` de la figure.
+    """
+    patch = Patch()
+    for i, arrays in enumerate(traces, start=first):
+        for prop, values in arrays.items():
+            target = patch["data"][i]
+            *parents, child = prop.split(".")
+            for parent in parents:
+                target = target[parent]
+            target[child] = values
+    return patch
+
+def history_range(start_date, end_date):
+    """
+    Plage [début, fin[ correspondant aux jours choisis dans le sélecteur (fin incluse), ou None.
+    """
+    if not start_date or not end_date:
+        return None
+    return [start_date[:10], str(np.datetime64(end_date[:10]) + 1)]
+
+def snapshot_for(snapshot_key):
+    """
+    Instantané désigné par le contenu du Store "snapshot-version" : plage de l'historique
+    choisie dans le sélecteur de dates, sinon la fenêtre temps réel, dans l'unité de temps choisie.
+    """
+    snapshot_key = snapshot_key or {}
+    selected = snapshot_key.get("range")
+    timeframe = snapshot_key.get("timeframe")
+    if selected:
+        return indicator_worker.range_snapshot(*selected, timeframe=timeframe)
+    return indicator_worker.timeframe_snapshot(timeframe)
+
+def view_revision(prefix, snapshot_key):
+    """
+    uirevision d'une figure : le zoom est conservé tant que la plage et l'unité de temps sont les mêmes.
+    """
+    snapshot_key = snapshot_key or {}
+    return f"{prefix}-{snapshot_key.get('range')}-{snapshot_key.get('timeframe')}"
+
+def quality_status(derived, snapshot_key):
+    """
+    Texte et couleur du bandeau de qualité des données affichées (voir data_quality.py) :
+    minutes manquantes de la fenêtre, anomalies corrigées à l'écriture (index des partitions),
+    et ancienneté de la dernière bougie pour la vue temps réel.
+    """
+    snapshot_key = snapshot_key or {}
+    step = interval_ms(snapshot_key.get("timeframe") or indicator_worker.interval)
+    open_time = derived.candles.open_time
+    window = data_quality.validate(open_time, step)
+    parts = [f"{window['rows']} bougies"]
+    parts.append(f"{window['missing']} manquante(s) ({len(window['gaps'])} trou(s))" if window["missing"]
+                 else "aucune manquante")
+    issues = bool(window["missing"])
+
+    if len(open_time):
+        index = kline_store.quality_index(indicator_worker.symbol, indicator_worker.interval,
+                                          start_ms=int(open_time[0]), end_ms=int(open_time[-1]) + step)
+        stored = data_quality.summarize(index.values())
+        if stored["unfillable"]:
+            parts.append(f"{stored['unfillable']} trou(s) absent(s) chez Binance")
+        if stored["duplicates"] or stored["out_of_order"]:
+            parts.append(f"{stored['duplicates']} doublon(s) et {stored['out_of_order']} ligne(s) "
+                         f"dans le désordre corrigés à l'écriture")
+
+    if not snapshot_key.get("range"):
+        now_ms = int(time.time() * 1000)
+        last = int(open_time[-1]) if len(open_time) else None
+        if data_quality.is_stale(last, step, now_ms):
+            age = "jamais" if last is None else f"il y a {(now_ms - last) // 60_000} min"
+            parts.append(f"dernière bougie {age}")
+            issues = True
+    return "Données : " + ", ".join(parts), {"color": "darkorange" if issues else "green"}
 
 def register_callbacks(app):
+    # --- 1. Instantané courant : seul ce callback relit les données ---
+    @app.callback(
+        Output("snapshot-version", "data"),
+        Output("historical-graph", "relayoutData"),
+        Output("macd-graph", "relayoutData"),
+        Input("reload-button", "n_clicks"),
+        Input("interval-component", "n_intervals"),
+        Input("history-range", "start_date"),
+        Input("history-range", "end_date"),
+        Input("timeframe", "value"),
+        State("snapshot-version", "data"),
+    )
+    @timed("callback.refresh_snapshot")
+    def refresh_snapshot(n_clicks, n_ticks, start_date, end_date, timeframe, current_key):
+        # Seul le bouton "Recharger" force un appel à Binance ; l'intervalle lit le dernier instantané
+        ctx = callback_context
+        force_refresh = bool(ctx.triggered) and ctx.triggered[0]["prop_id"] == "reload-button.n_clicks"
+        selected = history_range(start_date, end_date)
+        try:
+            if selected:
+                derived = indicator_worker.range_snapshot(*selected, refresh=True, timeframe=timeframe)
+            else:
+                derived = indicator_worker.timeframe_snapshot(timeframe, force_refresh=force_refresh)
+        except requests.RequestException as exc:
+            # Ni stockage local ni réseau : la page reste affichée, nouvel essai au prochain intervalle
+            print(f"Aucune bougie disponible ({exc!r})")
+            return dash.no_update, dash.no_update, dash.no_update
+        key = {"range": selected, "timeframe": timeframe, "version": list(derived.version)}
+        # Pas de nouvelle bougie : rien n'est renvoyé au navigateur, les figures restent en place
+        if key == current_key:
+            return dash.no_update, dash.no_update, dash.no_update
+        # Nouvelle plage ou unité de temps : l'ancien zoom ne s'applique plus
+        current_key = current_key or {}
+        if selected != current_key.get("range") or timeframe != current_key.get("timeframe"):
+            return key, None, None
+        return key, dash.no_update, dash.no_update
+
+    # --- 2. Figure de prix complète : uniquement quand les bougies ou le type de graphe changent ---
     @app.callback(
         Output("historical-graph", "figure"),
+        Input("snapshot-version", "data"),
+        Input("chart-type", "value"),
+        State("num-resistances-slider", "value"),
+        State("precision-slider", "value"),
+        State("level-method", "value"),
+        State("resistance-sliders-container", "style"),
+        State("historical-graph", "relayoutData"),
+        State("graph-width", "data"),
+        prevent_initial_call=True,
+    )
+    @timed("callback.update_price_figure")
+    def update_price_figure(snapshot_key, chart_type, num_resistances, precision, level_method, slider_style,
+                            relayout_data, width):
+        derived = snapshot_for(snapshot_key)
+        # Figure partagée de l'instantané : copie superficielle, sans revalidation Plotly
+        fig = derived.figure(chart_type)
+        # Zoom en cours : la nouvelle figure garde le détail de la plage visible
+        traces = lod_for(derived, chart_type, relayout_data, width)
+        if traces is not None:
+            fig = with_traces(fig, traces)
+        shapes, trace = level_overlays(derived, num_resistances, precision, level_method,
+                                       sliders_visible(slider_style))
+        # Le zoom est conservé tant que la plage de l'historique et l'unité de temps ne changent pas
+        layout = dict(fig["layout"], shapes=shapes, uirevision=view_revision("prix", snapshot_key))
+        return dict(fig, data=[trace] + list(fig["data"]), layout=layout)
+
+    # --- Ré-échantillonnage au zoom : seuls les tableaux de la plage visible sont renvoyés ---
+    @app.callback(
+        Output("historical-graph", "figure", allow_duplicate=True),
+        Input("historical-graph", "relayoutData"),
+        State("chart-type", "value"),
+        State("graph-width", "data"),
+        State("snapshot-version", "data"),
+        prevent_initial_call=True,
+    )
+    @timed("callback.resample_price_figure")
+    def resample_price_figure(relayout_data, chart_type, width, snapshot_key):
+        x_range = relayout_range(relayout_data)
+        if x_range is False:
+            return dash.no_update
+        derived = snapshot_for(snapshot_key)
+        return traces_patch(derived.lod_traces(chart_type, x_range, lod_points(chart_type, width) if x_range else None),
+                            first=LEVEL_TRACE + 1)
+
+    # --- 3. Droites de niveaux : mise à jour partielle (quelques centaines d'octets) ---
+    @app.callback(
+        Output("historical-graph", "figure", allow_duplicate=True),
+        Input("num-resistances-slider", "value"),
+        Input("precision-slider", "value"),
+        Input("level-method", "value"),
+        Input("resistance-sliders-container", "style"),
+        State("snapshot-version", "data"),
+        prevent_initial_call=True,
+    )
+    @timed("callback.update_level_overlays")
+    def update_level_overlays(num_resistances, precision, level_method, slider_style, snapshot_key):
+        derived = snapshot_for(snapshot_key)
+        shapes, trace = level_overlays(derived, num_resistances, precision, level_method,
+                                       sliders_visible(slider_style))
+        patch = Patch()
+        patch["layout"]["shapes"] = shapes
+        # Indice fixe (voir update_price_figure) : ne dépend pas du type de graphe affiché côté client
+        patch["data"][LEVEL_TRACE] = trace
+        return patch
+
+    # --- 4. MACD, statut et tendance : uniquement à chaque nouvel instantané ---
+    @app.callback(
         Output("macd-graph", "figure"),
-        Output("popup-message", "style"),
-        Output("popup-interval", "disabled"),
-        Output("popup-interval", "n_intervals"),
-        Output("resistance-sliders-container", "style"),
         Output("macd-status", "children"),
         Output("macd-status", "style"),
         Output("macd-trend-text", "children"),
-        Input("reload-button", "n_clicks"),
-        Input("popup-interval", "n_intervals"),
-        Input("toggle-resistances", "n_clicks"),
-        Input("num-resistances-slider", "value"),
-        Input("precision-slider", "value"),
-        State("popup-message", "style"),
-        State("resistance-sliders-container", "style"),
+        Input("snapshot-version", "data"),
+        State("macd-graph", "relayoutData"),
+        State("graph-width", "data"),
+        prevent_initial_call=True,
     )
-    def update_graph_and_popup(n_clicks, n_intervals, resistance_clicks,
-                                num_resistances, precision,
-                                current_style, current_slider_style):
-        ctx = callback_context
-
-        # --- Charger les données ---
-        klines = load_data_from_json()
-        times, prices = process_klines_data(klines)
-
-        # Construire DataFrame avec time et price pour MACD
-        df = pd.DataFrame({
-            "time": times,
-            "price": prices
-        })
-
-        # Calcul MACD
-        df = calculate_macd(df)
-
-        # Renommer les colonnes si nécessaire
-        df = df.rename(columns={
-            "MACD": "macd_diff",
-            "Signal": "macd_dea"
-        })
-
-        # Sécurité si colonne absente
-        if "macd_diff" not in df or "macd_dea" not in df:
-            macd_status = "MACD indisponible"
-            macd_status_style = {
-                "color": "gray",
-                "fontStyle": "italic",
-                "textAlign": "center",
-                "fontSize": "20px",
-                "marginTop": "10px"
-            }
-        else:
-            macd_diff = df["macd_diff"].iloc[-1]
-            macd_dea = df["macd_dea"].iloc[-1]
-
-            if macd_dea > macd_diff:
-                macd_status = "MACD"
-                macd_status_style = {
-                    "color": "green",
-                    "fontWeight": "bold",
-                    "textAlign": "center",
-                    "fontSize": "20px",
-                    "marginTop": "10px"
-                }
-            else:
-                macd_status = "MACD"
-                macd_status_style = {
-                    "color": "red",
-                    "fontWeight": "bold",
-                    "textAlign": "center",
-                    "fontSize": "20px",
-                    "marginTop": "10px"
-                }
-
-        # Création de la figure de prix
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=times,
-            y=prices,
-            mode="lines",
-            name="Prix",
-            line=dict(color="blue", width=2)
-        ))
-
-
-        # Vérification de la tendance actuelle
-        # Calcul du DEA_diff et de la tendance actuelle
-        dea_diff = df["macd_dea"].iloc[-1] - df["macd_dea"].iloc[-2]
-        if abs(dea_diff) < 1e-6:
-            last_trend = "flat"
-        elif dea_diff > 0:
-            last_trend = "up"
-        else:
-            last_trend = "down"
-
+    @timed("callback.update_macd")
+    def update_macd(snapshot_key, relayout_data, width):
+        derived = snapshot_for(snapshot_key)
+        macd_fig = derived.figure("macd")
+        traces = lod_for(derived, "macd", relayout_data, width)
+        if traces is not None:
+            macd_fig = with_traces(macd_fig, traces)
+        macd_fig = dict(macd_fig, layout=dict(macd_fig["layout"],
+                                              uirevision=view_revision("macd-zoom", snapshot_key)))
+        macd_status_style = {
+            "color": derived.macd_color,
+            "fontWeight": "bold",
+            "textAlign": "center",
+            "fontSize": "20px",
+            "marginTop": "10px"
+        }
         trend_color = {
             "up": "green",
             "down": "red",
             "flat": "yellow"
-        }[last_trend]
-
-        macd_trend_text = f"Tendance actuelle : {last_trend}"
-
-        fig.update_layout(
-            xaxis_title="Temps",
-            yaxis_title="Prix (USDT)",
-            template="plotly_white",
-            uirevision="prix"  # <-- c'est cette ligne qui fixe le zoom/pan
-        )
-
-        macd_fig = create_macd_figure(df)  # Figure MACD
+        }[derived.trend]
+        macd_trend_text = html.Span(f"Tendance actuelle : {derived.trend}", style={"color": trend_color})
+        return macd_fig, "MACD", macd_status_style, macd_trend_text
 
-        # Si pas d’événement déclencheur
-        if not ctx.triggered:
-            empty_macd_fig = go.Figure()
-            return fig, empty_macd_fig, {"display": "none"}, True, 0, {"display": "none"}, macd_status, macd_status_style, html.Span(macd_trend_text, style={"color": trend_color}),
-
-
-        triggered_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        sliders_visible = current_slider_style.get("display") == "block"
+    @app.callback(
+        Output("macd-graph", "figure", allow_duplicate=True),
+        Input("macd-graph", "relayoutData"),
+        State("graph-width", "data"),
+        State("snapshot-version", "data"),
+        prevent_initial_call=True,
+    )
+    @timed("callback.resample_macd_figure")
+    def resample_macd_figure(relayout_data, width, snapshot_key):
+        x_range = relayout_range(relayout_data)
+        if x_range is False:
+            return dash.no_update
+        derived = snapshot_for(snapshot_key)
+        return traces_patch(derived.lod_traces("macd", x_range, lod_points("macd", width) if x_range else None))
+
+    # --- Bandeau de qualité des données affichées ---
+    @app.callback(
+        Output("data-quality", "children"),
+        Output("data-quality", "style"),
+        Input("snapshot-version", "data"),
+        prevent_initial_call=True,
+    )
+    @timed("callback.update_data_quality")
+    def update_data_quality(snapshot_key):
+        text, color = quality_status(snapshot_for(snapshot_key), snapshot_key)
+        return text, dict(DATA_QUALITY_STYLE, **color)
 
-        # Gestion des résistances
-        if triggered_id == "toggle-resistances":
-            if sliders_visible:
-                return fig, macd_fig, current_style, True, 0, {"display": "none"}, macd_status, macd_status_style, html.Span(macd_trend_text, style={"color": trend_color}),
+    # --- Panneaux d'indicateurs : figure mémorisée par l'instantané pour chaque combinaison ---
+    @app.callback(
+        Output("indicator-graph", "figure"),
+        Output("indicator-graph", "style"),
+        Input("snapshot-version", "data"),
+        Input("indicator-panels", "value"),
+    )
+    @timed("callback.update_indicator_panels")
+    def update_indicator_panels(snapshot_key, names):
+        if not names:
+            return dash.no_update, {"display": "none"}
+        figure = snapshot_for(snapshot_key).indicator_figure(names)
+        figure = dict(figure, layout=dict(figure["layout"], uirevision=view_revision("indicateurs", snapshot_key)))
+        return figure, {"display": "block"}
+
+    # --- Carte des corrélations entre paires : moniteur partagé, mis à jour à chaque bougie close ---
+    @app.callback(
+        Output("correlation-heatmap", "figure"),
+        Output("correlation-heatmap", "style"),
+        Input("snapshot-version", "data"),
+        Input("cross-asset-panel", "value"),
+    )
+    @timed("callback.update_correlation_heatmap")
+    def update_correlation_heatmap(snapshot_key, enabled):
+        if not enabled:
+            return dash.no_update, {"display": "none"}
+        matrix, latest = cross_asset_view.refresh()
+        figure = create_correlation_heatmap(matrix, cross_asset_view.symbols, latest, cross_asset_view.base)
+        return figure, {"display": "block"}
+
+    # Largeur réelle du graphique de prix, mesurée dans le navigateur
+    app.clientside_callback(
+        """
+        function(figure) {
+            var graph = document.getElementById("historical-graph");
+            return graph ? graph.offsetWidth : window.innerWidth;
+        }
+        """,
+        Output("graph-width", "data"),
+        Input("historical-graph", "figure"),
+    )
 
-            else:
-                resistances = find_resistance_levels(prices, n=num_resistances, precision=precision)
-
-                # Classification des niveaux
-                levels_classification = classify_support_resistance(df, resistances, seuil=0.001)
-                levels_colors = {
-                    "support": "green",
-                    "resistance": "red",
-                    "neutral": "yellow"
-                }
-
-                for r in resistances:
-                    classification = levels_classification.get(r, "neutral")
-                    # Ajouter une ligne visuelle
-                    fig.add_shape(
-                        type="line",
-                        x0=times[0],
-                        x1=times[-1],
-                        y0=r,
-                        y1=r,
-                        line=dict(color=levels_colors[classification], width=2, dash="dot"),
-                        layer="below",
-                    )
-
-                    # Ajouter la valeur de la droite de résistance lorsque qu'on passe la souris dessus
-                    fig.add_trace(go.Scatter(
-                        x=[times[-1]],
-                        y=[r],
-                        mode="markers",
-                        marker=dict(color=levels_colors[classification], size=8, opacity=0),
-                        showlegend=False,
-                        hoverinfo="text",
-                        hovertext=f"{classification.capitalize()} : {r:.2f} USDT"
-                    ))
-
-
-                return fig, macd_fig, current_style, True, 0, {"display": "block"}, macd_status, macd_status_style, html.Span(macd_trend_text, style={"color": trend_color}),
-
-
-        elif triggered_id in ["num-resistances-slider", "precision-slider"]:
-            if sliders_visible:
-                resistances = find_resistance_levels(prices, n=num_resistances, precision=precision)
-
-                # Classification des niveaux
-                levels_classification = classify_support_resistance(df, resistances, seuil=0.001)
-                levels_colors = {
-                    "support": "green",
-                    "resistance": "red",
-                    "neutral": "yellow"
-                }
-
-                for r in resistances:
-                    classification = levels_classification.get(r, "neutral")
-                    # Ajouter une ligne visuelle
-                    fig.add_shape(
-                        type="line",
-                        x0=times[0],
-                        x1=times[-1],
-                        y0=r,
-                        y1=r,
-                        line=dict(color=levels_colors[classification], width=2, dash="dot"),
-                        layer="below",
-                    )
-
-                    # Ajouter la valeur de la droite de résistance lorsque qu'on passe la souris dessus
-                    fig.add_trace(go.Scatter(
-                        x=[times[-1]],
-                        y=[r],
-                        mode="markers",
-                        marker=dict(color=levels_colors[classification], size=8, opacity=0),
-                        showlegend=False,
-                        hoverinfo="text",
-                        hovertext=f"{classification.capitalize()} : {r:.2f} USDT"
-                    ))
-
-
-                return fig, macd_fig, current_style, True, 0, current_slider_style, macd_status, macd_status_style,  html.Span(macd_trend_text, style={"color": trend_color}),
+    # --- 5. Affichage des sliders de résistances ---
+    @app.callback(
+        Output("resistance-sliders-container", "style"),
+        Input("toggle-resistances", "n_clicks"),
+        State("resistance-sliders-container", "style"),
+        prevent_initial_call=True,
+    )
+    @timed("callback.toggle_sliders")
+    def toggle_sliders(resistance_clicks, current_slider_style):
+        display = "none" if sliders_visible(current_slider_style) else "block"
+        return dict(current_slider_style or {}, display=display)
 
-            else:
-                return fig, macd_fig, current_style, True, 0, current_slider_style, macd_status, macd_status_style,  html.Span(macd_trend_text, style={"color": trend_color}),
-
-
-        elif triggered_id == "reload-button" and n_clicks > 0:
-            style_show = {
-                "display": "block",
-                "position": "fixed",
-                "top": "20px",
-                "right": "20px",
-                "background-color": "lightgreen",
-                "padding": "10px",
-                "border-radius": "5px",
-                "box-shadow": "0 0 5px #333",
-                "zIndex": 1000,
-            }
-            return fig, macd_fig, style_show, False, 0, {"display": "none"}, macd_status, macd_status_style,  html.Span(macd_trend_text, style={"color": trend_color}),
-
-
-        elif triggered_id == "popup-interval" and n_intervals >= 1:
-            style_show = {
-                "display": "block",
-                "position": "fixed",
-                "top": "20px",
-                "right": "20px",
-                "background-color": "lightgreen",
-                "padding": "10px",
-                "border-radius": "5px",
-                "box-shadow": "0 0 5px #333",
-                "zIndex": 1000,
-            }
-            return fig, macd_fig, style_show, False, 0, {"display": "none"}, macd_status, macd_status_style, html.Span(macd_trend_text, style={"color": trend_color}),
-
-
-        else:
-            return fig, macd_fig, current_style, dash.no_update, dash.no_update, current_slider_style, macd_status, macd_status_style, html.Span(macd_trend_text, style={"color": trend_color}),
+    # --- 6. Popup "Valeurs mises à jour !" : affiché au rechargement, masqué après 2 secondes ---
+    @app.callback(
+        Output("popup-message", "style"),
+        Output("popup-interval", "disabled"),
+        Output("popup-interval", "n_intervals"),
+        Input("reload-button", "n_clicks"),
+        Input("popup-interval", "n_intervals"),
+        State("popup-message", "style"),
+        prevent_initial_call=True,
+    )
+    @timed("callback.update_popup")
+    def update_popup(n_clicks, n_intervals, current_style):
+        triggered_id = callback_context.triggered[0]["prop_id"].split(".")[0]
+        if triggered_id == "reload-button" and n_clicks > 0:
+            return POPUP_STYLE, False, 0
+        if triggered_id == "popup-interval" and n_intervals >= 1:
+            return dict(current_style, display="none"), True, 0
+        return dash.no_update, dash.no_update, dash.no_update
@@ -0,0 +1,151 @@
+"""
+Conteneur compact de bougies OHLCV (structure de tableaux NumPy).
+
+Chaque champ d'une bougie Binance est stocké dans un tableau NumPy de type fixe :
+la mémoire par bougie est constante (11 champs de 8 octets = 88 octets), sans dictionnaire
+par ligne, et les calculs se font directement sur les colonnes.
+"""
+import numpy as np
+
+from metrics import timed
+
+# Champs d'une bougie Binance /api/v3/klines (dans l'ordre de l'API) et leur type
+KLINE_FIELDS = {
+    "open_time": np.int64,        # Temps d'ouverture (ms depuis epoch)
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,         # Volume en actif de base (ex: ETH)
+    "close_time": np.int64,       # Temps de clôture (ms depuis epoch)
+    "quote_volume": np.float64,   # Volume en actif de cotation (ex: USDC)
+    "trades": np.int64,           # Nombre de transactions
+    "taker_buy_base": np.float64,
+    "taker_buy_quote": np.float64,
+}
+
+
+class Candles:
+    """
+    Série de bougies OHLCV, une colonne NumPy par champ Binance.
+
+    Args:
+        **columns: tableaux (ou listes) pour chacun des champs de KLINE_FIELDS.
+            Les champs absents sont remplis : open/high/low avec close, les autres avec NaN ou 0.
+    """
+
+    __slots__ = tuple(KLINE_FIELDS)
+
+    def __init__(self, **columns):
+        unknown = set(columns) - set(KLINE_FIELDS)
+        if unknown:
+            raise ValueError(f"Champs de bougie inconnus : {sorted(unknown)}")
+
+        n = len(columns["open_time"]) if "open_time" in columns else 0
+        close = np.asarray(columns.get("close", np.full(n, np.nan)), dtype=np.float64)
+        for name, dtype in KLINE_FIELDS.items():
+            if name in columns:
+                value = np.asarray(columns[name], dtype=dtype)
+            elif name in ("open", "high", "low"):
+                value = close  # Données de clôture seule : bougie dégénérée
+            elif dtype == np.float64:
+                value = np.full(n, np.nan)
+            else:
+                value = np.zeros(n, dtype=dtype)
+            if len(value) != n:
+                raise ValueError(f"Colonne '{name}' de longueur {len(value)} au lieu de {n}")
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def empty(cls):
+        """
+        Retourne une série vide.
+        """
+        return cls(**{name: np.empty(0, dtype=dtype) for name, dtype in KLINE_FIELDS.items()})
+
+    @classmethod
+    @timed("parse.klines")
+    def from_binance(cls, data):
+        """
+        Construit une série à partir des bougies brutes de l'API Binance.
+
+        Args:
+            data (list of list): [open_time, open, high, low, close, volume, close_time,
+                quote_volume, trades, taker_buy_base, taker_buy_quote, ignore].
+
+        Returns:
+            Candles: la série correspondante.
+        """
+        if not data:
+            return cls.empty()
+        raw = np.array(data, dtype=object)
+        return cls(**{
+            name: raw[:, i].astype(dtype)  # Les prix et volumes arrivent en string
+            for i, (name, dtype) in enumerate(KLINE_FIELDS.items())
+        })
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Concatène plusieurs séries.
+
+        Args:
+            parts (list of Candles): séries à concaténer.
+
+        Returns:
+            Candles: série concaténée.
+        """
+        if not parts:
+            return cls.empty()
+        return cls(**{name: np.concatenate([getattr(p, name) for p in parts]) for name in KLINE_FIELDS})
+
+    def __len__(self):
+        return len(self.open_time)
+
+    def __getitem__(self, index):
+        # Tranche, masque booléen ou tableau d'indices appliqué à toutes les colonnes
+        if isinstance(index, (int, np.integer)):
+            index = slice(index, index + 1 if index != -1 else None)
+        return Candles(**{name: getattr(self, name)[index] for name in KLINE_FIELDS})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Candles est immuable : construire une nouvelle série")
+
+    def __repr__(self):
+        return f"Candles({len(self)} bougies)"
+
+    def columns(self):
+        """
+        Retourne les colonnes sous forme de dictionnaire {champ: tableau}.
+        """
+        return {name: getattr(self, name) for name in KLINE_FIELDS}
+
+    @property
+    def times(self):
+        """
+        Temps d'ouverture en datetime64[ms] (UTC).
+        """
+        return self.open_time.astype("datetime64[ms]")
+
+    @property
+    def nbytes(self):
+        """
+        Mémoire occupée par les colonnes, en octets.
+        """
+        return sum(getattr(self, name).nbytes for name in KLINE_FIELDS)
+
+    def to_frame(self):
+        """
+        Convertit la série en DataFrame pandas.
+
+        La colonne "time" contient les temps d'ouverture et "price" le prix de clôture,
+        pour rester compatible avec calculate_macd et classify_support_resistance.
+
+        Returns:
+            pd.DataFrame: une ligne par bougie.
+        """
+        import pandas as pd  # Import différé : pandas n'est chargé qu'au premier calcul (démarrage rapide)
+
+        frame = pd.DataFrame({"time": self.times, **self.columns()})
+        frame["price"] = self.close
+        return frame
@@ -0,0 +1,495 @@
+"""
+Précalcul côté serveur des séries dérivées affichées par le tableau de bord.
+
+Un seul IndicatorWorker par processus surveille les bougies (cache, flux temps réel) et, à chaque
+nouvelle version des données, matérialise une fois pour toutes un DerivedSnapshot : DataFrame
+OHLCV + MACD / DEA / histogramme, statut et tendance MACD, figures Plotly, niveaux et leur
+classification.
+Les callbacks Dash ne font plus que lire le dernier instantané et dessiner : le coût d'une
+requête ne dépend plus du nombre d'onglets ouverts.
+
+Sans thread démarré (tests, scripts), `latest()` calcule à la demande avec la même mémorisation
+par version des données. Le tout premier instantané vient du stockage local (aucun appel réseau) :
+la première page s'affiche pendant que la récupération Binance tourne en tâche de fond, et une
+récupération en échec laisse servir le dernier instantané au lieu de faire échouer la page.
+
+Une plage de l'historique choisie dans le sélecteur de dates a son propre instantané
+(`range_snapshot`), calculé à la première demande puis mémorisé.
+
+Les unités de temps supérieures (5m, 15m, 1h, 4h) sont dérivées des bougies 1m (voir resample.py) :
+une unité est amorcée depuis le stockage à sa première demande, puis mise à jour à chaque
+nouvelle version des bougies 1m, avec son propre MACD incrémental et son propre instantané.
+"""
+import threading
+from collections import OrderedDict
+
+import requests
+
+import kline_store
+
+from analysis_tools import (MACDSeries, calculate_macd, classify_support_resistance,
+                            create_candlestick_figure, create_indicator_figure, create_line_figure,
+                            create_macd_figure, volume_colors)
+from candles import Candles
+from data_utils import load_klines
+from downsampling import aggregate_ohlcv, downsample_frame, visible_rows
+from history_index import history_index
+from indicators import INDICATORS, IndicatorContext
+from level_detection import dataset_version, detect_levels
+from metrics import span
+from resample import ResampledSeries, interval_ms, resample_candles, timeframe_factor
+
+# Paramètres de niveaux précalculés (valeurs par défaut des sliders, pour chaque méthode)
+DEFAULT_LEVEL_PARAMS = [
+    (5, 10, "frequency"),
+    (5, 10, "volume"),
+    (5, 10, "kde"),
+    (5, 10, "swings"),
+]
+
+# Figures construites par le calcul de fond (la figure en chandeliers l'est à la première demande)
+FIGURE_BUILDERS = {
+    "line": create_line_figure,
+    "candles": create_candlestick_figure,
+    "macd": create_macd_figure,
+}
+DEFAULT_FIGURES = ("line", "macd")
+
+# Budget de points des figures complètes (toute la fenêtre, avant zoom) : voir downsampling.py
+FIGURE_POINTS = {"line": 2000, "candles": 1500, "macd": 2000}
+LOD_METHOD = "minmax"
+# Au zoom, on envoie aussi une demi-largeur de part et d'autre de la plage visible
+ZOOM_MARGIN = 0.5
+
+# Colonnes tracées par chaque figure, dans l'ordre de ses traces : {propriété de la trace: colonne}
+TRACE_COLUMNS = {
+    "line": [{"x": "time", "y": "close"}],
+    "candles": [
+        {"x": "time", "open": "open", "high": "high", "low": "low", "close": "close"},
+        {"x": "time", "y": "volume", "marker.color": "volume_color"},
+    ],
+    "macd": [{"x": "time", "y": "macd_diff"}, {"x": "time", "y": "macd_dea"}],
+}
+
+# Écart relatif utilisé pour classer les niveaux (support / résistance / neutre)
+CLASSIFICATION_THRESHOLD = 0.001
+
+_LEVELS_PER_SNAPSHOT = 64
+_INDICATOR_FIGURES_PER_SNAPSHOT = 16
+_RANGE_SNAPSHOTS = 8
+
+# Historique 1m relu au plus pour amorcer une unité de temps supérieure (en jours)
+TIMEFRAME_SEED_DAYS = 90
+
+
+class DerivedSnapshot:
+    """
+    Séries dérivées d'une version donnée des bougies. Immuable une fois publié, à l'exception
+    des caches de figures et de niveaux qui se remplissent au fil des demandes.
+
+    Attributes:
+        version (tuple): empreinte des bougies (level_detection.dataset_version).
+        candles (Candles): bougies utilisées.
+        frame (pd.DataFrame): to_frame() des bougies + colonnes macd_diff, macd_dea, Histogram.
+        macd_color (str): "green" si DEA > DIF sur la dernière bougie, sinon "red".
+        trend (str): sens de la DEA sur la dernière bougie ("up", "down" ou "flat").
+        indicators (IndicatorContext): indicateurs de ces bougies (intermédiaires partagés, voir indicators.py).
+    """
+
+    def __init__(self, candles, macd):
+        self.version = dataset_version(candles)
+        self.candles = candles
+        frame = candles.to_frame()
+        frame["macd_diff"], frame["macd_dea"], frame["Histogram"] = macd
+        self.frame = frame
+
+        macd_diff, macd_dea, _ = macd
+        self.macd_color = "green" if len(candles) and macd_dea[-1] > macd_diff[-1] else "red"
+        dea_diff = macd_dea[-1] - macd_dea[-2] if len(candles) >= 2 else 0.0
+        if abs(dea_diff) < 1e-6:
+            self.trend = "flat"
+        elif dea_diff > 0:
+            self.trend = "up"
+        else:
+            self.trend = "down"
+
+        self.indicators = IndicatorContext(candles)
+        self._figures = {}
+        self._indicator_figures = {}
+        self._levels = {}
+        self._levels_lock = threading.Lock()
+
+    def figure(self, kind):
+        """
+        Figure Plotly sérialisable de ces bougies, construite une seule fois par instantané.
+
+        Construire une figure (validation Plotly, sous-graphes) coûte bien plus cher que de
+        l'envoyer : les callbacks reçoivent un dict partagé qu'ils ne doivent pas modifier.
+
+        Args:
+            kind (str): "line", "candles" ou "macd" (voir FIGURE_BUILDERS).
+
+        Returns:
+            dict: figure au format {"data": [...], "layout": {...}}.
+        """
+        if kind not in FIGURE_BUILDERS:
+            kind = "line"
+        figure = self._figures.get(kind)
+        if figure is None:
+            with span(f"figure.{kind}"):
+                figure = FIGURE_BUILDERS[kind](self.lod_frame(kind)).to_dict()
+            self._figures[kind] = figure
+        return figure
+
+    def lod_frame(self, kind, x_range=None, n_points=None):
+        """
+        Lignes de `frame` à tracer pour une figure : plage visible, réduite au budget de points.
+
+        Args:
+            kind (str): "line", "candles" ou "macd".
+            x_range (tuple, optional): (début, fin) visibles ; par défaut toute la fenêtre.
+            n_points (int, optional): budget de points de la plage visible ;
+                par défaut FIGURE_POINTS[kind].
+
+        Returns:
+            pd.DataFrame: lignes conservées (bougies regroupées pour les chandeliers).
+        """
+        frame = self.frame.iloc[visible_rows(self.candles.times, x_range, ZOOM_MARGIN)]
+        n_points = n_points or FIGURE_POINTS[kind]
+        if x_range is not None:
+            n_points = int(n_points * (1 + 2 * ZOOM_MARGIN))  # Budget pour la plage visible seule
+        if kind == "candles":
+            return aggregate_ohlcv(frame, n_points)
+        columns = sorted({column for trace in TRACE_COLUMNS[kind] for column in trace.values()} - {"time"})
+        return downsample_frame(frame, columns, max(n_points // len(columns), 2), LOD_METHOD)
+
+    def lod_traces(self, kind, x_range=None, n_points=None):
+        """
+        Données des traces d'une figure ré-échantillonnées pour une plage visible (zoom).
+
+        Returns:
+            list of dict: pour chaque trace de la figure, {propriété: tableau}
+            (ex: [{"x": ..., "y": ...}]), voir TRACE_COLUMNS.
+        """
+        frame = self.lod_frame(kind, x_range, n_points)
+        if kind == "candles":
+            frame = frame.assign(volume_color=volume_colors(frame))
+        return [{prop: frame[column].to_numpy() for prop, column in trace.items()}
+                for trace in TRACE_COLUMNS[kind]]
+
+    def indicator_figure(self, names):
+        """
+        Figure des panneaux d'indicateurs empilés, construite une seule fois par combinaison.
+
+        Les indicateurs sont calculés par le contexte partagé de l'instantané : un panneau déjà
+        affiché (ou ajouté dans une autre session) n'est pas recalculé.
+
+        Args:
+            names (list of str): indicateurs de indicators.INDICATORS, dans l'ordre des panneaux.
+
+        Returns:
+            dict: figure au format {"data": [...], "layout": {...}}.
+        """
+        names = tuple(name for name in names if name in INDICATORS)
+        with self._levels_lock:
+            figure = self._indicator_figures.get(names)
+        if figure is not None:
+            return figure
+
+        frame = self.frame[["time", "close"]]
+        panels = []
+        for name in names:
+            indicator = INDICATORS[name]
+            with span(f"indicator.{name}"):
+                frame = frame.assign(**self.indicators.compute(name))
+            panels.append((indicator.label, indicator.outputs, indicator.overlay))
+        columns = [column for _, outputs, _ in panels for column in outputs]
+        if any(overlay for _, _, overlay in panels):
+            columns.append("close")
+        if columns:
+            frame = downsample_frame(frame, columns, max(FIGURE_POINTS["line"] // len(columns), 2), LOD_METHOD)
+        with span("figure.indicators"):
+            figure = create_indicator_figure(frame, panels).to_dict()
+
+        with self._levels_lock:
+            if len(self._indicator_figures) < _INDICATOR_FIGURES_PER_SNAPSHOT:
+                self._indicator_figures[names] = figure
+        return figure
+
+    def levels(self, n=5, precision=10, strategy="frequency"):
+        """
+        Niveaux détectés et leur classification pour ces bougies.
+
+        Args:
+            n (int): nombre de niveaux.
+            precision (int or float): largeur de regroupement des prix.
+            strategy (str): méthode de level_detection.LEVEL_STRATEGIES.
+
+        Returns:
+            list of tuple: [(niveau, 'support' | 'resistance' | 'neutral'), ...]
+        """
+        key = (n, precision, strategy)
+        with self._levels_lock:
+            if key in self._levels:
+                return self._levels[key]
+
+        with span(f"levels.{strategy}"):
+            levels = detect_levels(self.candles, n=n, precision=precision, strategy=strategy)
+        with span("levels.classify"):
+            classification = classify_support_resistance(self.frame, levels, seuil=CLASSIFICATION_THRESHOLD)
+        result = [(level, classification.get(level, "neutral")) for level in levels]
+
+        with self._levels_lock:
+            if len(self._levels) < _LEVELS_PER_SNAPSHOT:
+                self._levels[key] = result
+        return result
+
+
+class IndicatorWorker:
+    """
+    Calcule les séries dérivées à chaque nouvelle bougie et publie le dernier instantané.
+
+    Args:
+        symbol (str): symbole suivi.
+        interval (str): intervalle des bougies.
+        lookback (int): nombre de bougies affichées.
+        poll (float): période de vérification des nouvelles bougies (secondes).
+        level_params (list of tuple): combinaisons (n, précision, méthode) précalculées.
+    """
+
+    def __init__(self, symbol="ETHUSDC", interval="1m", lookback=1440, poll=1.0,
+                 level_params=DEFAULT_LEVEL_PARAMS):
+        self.symbol = symbol
+        self.interval = interval
+        self.lookback = lookback
+        self.poll = poll
+        self.level_params = list(level_params)
+        self.macd = MACDSeries(fast=12, slow=26, signal=9)
+
+        self.computations = 0
+        self._snapshot = None
+        self._timeframes = {}
+        self._compute_lock = threading.Lock()
+        self._ranges = OrderedDict()
+        self._ranges_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pending = None
+        self._pending_lock = threading.Lock()  # Pas _compute_lock : tenu pendant les récupérations
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def refreshing(self):
+        # Récupération de démarrage en cours (voir _snapshot_from_disk)
+        return self._pending is not None and self._pending.is_alive()
+
+    def refresh(self, force_refresh=False):
+        """
+        Relit les bougies et recalcule l'instantané si elles ont changé (un seul calcul à la fois).
+
+        Args:
+            force_refresh (bool): force un appel à Binance (bouton "Recharger").
+
+        Returns:
+            DerivedSnapshot: instantané à jour.
+        """
+        with self._compute_lock:
+            candles = load_klines(self.symbol, self.interval, self.lookback, force_refresh=force_refresh)
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != dataset_version(candles):
+                snapshot = self._precompute(DerivedSnapshot(candles, self.macd.sync(candles)))
+                self._snapshot = snapshot  # Publication : simple remplacement de référence
+                for timeframe in self._timeframes:
+                    self._update_timeframe(timeframe, snapshot)
+            return snapshot
+
+    def _precompute(self, snapshot):
+        with span("snapshot.precompute"):
+            for kind in DEFAULT_FIGURES:
+                snapshot.figure(kind)
+            for n, precision, strategy in self.level_params:
+                snapshot.levels(n, precision, strategy)
+        self.computations += 1
+        return snapshot
+
+    def _update_timeframe(self, timeframe, base):
+        # Appelé avec _compute_lock : intègre la fenêtre 1m courante dans l'unité `timeframe`
+        state = self._timeframes[timeframe]
+        if state["base"] == base.version:
+            return state["snapshot"]
+        state["series"].update(base.candles)
+        state["base"] = base.version
+        candles = state["series"].candles[-self.lookback:]
+        if state["snapshot"] is None or state["snapshot"].version != dataset_version(candles):
+            state["snapshot"] = self._precompute(DerivedSnapshot(candles, state["macd"].sync(candles)))
+        return state["snapshot"]
+
+    def latest(self, force_refresh=False):
+        """
+        Dernier instantané publié. Si le thread ne tourne pas (ou si `force_refresh`),
+        le calcul est fait dans l'appel.
+
+        Returns:
+            DerivedSnapshot: séries dérivées des bougies les plus récentes.
+        """
+        snapshot = self._snapshot
+        if snapshot is None and not force_refresh:
+            snapshot = self._snapshot_from_disk()
+            if snapshot is not None:
+                self._refresh_in_background()
+        if snapshot is not None and not force_refresh and (self.running or self.refreshing):
+            return snapshot
+        try:
+            return self.refresh(force_refresh)
+        except requests.RequestException as exc:
+            if snapshot is None:
+                raise
+            print(f"Récupération des bougies en échec ({exc!r}), dernier instantané conservé")
+            return snapshot
+
+    def _snapshot_from_disk(self):
+        # Premier instantané à partir des bougies stockées, sans appel réseau
+        if self._snapshot is not None:
+            return self._snapshot  # Sans attendre le verrou, tenu pendant une récupération en cours
+        with self._compute_lock:
+            if self._snapshot is None:
+                candles = kline_store.load_latest(self.symbol, self.interval, self.lookback)
+                if len(candles) == 0:
+                    return None
+                self._snapshot = self._precompute(DerivedSnapshot(candles, self.macd.sync(candles)))
+            return self._snapshot
+
+    def _refresh_in_background(self):
+        # Vérification et démarrage sous verrou : warm_up est appelé par chaque requête, les
+        # premières requêtes concurrentes ne lancent qu'une récupération
+        with self._pending_lock:
+            if not self.running and not self.refreshing:
+                self._pending = threading.Thread(target=self._refresh_once, daemon=True)
+                self._pending.start()
+
+    def _refresh_once(self):
+        try:
+            self._snapshot_from_disk()
+            self.refresh()
+        except Exception as exc:  # Le prochain appel de latest() réessaiera
+            print(f"Récupération de démarrage en échec ({exc!r})")
+
+    def warm_up(self):
+        """
+        Prépare le premier instantané en tâche de fond (stockage local, puis récupération Binance),
+        sans bloquer l'appelant.
+
+        Returns:
+            IndicatorWorker: self
+        """
+        if self._snapshot is None:
+            self._refresh_in_background()
+        return self
+
+    def timeframe_snapshot(self, timeframe, force_refresh=False):
+        """
+        Dernier instantané dans une unité de temps dérivée des bougies 1m (voir resample.py).
+
+        À la première demande d'une unité, ses bougies sont agrégées à partir de l'historique
+        stocké (au plus TIMEFRAME_SEED_DAYS jours) ; ensuite, chaque nouvelle version des bougies
+        1m ne ré-agrège que le dernier intervalle.
+
+        Args:
+            timeframe (str): unité de temps (ex: "15m", "4h") ; l'intervalle de base donne `latest()`.
+            force_refresh (bool): force un appel à Binance (bouton "Recharger").
+
+        Returns:
+            DerivedSnapshot: séries dérivées des `lookback` dernières bougies de l'unité.
+        """
+        base = self.latest(force_refresh)
+        if not timeframe or timeframe == self.interval:
+            return base
+        with self._compute_lock:
+            if timeframe not in self._timeframes:
+                factor = timeframe_factor(timeframe, self.interval)
+                max_seed = TIMEFRAME_SEED_DAYS * kline_store.DAY_MS // interval_ms(self.interval)
+                seed_size = min(self.lookback * factor, max_seed)
+                stored = kline_store.load_latest(self.symbol, self.interval, seed_size)
+                seed = kline_store.dedupe_sorted(Candles.concat([stored, base.candles]))
+                if len(seed):
+                    # Premier intervalle incomplet (début de l'historique en cours d'intervalle) : ignoré
+                    step = interval_ms(timeframe)
+                    seed = seed[seed.open_time >= -(-int(seed.open_time[0]) // step) * step]
+                series = ResampledSeries(timeframe)
+                series.update(seed)
+                self._timeframes[timeframe] = {"series": series, "macd": MACDSeries(fast=12, slow=26, signal=9),
+                                               "base": None, "snapshot": None}
+            return self._update_timeframe(timeframe, self._snapshot or base)
+
+    def range_snapshot(self, start, end, refresh=False, timeframe=None):
+        """
+        Séries dérivées d'une plage de l'historique (voir history_index.load_range).
+
+        L'instantané d'une plage est mémorisé (LRU de quelques plages) ; avec `refresh`, la plage
+        est relue et recalculée seulement si ses bougies ont changé.
+
+        Args:
+            start: début de la plage (voir history_index.to_ms).
+            end: fin de la plage, exclue.
+            refresh (bool): relit le stockage pour prendre en compte les nouvelles bougies.
+            timeframe (str, optional): unité de temps à dériver des bougies de base (ex: "1h").
+
+        Returns:
+            DerivedSnapshot: séries dérivées des bougies de la plage.
+        """
+        timeframe = timeframe or self.interval
+        key = (start, end, timeframe)
+        with self._ranges_lock:
+            snapshot = self._ranges.get(key)
+            if snapshot is not None:
+                self._ranges.move_to_end(key)
+                if not refresh:
+                    return snapshot
+
+        candles = history_index.load_range(self.symbol, start, end, self.interval)
+        if timeframe != self.interval:
+            candles = resample_candles(candles, timeframe)
+        if snapshot is None or snapshot.version != dataset_version(candles):
+            # Plage entière connue d'un coup : calcul vectorisé (pandas) plutôt que bougie par bougie
+            macd = calculate_macd(candles.to_frame())
+            snapshot = DerivedSnapshot(candles, (macd["macd_diff"].to_numpy(), macd["macd_dea"].to_numpy(),
+                                                 macd["Histogram"].to_numpy()))
+            with self._ranges_lock:
+                self._ranges[key] = snapshot
+                self._ranges.move_to_end(key)
+                while len(self._ranges) > _RANGE_SNAPSHOTS:
+                    self._ranges.popitem(last=False)
+        return snapshot
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.refresh()
+            except Exception as exc:  # Une erreur réseau ne doit pas arrêter le calcul de fond
+                print(f"Calcul des indicateurs en échec ({exc!r}), nouvel essai dans {self.poll}s")
+            self._stopping.wait(self.poll)
+
+    def start(self):
+        """
+        Lance le calcul de fond dans un thread démon.
+
+        Returns:
+            IndicatorWorker: self
+        """
+        if not self.running:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+# Instance partagée par toutes les sessions du processus (démarrée dans app.py)
+indicator_worker = IndicatorWorker()
@@ -0,0 +1,410 @@
+"""
+Analyse multi-actifs : corrélation glissante, bêta et z-score d'écart de plusieurs paires par
+rapport à une paire de référence (ex: BTCUSDC).
+
+Les clôtures stockées de chaque symbole sont alignées sur une grille commune de temps d'ouverture
+(align_closes) ; une minute sans bougie reprend la dernière clôture connue (rendement nul). Pour
+chaque symbole x et la référence y, sur une fenêtre de `window` bougies :
+
+    corr   = cov(rx, ry) / (σ(rx) σ(ry))                (rendements logarithmiques)
+    beta   = cov(rx, ry) / var(ry)
+    écart  = log(px) - beta * log(py)                   (beta de la dernière bougie)
+    zscore = (écart - moyenne de l'écart sur la fenêtre) / écart-type de l'écart
+
+Tout se déduit de onze sommes glissantes par symbole (n, Σx, Σy, Σx², Σy², Σxy et les mêmes sur les
+niveaux log(p), centrés pour limiter les erreurs d'arrondi). CrossAssetMonitor les tient à jour :
+    - update_block : bloc de bougies, sommes cumulées vectorisées (historique, rattrapage) ;
+    - update : une bougie, on ajoute la nouvelle ligne et retire celle qui sort de la fenêtre (O(symboles)).
+Les sommes sont recalculées depuis la fenêtre toutes les `window` bougies (pas de dérive).
+
+La mémoire ne dépend que de la fenêtre et de la taille des blocs, pas de la durée de l'historique :
+iter_rolling_stats parcourt par exemple 50 symboles × 1 an de bougies 1m jour par jour
+(voir benchmarks/bench_cross_asset.py).
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import requests
+
+import kline_store
+from batch_fetcher import fetch_batch
+from get_daily_prices import BINANCE_API_URL
+from history_index import to_ms
+from kline_cache import KlineCache, interval_to_seconds
+
+# Paires affichées par le panneau de corrélation du tableau de bord
+CROSS_ASSET_SYMBOLS = ("BTCUSDC", "ETHUSDC", "SOLUSDC", "BNBUSDC", "XRPUSDC", "DOGEUSDC")
+CROSS_ASSET_BASE = "BTCUSDC"
+
+DEFAULT_WINDOW = 1440  # Une journée de bougies 1m
+
+# Termes des sommes glissantes (axe 1 des tableaux de termes)
+_N, _X, _Y, _XX, _YY, _XY, _LX, _LY, _LXX, _LYY, _LXY = range(11)
+
+
+def align_closes(symbols, start, end, interval="1m", root=kline_store.STORE_ROOT):
+    """
+    Clôtures stockées de plusieurs symboles sur une grille commune de temps d'ouverture.
+
+    Seules les colonnes open_time et close des partitions journalières recoupant la plage sont lues.
+
+    Args:
+        symbols (list of str): symboles (une colonne chacun).
+        start: début de la plage (voir history_index.to_ms).
+        end: fin de la plage, exclue.
+        interval (str): intervalle des bougies.
+        root (str): racine du stockage colonnaire.
+
+    Returns:
+        tuple: (open_time, closes)
+            open_time (np.ndarray): grille des temps d'ouverture (ms).
+            closes (np.ndarray): clôtures (lignes × symboles), NaN sans bougie.
+    """
+    interval_ms = interval_to_seconds(interval) * 1000
+    start_ms, end_ms = to_ms(start), to_ms(end)
+    start_ms += -start_ms % interval_ms
+    open_time = np.arange(start_ms, max(end_ms, start_ms), interval_ms, dtype=np.int64)
+    closes = np.full((len(open_time), len(symbols)), np.nan)
+    days = [kline_store.day_of(day) for day in range(start_ms - start_ms % kline_store.DAY_MS, end_ms,
+                                                      kline_store.DAY_MS)]
+    for column, symbol in enumerate(symbols):
+        for day in days:
+            path = kline_store.partition_dir(symbol, interval, day, root)
+            if not os.path.exists(os.path.join(path, "open_time.npy")):
+                continue
+            candles = kline_store.read_partition(symbol, interval, day, root, fields=("close",))
+            lo, hi = np.searchsorted(candles.open_time, [start_ms, end_ms])
+            rows = (candles.open_time[lo:hi] - start_ms) // interval_ms
+            closes[rows, column] = candles.close[lo:hi]
+    return open_time, closes
+
+
+def _forward_fill(prices, previous):
+    # Lignes sans clôture : dernière clôture connue (celle du bloc précédent en tête)
+    stacked = np.vstack((previous[None, :], prices))
+    rows = np.where(np.isfinite(stacked), np.arange(len(stacked))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return stacked[rows, np.arange(stacked.shape[1])][1:]
+
+
+def _terms(prices, base, ref):
+    """
+    Termes des sommes glissantes pour chaque rendement d'une suite de clôtures.
+
+    Args:
+        prices (np.ndarray): clôtures (k + 1 lignes × symboles).
+        base (int): colonne de la référence.
+        ref (np.ndarray): niveaux log de centrage, par symbole.
+
+    Returns:
+        np.ndarray: termes (k × 11 × symboles), nuls là où un des deux rendements manque.
+    """
+    log_prices = np.log(prices)
+    returns = np.diff(log_prices, axis=0)
+    levels = log_prices[1:] - ref
+    valid = np.isfinite(returns) & np.isfinite(returns[:, [base]])
+    x = np.where(valid, returns, 0.0)
+    y = np.where(valid, returns[:, [base]], 0.0)
+    lx = np.where(valid, levels, 0.0)
+    ly = np.where(valid, levels[:, [base]], 0.0)
+    return np.stack((valid.astype(np.float64), x, y, x * x, y * y, x * y, lx, ly, lx * lx, ly * ly, lx * ly), axis=-2)
+
+
+def _stats(sums, terms, min_periods):
+    """
+    Corrélation, bêta et z-score à partir des sommes de la fenêtre et des termes de la dernière ligne.
+
+    Args:
+        sums (np.ndarray): sommes glissantes (... × 11 × symboles).
+        terms (np.ndarray): termes de la ligne qui termine chaque fenêtre (même forme).
+        min_periods (int): nombre minimal de rendements dans la fenêtre (sinon NaN).
+
+    Returns:
+        dict: "corr", "beta", "zscore" (... × symboles).
+    """
+    def term(array, k):
+        return array[..., k, :]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = term(sums, _N)
+        mx, my = term(sums, _X) / n, term(sums, _Y) / n
+        cov = term(sums, _XY) / n - mx * my
+        var_x = term(sums, _XX) / n - mx * mx
+        var_y = term(sums, _YY) / n - my * my
+        corr = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+        beta = cov / var_y
+
+        mlx, mly = term(sums, _LX) / n, term(sums, _LY) / n
+        var_lx = term(sums, _LXX) / n - mlx * mlx
+        var_ly = term(sums, _LYY) / n - mly * mly
+        cov_l = term(sums, _LXY) / n - mlx * mly
+        spread_std = np.sqrt(var_lx + beta * beta * var_ly - 2 * beta * cov_l)
+        spread = term(terms, _LX) - beta * term(terms, _LY)
+        zscore = (spread - (mlx - beta * mly)) / spread_std
+        zscore = np.where(term(terms, _N) > 0, zscore, np.nan)
+
+    short = n < min_periods
+    return {name: np.where(short, np.nan, value) for name, value in
+            (("corr", corr), ("beta", beta), ("zscore", zscore))}
+
+
+class CrossAssetMonitor:
+    """
+    Statistiques glissantes de plusieurs symboles par rapport à une référence, mises à jour à
+    chaque bougie (voir le docstring du module).
+
+    Les lignes reçues doivent se suivre sur la grille de l'intervalle (voir align_closes) ; une
+    clôture NaN reprend la dernière clôture connue du symbole.
+
+    Args:
+        symbols (list of str): symboles suivis (colonnes des lignes reçues).
+        base (str): symbole de référence (doit figurer dans `symbols`).
+        window (int): taille de la fenêtre glissante (bougies).
+        min_periods (int, optional): rendements minimum par fenêtre (par défaut la moitié de la fenêtre).
+    """
+
+    def __init__(self, symbols, base=CROSS_ASSET_BASE, window=DEFAULT_WINDOW, min_periods=None):
+        self.symbols = list(symbols)
+        self.base = self.symbols.index(base)
+        self.window = window
+        self.min_periods = window // 2 if min_periods is None else min_periods
+        self.last_open_time = None
+        self.latest = None  # Dernières statistiques : {"open_time", "corr", "beta", "zscore"}
+        n = len(self.symbols)
+        # Clôtures de la fenêtre (window + 1 pour window rendements), tampon circulaire
+        self._prices = np.full((window + 1, n), np.nan)
+        self._head = 0  # Ligne la plus ancienne
+        self._count = 0
+        self._last = np.full(n, np.nan)
+        self._ref = np.zeros(n)
+        self._sums = np.zeros((11, n))
+        self._since_resync = 0
+
+    def _ordered(self):
+        rows = (self._head + np.arange(self._count)) % len(self._prices)
+        return self._prices[rows]
+
+    def _set_window(self, prices):
+        # Dernières clôtures (plus anciennes en tête) ; recalcul exact des sommes
+        prices = prices[-len(self._prices):]
+        self._count = len(prices)
+        self._head = 0
+        self._prices[:self._count] = prices
+        self._last = prices[-1]
+        self._ref = np.where(np.isfinite(self._last), np.log(self._last), 0.0)
+        self._sums = _terms(prices, self.base, self._ref).sum(axis=0)
+        self._since_resync = 0
+
+    def update_block(self, open_time, closes):
+        """
+        Intègre un bloc de bougies consécutives (calcul vectorisé par sommes cumulées).
+
+        Args:
+            open_time (np.ndarray): temps d'ouverture du bloc (ms).
+            closes (np.ndarray): clôtures (lignes × symboles).
+
+        Returns:
+            dict: "open_time" et "corr", "beta", "zscore" (lignes × symboles) pour chaque bougie du bloc.
+        """
+        closes = _forward_fill(np.asarray(closes, dtype=np.float64), self._last)
+        prices = np.vstack((self._ordered(), closes))
+        ref = np.where(np.isfinite(prices[-1]), np.log(prices[-1]), 0.0)
+        terms = _terms(prices, self.base, ref)
+        # Ligne de zéros en tête : la première bougie reçue n'a pas de rendement
+        terms = np.concatenate((np.zeros((1,) + terms.shape[1:]), terms))
+
+        # Somme de la fenêtre qui se termine à chaque bougie du bloc
+        cumulative = np.cumsum(terms, axis=0)
+        hi = np.arange(self._count, self._count + len(closes))
+        lo = np.maximum(hi - self.window, 0)
+        stats = _stats(cumulative[hi] - cumulative[lo], terms[hi], self.min_periods)
+        stats["open_time"] = np.asarray(open_time, dtype=np.int64)
+
+        if len(closes):
+            self._set_window(prices)
+            self.last_open_time = int(stats["open_time"][-1])
+            self.latest = {name: value[-1] for name, value in stats.items()}
+        return stats
+
+    def update(self, open_time, close):
+        """
+        Intègre une bougie (mise à jour incrémentale des sommes).
+
+        Args:
+            open_time (int): temps d'ouverture (ms).
+            close (np.ndarray): clôture de chaque symbole (NaN si absente).
+
+        Returns:
+            dict: "open_time" et "corr", "beta", "zscore" (un par symbole).
+        """
+        close = np.asarray(close, dtype=np.float64)
+        appeared = np.isfinite(close) & ~np.isfinite(self._last)
+        close = np.where(np.isfinite(close), close, self._last)
+        size = len(self._prices)
+        if self._count == size:
+            # Rendement qui sort de la fenêtre (entre les deux plus anciennes clôtures) et nouveau
+            # rendement en un seul appel ; la ligne du milieu est ignorée
+            rows = np.vstack((self._prices[[self._head, (self._head + 1) % size]], self._last, close))
+            old, _, terms = _terms(rows, self.base, self._ref)
+            self._sums += terms - old
+        elif self._count:
+            terms = _terms(np.vstack((self._last, close)), self.base, self._ref)[0]
+            self._sums += terms
+        else:
+            terms = np.zeros_like(self._sums)
+
+        if self._count == size:
+            self._prices[self._head] = close
+            self._head = (self._head + 1) % size
+        else:
+            self._prices[(self._head + self._count) % size] = close
+            self._count += 1
+        self._last = close
+
+        stats = _stats(self._sums, terms, self.min_periods)
+        stats["open_time"] = int(open_time)
+        self.last_open_time = int(open_time)
+        self.latest = stats
+        self._since_resync += 1
+        # Premier prix d'un symbole (niveaux à centrer) ou fenêtre entièrement renouvelée
+        if appeared.any() or self._since_resync >= self.window:
+            self._set_window(self._ordered())
+        return stats
+
+    def correlation_matrix(self):
+        """
+        Matrice des corrélations des rendements de la fenêtre courante, entre tous les symboles.
+
+        Chaque paire utilise les lignes où ses deux rendements existent (comme les corrélations
+        de `latest`), avec le même minimum `min_periods`.
+
+        Returns:
+            np.ndarray: matrice symétrique (symboles × symboles), NaN pour une paire sans assez
+                de rendements communs ou de variation sur la fenêtre.
+        """
+        returns = np.diff(np.log(self._ordered()), axis=0)
+        if len(returns) == 0:
+            return np.full((len(self.symbols),) * 2, np.nan)
+        valid = np.isfinite(returns).astype(np.float64)
+        x = np.where(valid > 0, returns, 0.0)
+        # Sommes sur les lignes communes à chaque paire (i, j), par produits matriciels
+        n = valid.T @ valid
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = (x.T @ valid) / n                 # [i, j] : moyenne de i sur les lignes communes
+            var = ((x * x).T @ valid) / n - mean * mean
+            cov = (x.T @ x) / n - mean * mean.T
+            matrix = np.clip(cov / np.sqrt(var * var.T), -1.0, 1.0)
+        matrix[n < max(self.min_periods, 2)] = np.nan
+        return matrix
+
+
+def iter_rolling_stats(symbols, base=CROSS_ASSET_BASE, start=None, end=None, interval="1m",
+                       window=DEFAULT_WINDOW, chunk=1440, root=kline_store.STORE_ROOT):
+    """
+    Parcourt l'historique stocké par blocs et produit les statistiques glissantes de chaque bougie.
+
+    La mémoire utilisée dépend de `window` et `chunk` (lignes × symboles), pas de la durée de la plage.
+    La fenêtre précédant `start` est lue d'abord : les premières bougies ont déjà une fenêtre complète.
+
+    Args:
+        symbols (list of str): symboles analysés.
+        base (str): symbole de référence.
+        start: début de la plage (voir history_index.to_ms).
+        end: fin de la plage, exclue (par défaut maintenant).
+        interval (str): intervalle des bougies.
+        window (int): taille de la fenêtre glissante (bougies).
+        chunk (int): bougies par bloc.
+        root (str): racine du stockage colonnaire.
+
+    Yields:
+        dict: statistiques d'un bloc (voir CrossAssetMonitor.update_block).
+    """
+    interval_ms = interval_to_seconds(interval) * 1000
+    start_ms = to_ms(start)
+    start_ms -= start_ms % interval_ms
+    end_ms = to_ms(end) if end is not None else int(time.time() * 1000)
+    monitor = CrossAssetMonitor(symbols, base, window)
+    for block_start in range(start_ms - window * interval_ms, end_ms, chunk * interval_ms):
+        block_end = min(block_start + chunk * interval_ms, end_ms)
+        open_time, closes = align_closes(symbols, block_start, block_end, interval, root)
+        stats = monitor.update_block(open_time, closes)
+        if block_end > start_ms:
+            keep = open_time >= start_ms
+            yield {name: value[keep] for name, value in stats.items()}
+
+
+class CrossAssetView:
+    """
+    Statistiques multi-actifs du tableau de bord, partagées par toutes les sessions.
+
+    À chaque nouvelle bougie, les paires sont mises à jour dans le stockage (fetch_batch, une fois
+    par bougie grâce au KlineCache) puis les bougies closes depuis la dernière lecture sont
+    intégrées au CrossAssetMonitor : bougie par bougie en temps réel, par bloc au premier appel.
+
+    Args:
+        symbols (list of str): symboles affichés.
+        base (str): symbole de référence.
+        interval (str): intervalle des bougies.
+        window (int): taille de la fenêtre glissante (bougies).
+        root (str): racine du stockage colonnaire.
+        fetch (bool): récupère les bougies chez Binance (False : lit seulement le stockage,
+            alimenté par ailleurs, ex: backfill.py).
+        base_url (str): URL de base de l'API.
+    """
+
+    def __init__(self, symbols=CROSS_ASSET_SYMBOLS, base=CROSS_ASSET_BASE, interval="1m",
+                 window=DEFAULT_WINDOW, root=kline_store.STORE_ROOT, fetch=True, base_url=BINANCE_API_URL):
+        self.symbols = list(symbols)
+        self.base = base
+        self.interval = interval
+        self.window = window
+        self.root = root
+        self.fetch = fetch
+        self.base_url = base_url
+        self.monitor = CrossAssetMonitor(self.symbols, base, window)
+        self._cache = KlineCache(interval)
+        self._lock = threading.Lock()
+
+    def _fetch(self):
+        pairs = [(symbol, self.interval) for symbol in self.symbols]
+        # Fenêtre entière au premier appel (fetch_batch demande la plage par pages de 1000 bougies) ;
+        # une seule nouvelle tentative : le callback ne doit pas attendre de longs délais
+        return fetch_batch(pairs, lookback=self.window + 1, base_url=self.base_url, root=self.root, retries=1)
+
+    def refresh(self, now_ms=None):
+        """
+        Met à jour le stockage puis le moniteur jusqu'à la dernière bougie close.
+
+        Returns:
+            tuple: (matrix, latest)
+                matrix (np.ndarray): matrice des corrélations de la fenêtre (voir correlation_matrix).
+                latest (dict or None): statistiques de la dernière bougie close.
+        """
+        interval_ms = interval_to_seconds(self.interval) * 1000
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        current = now_ms - now_ms % interval_ms  # Bougie en cours, pas encore close
+        if self.fetch:
+            try:
+                self._cache.get(("cross_asset", tuple(self.symbols)), self._fetch)
+            except requests.RequestException:
+                pass  # Binance injoignable : on garde ce qui est stocké
+        with self._lock:
+            monitor = self.monitor
+            first = current - (self.window + 1) * interval_ms
+            if monitor.last_open_time is None or monitor.last_open_time < first:
+                monitor = self.monitor = CrossAssetMonitor(self.symbols, self.base, self.window)
+            else:
+                first = monitor.last_open_time + interval_ms
+            if current - first == interval_ms:
+                _, closes = align_closes(self.symbols, first, current, self.interval, self.root)
+                monitor.update(first, closes[0])
+            elif current > first:
+                monitor.update_block(*align_closes(self.symbols, first, current, self.interval, self.root))
+            return monitor.correlation_matrix(), monitor.latest
+
+
+# Vue partagée par le tableau de bord ; en déploiement multi-processus (SHARED_FEED=1), les
+# processus Dash n'appellent pas Binance
+cross_asset_view = CrossAssetView(fetch=not os.environ.get("SHARED_FEED"))
@@ -0,0 +1,142 @@
+"""
+Contrôle de qualité des séries de bougies : trous, doublons, lignes dans le désordre, dernière bougie périmée.
+
+Les minutes manquantes faussent les EMA du MACD (l'écart entre deux bougies n'est plus constant)
+et les comptages de find_resistance_levels ; les doublons et le désordre viennent de récupérations
+qui se chevauchent. La validation est vectorisée (np.diff sur les temps d'ouverture) : quelques
+microsecondes pour une partition journalière, elle est donc faite à chaque écriture du stockage.
+
+Chaque partition garde son rapport dans quality.json (voir kline_store.append_klines) :
+
+    {"rows": 1438, "first": ..., "last": ..., "gaps": [[début, fin], ...], "missing": 2,
+     "duplicates": 5, "out_of_order": 0, "misaligned": 0, "unfillable": [[début, fin], ...]}
+
+`gaps` sont les plages [début, fin[ (ms) sans bougie, `duplicates` / `out_of_order` cumulent les
+anomalies des lots reçus (corrigées à l'écriture), et `unfillable` les trous redemandés sans succès
+(absents chez Binance, ex: maintenance), que backfill.repair_gaps ne redemande plus.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+QUALITY_FILE = "quality.json"
+
+
+def validate(open_time, interval_ms, start_ms=None, end_ms=None):
+    """
+    Contrôle une série de temps d'ouverture.
+
+    Args:
+        open_time (np.ndarray): temps d'ouverture en ms (dans l'ordre de réception).
+        interval_ms (int): durée d'une bougie en ms.
+        start_ms (int, optional): premier temps d'ouverture attendu (trou en tête s'il manque).
+        end_ms (int, optional): fin de la plage attendue, exclue (trou en queue s'il manque).
+
+    Returns:
+        dict: rows, first, last, duplicates, out_of_order, misaligned, gaps ([début, fin[ en ms), missing.
+    """
+    open_time = np.asarray(open_time, dtype=np.int64)
+    diff = np.diff(open_time)
+    out_of_order = int(np.count_nonzero(diff < 0))
+    if out_of_order:
+        open_time = np.sort(open_time)
+        diff = np.diff(open_time)
+    unique = np.concatenate((open_time[:1], open_time[1:][diff != 0]))
+    step = np.diff(unique)
+    holes = np.flatnonzero(step > interval_ms)
+    gaps = [[int(unique[i]) + interval_ms, int(unique[i + 1])] for i in holes]
+    if len(unique):
+        if start_ms is not None and unique[0] > start_ms:
+            gaps.insert(0, [int(start_ms), int(unique[0])])
+        if end_ms is not None and unique[-1] + interval_ms < end_ms:
+            gaps.append([int(unique[-1]) + interval_ms, int(end_ms)])
+    elif start_ms is not None and end_ms is not None and end_ms > start_ms:
+        gaps.append([int(start_ms), int(end_ms)])
+    return {
+        "rows": int(len(unique)),
+        "first": int(unique[0]) if len(unique) else None,
+        "last": int(unique[-1]) if len(unique) else None,
+        "duplicates": int(len(open_time) - len(unique)),
+        "out_of_order": out_of_order,
+        "misaligned": int(np.count_nonzero(unique % interval_ms)),
+        "gaps": gaps,
+        "missing": int(sum((end - start) // interval_ms for start, end in gaps)),
+    }
+
+
+def is_stale(last_open_ms, interval_ms, now_ms):
+    """
+    True si la dernière bougie est plus ancienne que la bougie précédant celle en cours.
+    """
+    return last_open_ms is None or now_ms - last_open_ms >= 2 * interval_ms
+
+
+def partition_quality(received, stored, interval_ms, day_start, now_ms, previous=None):
+    """
+    Rapport d'une partition après une écriture.
+
+    Args:
+        received (np.ndarray): temps d'ouverture du lot reçu pour ce jour (avant tri et dédoublonnage).
+        stored (np.ndarray): temps d'ouverture de la partition écrite (triés, uniques).
+        interval_ms (int): durée d'une bougie en ms.
+        day_start (int): début du jour UTC en ms.
+        now_ms (int): heure courante en ms (la fin du jour en cours n'est pas un trou).
+        previous (dict, optional): rapport précédent (compteurs cumulés, trous non récupérables).
+
+    Returns:
+        dict: rapport à écrire dans quality.json.
+    """
+    day_end = day_start + 24 * 60 * 60 * 1000
+    quality = validate(stored, interval_ms, start_ms=day_start, end_ms=day_end if day_end <= now_ms else None)
+    batch = validate(received, interval_ms)
+    previous = previous or {}
+    quality["duplicates"] = previous.get("duplicates", 0) + batch["duplicates"]
+    quality["out_of_order"] = previous.get("out_of_order", 0) + batch["out_of_order"]
+    # Trous non récupérables encore présents (une bougie a pu arriver depuis)
+    gaps = {tuple(gap) for gap in quality["gaps"]}
+    quality["unfillable"] = [gap for gap in previous.get("unfillable", []) if tuple(gap) in gaps]
+    quality["checked_at"] = int(now_ms)
+    return quality
+
+
+def read_quality(path):
+    """
+    Rapport d'une partition (répertoire), ou None s'il n'a pas encore été calculé.
+    """
+    file = os.path.join(path, QUALITY_FILE)
+    if not os.path.exists(file):
+        return None
+    with open(file) as f:
+        return json.load(f)
+
+
+def write_quality(path, quality):
+    # Temporaire puis renommage, comme les colonnes de la partition
+    file = os.path.join(path, QUALITY_FILE)
+    tmp = f"{file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(quality, f)
+    os.replace(tmp, file)
+
+
+def summarize(reports):
+    """
+    Agrège des rapports de partitions (ou de fenêtres).
+
+    Returns:
+        dict: rows, missing, gaps et unfillable (nombres de trous), duplicates, out_of_order, misaligned, last.
+    """
+    reports = [report for report in reports if report]
+    lasts = [report["last"] for report in reports if report.get("last") is not None]
+    return {
+        "rows": sum(report["rows"] for report in reports),
+        "missing": sum(report["missing"] for report in reports),
+        "gaps": sum(len(report["gaps"]) for report in reports),
+        "unfillable": sum(len(report.get("unfillable", [])) for report in reports),
+        "duplicates": sum(report["duplicates"] for report in reports),
+        "out_of_order": sum(report["out_of_order"] for report in reports),
+        "misaligned": sum(report["misaligned"] for report in reports),
+        "last": max(lasts) if lasts else None,
+    }
@@ -1,56 +1,156 @@
 import json
 from datetime import datetime
-from get_daily_prices import get_daily_prices  # Import de la fonction qui récupère et sauvegarde les prix
 
-# Définir le nom du fichier JSON basé sur la date du jour au moment du lancement du script
-today = datetime.now().strftime("%Y-%m-%d")
-HISTORIC_JSON_FILE = f"prices_history/{today}.json"
+import requests
 
-def load_data_from_json(filename=HISTORIC_JSON_FILE):
+from get_daily_prices import update_daily_prices  # Import de la fonction qui récupère et sauvegarde les prix
+import data_quality
+import kline_store
+from kline_cache import KlineCache, interval_to_seconds
+
+def historic_json_file(day=None):
+    """
+    Chemin de l'ancien fichier JSON d'un jour (par défaut aujourd'hui, évalué à chaque appel :
+    un serveur lancé la veille lit bien le fichier du jour après minuit).
+
+    Args:
+        day (str, optional): jour au format YYYY-MM-DD.
+
+    Returns:
+        str: chemin prices_history/<jour>.json
+    """
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    return f"prices_history/{day}.json"
+
+# Cache partagé entre toutes les sessions : évite un appel Binance à chaque mouvement de slider
+kline_cache = KlineCache(interval="1m")
+
+# Tampons alimentés par le flux temps réel, par (symbole, intervalle) (voir start_live_feed)
+live_buffers = {}
+
+def start_live_feed(symbol="ETHUSDC", interval="1m", lookback=1440, **ingestor_options):
+    """
+    Démarre l'ingestion WebSocket en tâche de fond ; load_klines lira ensuite le tampon temps réel.
+
+    Le tampon est d'abord rempli avec l'historique stocké, puis l'ingesteur comble par REST
+    l'écart jusqu'à maintenant avant de suivre le flux.
+
+    Args:
+        symbol (str): symbole du marché (ex: "ETHUSDC").
+        interval (str): intervalle des bougies (ex: "1m").
+        lookback (int): capacité du tampon (nombre de bougies).
+        **ingestor_options: options de KlineStreamIngestor (ws_url, rest_url, persist...).
+
+    Returns:
+        KlineStreamIngestor: l'ingesteur démarré.
+    """
+    # Imports locaux : websockets et les tampons ne sont chargés que si le flux est activé (LIVE_FEED)
+    from live_feed import KlineStreamIngestor
+    from ring_buffer import CandleRingBuffer
+
+    buffer = CandleRingBuffer(lookback)
+    buffer.extend(kline_store.load_latest(symbol, interval, lookback))
+    live_buffers[(symbol, interval)] = buffer
+    return KlineStreamIngestor(symbol, interval, buffer, **ingestor_options).start_in_thread()
+
+
+def attach_shared_feed(symbol="ETHUSDC", interval="1m", timeout=30.0):
     """
-    Charge les données des prix depuis un fichier JSON. 
-    
-    Avant de charger, lance la récupération et sauvegarde des données actuelles via l'API Binance.
+    Lit les bougies dans le tampon en mémoire partagée publié par ingestor.py (déploiement
+    multi-processus) : load_klines ne fait plus aucun appel Binance ni écriture du stockage.
 
     Args:
-        filename (str): Chemin du fichier JSON contenant les données.
+        symbol (str): symbole du marché (ex: "ETHUSDC").
+        interval (str): intervalle des bougies (ex: "1m").
+        timeout (float): attente maximale du démarrage de l'ingesteur (secondes).
+
+    Returns:
+        SharedCandleRingBuffer: le tampon attaché.
+    """
+    from shared_buffer import SharedCandleRingBuffer, shared_buffer_name  # Import local : SHARED_FEED seulement
+
+    buffer = SharedCandleRingBuffer.attach(shared_buffer_name(symbol, interval), timeout=timeout)
+    live_buffers[(symbol, interval)] = buffer
+    return buffer
+
+
+def fetch_and_repair(symbol="ETHUSDC", interval="1m", lookback=1440, repair=True):
+    """
+    Récupération incrémentale (update_daily_prices) puis, si la fenêtre a des minutes manquantes,
+    nouvelle demande des seules plages manquantes (voir backfill.repair_gaps et data_quality.py).
+
+    Returns:
+        Candles: les `lookback` dernières bougies.
+    """
+    candles = update_daily_prices(symbol=symbol, interval=interval, lookback=lookback)
+    interval_ms = interval_to_seconds(interval) * 1000
+    if repair and len(candles) and data_quality.validate(candles.open_time, interval_ms)["missing"]:
+        from backfill import repair_gaps  # Import local : backfill -> history_index -> data_utils
+
+        try:
+            stats = repair_gaps(symbol, interval, start=int(candles.open_time[0]), end=int(candles.open_time[-1]))
+        except requests.RequestException as exc:  # Les bougies déjà stockées restent affichables
+            print(f"Réparation des trous en échec ({exc!r})")
+        else:
+            if stats["candles"]:
+                candles = kline_store.load_latest(symbol, interval, lookback)
+    return candles
+
+
+def load_klines(symbol="ETHUSDC", interval="1m", lookback=1440, force_refresh=False):
+    """
+    Charge les dernières bougies depuis le stockage colonnaire (voir kline_store.py).
+
+    Si le flux temps réel est actif pour ce symbole, les bougies viennent directement de son tampon.
+    Sinon, la récupération incrémentale via l'API Binance n'est lancée que si le cache en mémoire a expiré
+    (clôture de la bougie en cours) ou si `force_refresh` est vrai (bouton "Recharger") ; les trous
+    de la fenêtre sont alors redemandés (voir fetch_and_repair).
+
+    Args:
+        symbol (str): symbole du marché (ex: "ETHUSDC").
+        interval (str): intervalle des bougies (ex: "1m").
+        lookback (int): nombre de bougies chargées.
+        force_refresh (bool): Force la récupération des données même si le cache est valide.
+
+    Returns:
+        Candles: bougies OHLCV (voir candles.py).
+    """
+    buffer = live_buffers.get((symbol, interval))
+    if buffer is not None and len(buffer) and lookback <= buffer.capacity:
+        return buffer.snapshot()[-lookback:]
+
+    return kline_cache.get(
+        (symbol, interval, lookback),
+        lambda: fetch_and_repair(symbol=symbol, interval=interval, lookback=lookback),
+        force=force_refresh,
+    )
+
+
+def load_data_from_json(filename=None):
+    """
+    Charge un ancien fichier de prix JSON (liste de {"time": str ISO, "price": float}).
+    Ce format n'est plus écrit : voir migrate_prices_history.py pour le convertir.
+
+    Args:
+        filename (str, optional): Chemin du fichier JSON (par défaut celui du jour, voir historic_json_file).
 
     Returns:
         list of dict: Liste de dictionnaires {"time": str ISO, "price": float} extraites du fichier JSON.
     """
-    # Mise à jour des données du jour dans le fichier JSON
-    get_daily_prices(symbol="ETHUSDC", interval="1m", limit=1440)
-    
-    # Ouvre et charge le fichier JSON avec les prix enregistrés
-    with open(filename, "r") as f:
+    with open(filename or historic_json_file(), "r") as f:
         return json.load(f)
 
 
 def process_klines_data(klines):
     """
-    Transforme la liste de données brutes (dictionnaires {"time", "price"}) en listes séparées.
+    Extrait les tableaux temps / prix de clôture d'une série de bougies, sans boucle Python.
 
     Args:
-        klines (list of dict): Liste d'éléments contenant "time" en ISO string et "price" float.
+        klines (Candles): bougies OHLCV.
 
     Returns:
         tuple: (times, prices)
-            times (list of datetime): liste des timestamps convertis en datetime objets.
-            prices (list of float): liste des prix correspondants.
-    """
-    times = []
-    prices = []
-    for k in klines:
-        # Convertir la chaîne ISO en datetime
-        dt = datetime.fromisoformat(k["time"])
-        # Convertir le prix en float (au cas où)
-        price = float(k["price"])
-        times.append(dt)
-        prices.append(price)
-    return times, prices
-
-
-# Ancienne version sans récupération automatique, conservée en commentaire au cas où
-# def load_data_from_json(filename=HISTORIC_JSON_FILE):
-#     with open(filename, "r") as f:
-#         return json.load(f)
+            times (np.ndarray): temps d'ouverture en datetime64[ms] (UTC).
+            prices (np.ndarray): prix de clôture correspondants (float64).
+    """
+    return klines.times, klines.close
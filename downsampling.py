@@ -0,0 +1,195 @@
+"""
+Réduction du nombre de points envoyés au navigateur (niveau de détail des graphiques).
+
+Quelle que soit la longueur de l'historique, un graphique n'affiche qu'environ un point par pixel :
+les séries sont réduites à un budget de points avant d'être placées dans une figure Plotly.
+    - "minmax" : minimum et maximum de chaque classe, entièrement vectorisé ; conserve les
+                 extrêmes, donc les niveaux de support / résistance visibles à l'œil
+    - "lttb"   : Largest-Triangle-Three-Buckets (Steinarsson, 2013), un point par classe choisi
+                 pour préserver la forme de la courbe
+    - chandeliers : regroupement des bougies par classes (ouverture, plus haut, plus bas, clôture, volume)
+"""
+import numpy as np
+
+
+def bucket_edges(n, n_buckets):
+    """
+    Bornes de `n_buckets` classes contiguës et de tailles (presque) égales couvrant n points.
+    """
+    return np.linspace(0, n, n_buckets + 1).astype(np.int64)
+
+
+def minmax_indices(y, n_out):
+    """
+    Indices du minimum et du maximum de chaque classe, soit au plus n_out points.
+
+    Args:
+        y (np.ndarray): valeurs (les NaN sont ignorés).
+        n_out (int): nombre maximal de points conservés.
+
+    Returns:
+        np.ndarray: indices triés des points conservés.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    n_buckets = n_out // 2
+    if n <= n_out or n_buckets < 1:
+        return np.arange(n)
+
+    # Classes de même taille : tableau (classes x taille) complété par NaN
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, size)
+    valid = ~np.isnan(padded).all(axis=1)
+    filled_low = np.where(np.isnan(padded), np.inf, padded)
+    filled_high = np.where(np.isnan(padded), -np.inf, padded)
+
+    offsets = np.arange(n_buckets) * size
+    lows = (offsets + filled_low.argmin(axis=1))[valid]
+    highs = (offsets + filled_high.argmax(axis=1))[valid]
+    return np.unique(np.concatenate((lows, highs, [0, n - 1])))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices retenus par l'algorithme Largest-Triangle-Three-Buckets.
+
+    Le premier et le dernier point sont conservés ; dans chaque classe intermédiaire, on garde le
+    point formant le plus grand triangle avec le point retenu précédemment et la moyenne de la
+    classe suivante. La boucle porte sur les classes (n_out), chaque classe est traitée en NumPy.
+
+    Args:
+        x (np.ndarray): abscisses croissantes (ex: open_time en ms).
+        y (np.ndarray): valeurs.
+        n_out (int): nombre de points conservés (au moins 3).
+
+    Returns:
+        np.ndarray: indices triés des points conservés.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # Classes intermédiaires sur les points 1 .. n-2
+    edges = 1 + bucket_edges(n - 2, n_out - 2)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(np.nan_to_num(y[1:-1]), edges[:-1] - 1) / counts
+    # La « classe suivante » de la dernière classe intermédiaire est le dernier point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        ax, ay = x[previous], y[previous]
+        area = np.abs((ax - next_x[i]) * (y[start:stop] - ay) - (ax - x[start:stop]) * (next_y[i] - ay))
+        previous = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample_indices(x, y, n_out, method="minmax"):
+    """
+    Indices conservés pour afficher la série (x, y) avec au plus n_out points.
+
+    Args:
+        x (np.ndarray): abscisses croissantes.
+        y (np.ndarray): valeurs.
+        n_out (int): budget de points.
+        method (str): "minmax" ou "lttb".
+
+    Returns:
+        np.ndarray: indices triés.
+    """
+    if method == "lttb":
+        return lttb_indices(x, y, n_out)
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    raise ValueError(f"Méthode de réduction inconnue : {method}")
+
+
+def aggregate_ohlcv(df, n_out):
+    """
+    Regroupe des bougies consécutives pour n'en garder qu'au plus n_out.
+
+    Chaque classe devient une bougie : temps et ouverture de la première, plus haut et plus bas
+    de la classe, clôture de la dernière, volume cumulé.
+
+    Args:
+        df (pd.DataFrame): colonnes "time", "open", "high", "low", "close", "volume".
+        n_out (int): nombre maximal de bougies.
+
+    Returns:
+        pd.DataFrame: bougies regroupées (mêmes colonnes que `df` ; les autres prennent la valeur
+        de la dernière bougie de chaque classe).
+    """
+    n = len(df)
+    if n <= n_out or n_out < 1:
+        return df
+
+    starts = np.unique(bucket_edges(n, n_out)[:-1])
+    ends = np.append(starts[1:], n) - 1
+    grouped = df.iloc[ends].copy()
+    grouped["time"] = df["time"].to_numpy()[starts]
+    grouped["open"] = df["open"].to_numpy()[starts]
+    grouped["high"] = np.fmax.reduceat(df["high"].to_numpy(), starts)
+    grouped["low"] = np.fmin.reduceat(df["low"].to_numpy(), starts)
+    grouped["volume"] = np.add.reduceat(np.nan_to_num(df["volume"].to_numpy()), starts)
+    return grouped.reset_index(drop=True)
+
+
+def visible_rows(times, x_range, margin=0.5):
+    """
+    Tranche de lignes couvrant la plage visible, élargie de `margin` fois sa largeur de chaque côté
+    (un léger déplacement reste ainsi détaillé en attendant le prochain ré-échantillonnage).
+
+    Args:
+        times (array-like): temps croissants (datetime64).
+        x_range (tuple or None): (début, fin) visibles, ou None pour toute la série.
+        margin (float): marge relative ajoutée de chaque côté.
+
+    Returns:
+        slice: lignes à ré-échantillonner.
+    """
+    if x_range is None:
+        return slice(None)
+    import pandas as pd  # Import différé (démarrage rapide, voir candles.Candles.to_frame)
+
+    start, end = pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1])
+    extra = (end - start) * margin
+    times = np.asarray(times, dtype="datetime64[ms]")
+    lo = np.searchsorted(times, np.datetime64(start - extra, "ms"), side="left")
+    hi = np.searchsorted(times, np.datetime64(end + extra, "ms"), side="right")
+    # Un point de part et d'autre pour que la courbe rejoigne les bords du graphique
+    return slice(max(lo - 1, 0), hi + 1)
+
+
+def downsample_frame(df, columns, n_out, method="minmax"):
+    """
+    Réduit un DataFrame de séries à tracer (courbes partageant la colonne "time").
+
+    Les indices retenus pour chaque colonne sont réunis : toutes les courbes gardent leurs
+    extrêmes et restent alignées sur les mêmes temps.
+
+    Args:
+        df (pd.DataFrame): données à réduire, avec une colonne "time".
+        columns (list of str): colonnes tracées.
+        n_out (int): budget de points par colonne.
+        method (str): "minmax" ou "lttb".
+
+    Returns:
+        pd.DataFrame: lignes conservées.
+    """
+    if len(df) <= n_out:
+        return df
+    x = df["time"].to_numpy().astype("datetime64[ms]").astype(np.int64)
+    rows = np.unique(np.concatenate([
+        downsample_indices(x, df[column].to_numpy(), n_out, method) for column in columns
+    ]))
+    return df.iloc[rows].reset_index(drop=True)
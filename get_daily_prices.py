@@ -1,9 +1,80 @@
+import os
+import time
+
 import requests  # Pour faire des requêtes HTTP vers l'API Binance
-from datetime import datetime
-import json
-import os  # Pour gérer la création de dossiers
+import kline_store
+from candles import Candles
+from kline_cache import interval_to_seconds
+from metrics import span
+
+# URL de base de l'API Binance (remplaçable par un serveur local de test, voir mock_binance.py)
+BINANCE_API_URL = os.environ.get("BINANCE_API_URL", "https://api.binance.com")
+
+def fetch_klines(symbol="ETHUSDC", interval="1m", limit=1000, start_time=None, end_time=None,
+                 base_url=BINANCE_API_URL, session=None):
+    """
+    Interroge l'endpoint /api/v3/klines de Binance et retourne les bougies brutes.
+
+    Args:
+        symbol (str): Le symbole du marché à interroger (ex: "ETHUSDC").
+        interval (str): Intervalle de temps des bougies (ex: "1m").
+        limit (int): Nombre maximum de bougies à récupérer.
+        start_time (int, optional): Temps d'ouverture minimal en millisecondes (paramètre startTime).
+        end_time (int, optional): Temps d'ouverture maximal en millisecondes (paramètre endTime).
+        base_url (str): URL de base de l'API.
+        session (requests.Session, optional): session HTTP réutilisant ses connexions (voir batch_fetcher.py).
+
+    Returns:
+        list of list: bougies brutes [open_time, open, high, low, close, volume, ...].
+    """
+    params = {"symbol": symbol, "interval": interval, "limit": limit}
+    if start_time is not None:
+        params["startTime"] = int(start_time)
+    if end_time is not None:
+        params["endTime"] = int(end_time)
+
+    with span("binance.request"):
+        response = (session or requests).get(f"{base_url}/api/v3/klines", params=params, timeout=10)
+    response.raise_for_status()  # S'assurer que la requête a réussi (lève une erreur sinon)
+    with span("binance.decode"):
+        return response.json()
+
+
+def fetch_klines_range(symbol, interval, start_ms, end_ms=None, base_url=BINANCE_API_URL):
+    """
+    Récupère les bougies dont le temps d'ouverture est dans [start_ms, end_ms[, par pages de
+    PAGE_LIMIT bougies (Binance en renvoie au plus 1000 par requête).
+
+    Args:
+        symbol (str): Le symbole du marché à interroger (ex: "ETHUSDC").
+        interval (str): Intervalle de temps des bougies (ex: "1m").
+        start_ms (int): premier temps d'ouverture demandé (ms).
+        end_ms (int, optional): fin de la plage, exclue (par défaut jusqu'à la bougie en cours).
+        base_url (str): URL de base de l'API.
+
+    Returns:
+        Candles: bougies OHLCV récupérées.
+    """
+    from batch_fetcher import PAGE_LIMIT, pages  # batch_fetcher importe ce module
 
-def get_daily_prices(symbol="ETHUSDC", interval="1m", limit=1440):
+    interval_ms = interval_to_seconds(interval) * 1000
+    end_ms = int(time.time() * 1000) + 1 if end_ms is None else end_ms
+    raw = []
+    for page_start, page_end in pages(int(start_ms), end_ms, interval_ms):
+        raw.extend(fetch_klines(symbol=symbol, interval=interval, limit=PAGE_LIMIT, start_time=page_start,
+                                end_time=page_end, base_url=base_url))
+    return Candles.from_binance(raw)
+
+
+def _window_start(interval, count):
+    # Temps d'ouverture de la plus ancienne des `count` dernières bougies (bougie en cours comprise)
+    interval_ms = interval_to_seconds(interval) * 1000
+    now_ms = int(time.time() * 1000)
+    return now_ms - now_ms % interval_ms - (count - 1) * interval_ms
+
+
+def get_daily_prices(symbol="ETHUSDC", interval="1m", limit=1440, base_url=BINANCE_API_URL,
+                     root=kline_store.STORE_ROOT):
     """
     Récupère les prix historiques d'une crypto depuis Binance pour une journée complète en intervalles de 1 minute.
 
@@ -11,51 +82,59 @@ def get_daily_prices(symbol="ETHUSDC", interval="1m", limit=1440):
         symbol (str): Le symbole du marché à interroger (ex: "ETHUSDC").
         interval (str): Intervalle de temps des bougies (ex: "1m").
         limit (int): Nombre de bougies à récupérer (max 1440 = 1 jour en 1 minute).
+        base_url (str): URL de base de l'API.
+        root (str): racine du stockage colonnaire.
 
     Returns:
-        list of dict: Liste de dictionnaires avec 'time' (ISO string) et 'price' (float).
-    """
-    
-    # Construire l'URL pour la requête API Binance avec les paramètres donnés
-    url = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}"
-    
-    # Envoyer la requête GET
-    response = requests.get(url)
-    response.raise_for_status()  # S'assurer que la requête a réussi (lève une erreur sinon)
-    
-    data = response.json()  # Récupérer la réponse au format JSON (liste de bougies)
-
-    prices = []
-    for candle in data:
-        # candle est une liste avec plusieurs infos : [open_time, open, high, low, close, volume, ...]
-        timestamp_ms = candle[0]  # Temps d'ouverture en millisecondes depuis epoch
-        close_price_str = candle[4]  # Prix de clôture en string
-        
-        # Convertir timestamp en objet datetime
-        timestamp = datetime.fromtimestamp(timestamp_ms / 1000)
-        
-        # Convertir le prix de clôture en float
-        close_price = float(close_price_str)
-        
-        # Construire un dictionnaire simplifié avec heure ISO et prix
-        prices.append({
-            "time": timestamp.isoformat(),
-            "price": close_price
-        })
-
-    # Créer le dossier 'prices_history' si il n'existe pas déjà (pour stocker les fichiers JSON)
-    os.makedirs("prices_history", exist_ok=True)
-
-    # Nommer le fichier selon la date du jour (ex: 2025-07-24.json)
-    today = datetime.now().strftime("%Y-%m-%d")
-    filename = os.path.join("prices_history", f"{today}.json")
-
-    # Sauvegarder les prix dans ce fichier JSON, formaté pour être lisible
-    with open(filename, "w") as f:
-        json.dump(prices, f, indent=4)
-
-    # Retourner la liste des prix pour un usage ultérieur dans le programme
-    return prices
+        Candles: bougies OHLCV récupérées (tous les champs Binance).
+    """
+    candles = fetch_klines_range(symbol, interval, _window_start(interval, limit), base_url=base_url)
+
+    # Sauvegarder les bougies dans leurs partitions journalières (prices_history/<symbole>/<intervalle>/<jour>/)
+    kline_store.append_klines(symbol, interval, candles, root)
+
+    # Retourner les bougies pour un usage ultérieur dans le programme
+    return candles
+
+
+def update_daily_prices(symbol="ETHUSDC", interval="1m", lookback=1440, base_url=BINANCE_API_URL,
+                        root=kline_store.STORE_ROOT):
+    """
+    Mise à jour incrémentale du stockage des prix.
+
+    Au lieu de re-télécharger toute la journée, on repart du temps d'ouverture de la dernière
+    bougie enregistrée et on ne demande que les bougies à partir de celle-ci (paramètre startTime).
+    La dernière bougie stockée est redemandée car elle était probablement encore en cours lors
+    de l'appel précédent : son prix de clôture est ainsi corrigé. Une requête renvoie donc
+    en général une ou deux bougies au lieu de 1440.
+
+    Si le stockage est vide, ou si la dernière bougie est plus ancienne que la fenêtre `lookback`,
+    on retombe sur une récupération complète de la fenêtre.
+
+    Args:
+        symbol (str): Le symbole du marché à interroger (ex: "ETHUSDC").
+        interval (str): Intervalle de temps des bougies (ex: "1m").
+        lookback (int): Nombre de bougies de la fenêtre glissante retournée.
+        base_url (str): URL de base de l'API.
+        root (str): racine du stockage colonnaire.
+
+    Returns:
+        Candles: les `lookback` dernières bougies OHLCV.
+    """
+    last_open_ms = kline_store.last_open_time(symbol, interval, root)
+    window_ms = lookback * interval_to_seconds(interval) * 1000
+
+    # Demande par pages : un stockage vide ou un trou de plus de 1000 bougies est comblé en entier
+    if last_open_ms is None or time.time() * 1000 - last_open_ms > window_ms:
+        new_candles = fetch_klines_range(symbol, interval, _window_start(interval, lookback), base_url=base_url)
+    else:
+        new_candles = fetch_klines_range(symbol, interval, last_open_ms, base_url=base_url)
+
+    # Les bougies déjà stockées (même open_time) sont remplacées par leur version à jour
+    kline_store.append_klines(symbol, interval, new_candles, root)
+
+    # Ne retourner que la fenêtre glissante configurée
+    return kline_store.load_latest(symbol, interval, lookback, root)
 
 # Note : l'appel direct à la fonction est commenté pour éviter un appel automatique à l'import
 # get_daily_prices(symbol="ETHUSDC", interval="1m", limit=1440)
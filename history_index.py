@@ -0,0 +1,158 @@
+"""
+Index de l'historique stocké dans prices_history/ et requêtes par plage de dates.
+
+L'historique peut mêler deux formats :
+    - les partitions journalières du stockage colonnaire (voir kline_store.py), une par jour UTC ;
+    - les anciens fichiers <YYYY-MM-DD>.json pas encore migrés (voir migrate_prices_history.py),
+      qui couvrent chacun les 24 heures précédant leur écriture et se recouvrent donc fortement.
+
+load_range(symbole, début, fin) ne lit que les fichiers qui recoupent la plage demandée,
+les assemble, supprime les doublons (la version la plus complète d'une bougie l'emporte) et
+garde en mémoire les dernières partitions décodées.
+"""
+import glob
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import kline_store
+from candles import Candles
+from migrate_prices_history import json_to_candles
+from data_utils import load_data_from_json
+
+DAY_MS = kline_store.DAY_MS
+
+# Les anciens fichiers JSON ne contenaient que les prix ETHUSDC en 1m
+LEGACY_SYMBOL = "ETHUSDC"
+LEGACY_INTERVAL = "1m"
+
+
+def to_ms(value):
+    """
+    Convertit une borne de plage en millisecondes depuis epoch (UTC).
+
+    Args:
+        value (int, str, datetime or np.datetime64): ms depuis epoch, ou date / heure
+            (ex: "2025-07-23", "2025-07-23T12:00").
+
+    Returns:
+        int: millisecondes depuis epoch.
+    """
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(np.datetime64(value, "ms").astype(np.int64))
+
+
+class HistoryIndex:
+    """
+    Index des fichiers d'historique d'une racine, avec cache LRU des partitions décodées.
+
+    Les entrées du cache sont indexées par la date de modification du fichier : une partition
+    réécrite (nouvelles bougies, rattrapage) est relue automatiquement.
+
+    Args:
+        root (str): racine du stockage (prices_history/).
+        cache_size (int): nombre de partitions décodées gardées en mémoire.
+    """
+
+    def __init__(self, root=kline_store.STORE_ROOT, cache_size=32):
+        self.root = root
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def partitions(self, symbol, interval, start_ms, end_ms):
+        """
+        Fichiers recoupant [start_ms, end_ms[, du plus ancien au plus récent format.
+
+        Returns:
+            list of tuple: (type, chemin, jour) avec type "legacy" (JSON) ou "columnar".
+        """
+        first_day = kline_store.day_of(start_ms)
+        last_day = kline_store.day_of(end_ms - 1)
+        found = []
+
+        if symbol == LEGACY_SYMBOL and interval == LEGACY_INTERVAL:
+            for path in sorted(glob.glob(os.path.join(self.root, "*.json"))):
+                day = os.path.basename(path)[:-len(".json")]
+                try:
+                    file_ms = to_ms(day)
+                except ValueError:
+                    continue
+                # Fichier du jour J : 24 h avant son écriture, en heure locale -> [J-1, J+1] UTC avec marge
+                if file_ms - 2 * DAY_MS < end_ms and start_ms < file_ms + 2 * DAY_MS:
+                    found.append(("legacy", path, day))
+
+        for day in kline_store.list_partitions(symbol, interval, self.root):
+            if first_day <= day <= last_day:
+                path = os.path.join(kline_store.partition_dir(symbol, interval, day, self.root), "open_time.npy")
+                found.append(("columnar", path, day))
+        return found
+
+    def _read(self, kind, path, symbol, interval, day):
+        key = (kind, path)
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == mtime:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        if kind == "legacy":
+            candles = kline_store.dedupe_sorted(json_to_candles(load_data_from_json(path)))
+        else:
+            candles = kline_store.read_partition(symbol, interval, day, self.root)
+
+        with self._lock:
+            self._cache[key] = (mtime, candles)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return candles
+
+    def load_range(self, symbol, start, end, interval="1m"):
+        """
+        Charge les bougies dont le temps d'ouverture est dans [start, end[.
+
+        Args:
+            symbol (str): symbole (ex: "ETHUSDC").
+            start: début de la plage (voir to_ms).
+            end: fin de la plage, exclue (voir to_ms).
+            interval (str): intervalle des bougies.
+
+        Returns:
+            Candles: bougies triées, une par temps d'ouverture.
+        """
+        start_ms, end_ms = to_ms(start), to_ms(end)
+        if end_ms <= start_ms:
+            return Candles.empty()
+
+        parts = []
+        for kind, path, day in self.partitions(symbol, interval, start_ms, end_ms):
+            candles = self._read(kind, path, symbol, interval, day)
+            lo, hi = np.searchsorted(candles.open_time, [start_ms, end_ms])
+            if hi > lo:
+                parts.append(candles[lo:hi])
+        if not parts:
+            return Candles.empty()
+        # Les partitions colonnaires (OHLCV complet) viennent après les anciens fichiers :
+        # en cas de doublon, dedupe_sorted garde leur version
+        return kline_store.dedupe_sorted(Candles.concat(parts))
+
+
+# Index partagé par le tableau de bord
+history_index = HistoryIndex()
+
+
+def load_range(symbol, start, end, interval="1m", root=kline_store.STORE_ROOT):
+    """
+    Charge les bougies d'une plage de dates (voir HistoryIndex.load_range).
+    """
+    index = history_index if root == history_index.root else HistoryIndex(root)
+    return index.load_range(symbol, start, end, interval)
@@ -0,0 +1,570 @@
+"""
+Registre des indicateurs techniques : RSI, bandes de Bollinger, ATR, VWAP, stochastique, OBV (et MACD).
+
+Chaque indicateur a deux formes :
+    - un noyau vectorisé, qui calcule toute la série d'un coup à partir d'un IndicatorContext ;
+    - un état incrémental (update / peek, comme analysis_tools.MACDState) pour un flux de bougies.
+Alimentées avec les mêmes bougies, les deux formes donnent les mêmes valeurs (aux arrondis près
+pour les sommes glissantes de l'état incrémental).
+
+Les calculs intermédiaires (EMA, moyennes et écarts-types glissants, extrêmes glissants, true range...)
+passent par l'IndicatorContext des bougies, qui les mémorise par (opération, source, paramètres) :
+la variation des clôtures sert au RSI comme à l'OBV, les typical price / true range ne sont calculés
+qu'une fois, et deux panneaux qui demandent la même EMA ou la même fenêtre glissante la partagent.
+"""
+import threading
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from analysis_tools import MACDState, _ewm_step
+from kline_store import DAY_MS
+
+# Registre : nom -> Indicator
+INDICATORS = {}
+
+# Sources dérivées des colonnes de bougies : nom -> fonction(context) -> np.ndarray
+SOURCES = {}
+
+
+class Indicator:
+    """
+    Description d'un indicateur enregistré.
+
+    Attributes:
+        name (str): identifiant (ex: "rsi").
+        label (str): libellé affiché.
+        outputs (tuple of str): noms des séries produites, dans l'ordre des valeurs de l'état.
+        defaults (dict): paramètres par défaut.
+        kernel (callable): fonction(context, **params) -> {sortie: np.ndarray}.
+        state (type): classe de l'état incrémental, construite avec **params.
+        overlay (bool): séries exprimées en prix (tracées avec la clôture).
+    """
+
+    def __init__(self, name, label, outputs, defaults, kernel, state, overlay=False):
+        self.name = name
+        self.label = label
+        self.outputs = tuple(outputs)
+        self.defaults = dict(defaults)
+        self.kernel = kernel
+        self.state = state
+        self.overlay = overlay
+
+    def __repr__(self):
+        return f"Indicator({self.name!r})"
+
+
+def register_indicator(name, label, outputs, state, overlay=False, **defaults):
+    """
+    Décorateur enregistrant un noyau vectorisé et son état incrémental sous le nom `name`.
+
+    Le noyau décoré reçoit (context, **params) et retourne {sortie: np.ndarray}.
+    """
+    def decorator(kernel):
+        INDICATORS[name] = Indicator(name, label, outputs, defaults, kernel, state, overlay)
+        return kernel
+    return decorator
+
+
+def register_source(name):
+    """
+    Décorateur enregistrant une série dérivée des bougies (ex: "true_range"), calculée une fois par contexte.
+    """
+    def decorator(func):
+        SOURCES[name] = func
+        return func
+    return decorator
+
+
+def _rolling_window(values, window):
+    # Fenêtres glissantes complètes (vue sans copie), alignées sur leur dernière bougie
+    return sliding_window_view(values, window) if len(values) >= window else np.empty((0, window))
+
+
+def _pad(values, n):
+    # Complète le début d'une série glissante avec NaN (fenêtres incomplètes)
+    return np.concatenate((np.full(n - len(values), np.nan), values))
+
+
+class IndicatorContext:
+    """
+    Calculs d'indicateurs sur une série de bougies, avec mémorisation des intermédiaires.
+
+    Les primitives (ema, rma, sma, rolling_std, rolling_max, rolling_min) prennent le nom d'une
+    colonne de bougies ("close", "high", "volume"...) ou d'une source dérivée de SOURCES ; chaque
+    résultat est calculé une seule fois par contexte, quel que soit l'indicateur qui le demande.
+
+    Args:
+        candles (Candles): bougies triées par open_time.
+    """
+
+    def __init__(self, candles):
+        self.candles = candles
+        self.computed = 0  # Intermédiaires réellement calculés (le reste vient du cache)
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    def _memo(self, key, compute):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+                self.computed += 1
+            return self._cache[key]
+
+    def source(self, name):
+        """
+        Colonne de bougies ou source dérivée, en float64.
+        """
+        if name in SOURCES:
+            return self._memo(("source", name), lambda: SOURCES[name](self))
+        return self._memo(("column", name), lambda: np.asarray(getattr(self.candles, name), dtype=np.float64))
+
+    def ema(self, source, span=None, alpha=None):
+        """
+        Moyenne mobile exponentielle (pandas ewm adjust=False, comme calculate_macd).
+        """
+        import pandas as pd  # Import différé (démarrage rapide, voir candles.Candles.to_frame)
+
+        alpha = alpha if alpha is not None else 2. / (span + 1.)
+        return self._memo(("ema", source, alpha), lambda: pd.Series(self.source(source)).ewm(
+            alpha=alpha, adjust=False).mean().to_numpy())
+
+    def rma(self, source, period):
+        """
+        Moyenne lissée de Wilder (EMA de facteur 1 / period), utilisée par le RSI et l'ATR.
+        """
+        return self.ema(source, alpha=1. / period)
+
+    def sma(self, source, window):
+        """
+        Moyenne glissante simple (NaN tant que la fenêtre est incomplète).
+        """
+        def compute():
+            values = self.source(source)
+            return _pad(_rolling_window(values, window).mean(axis=1), len(values))
+        return self._memo(("sma", source, window), compute)
+
+    def rolling_std(self, source, window):
+        """
+        Écart-type glissant (population, ddof=0).
+        """
+        def compute():
+            values = self.source(source)
+            return _pad(_rolling_window(values, window).std(axis=1), len(values))
+        return self._memo(("std", source, window), compute)
+
+    def rolling_max(self, source, window):
+        """
+        Maximum glissant.
+        """
+        def compute():
+            values = self.source(source)
+            return _pad(_rolling_window(values, window).max(axis=1), len(values))
+        return self._memo(("max", source, window), compute)
+
+    def rolling_min(self, source, window):
+        """
+        Minimum glissant.
+        """
+        def compute():
+            values = self.source(source)
+            return _pad(_rolling_window(values, window).min(axis=1), len(values))
+        return self._memo(("min", source, window), compute)
+
+    def compute(self, name, **params):
+        """
+        Séries d'un indicateur enregistré, mémorisées par paramètres.
+
+        Args:
+            name (str): nom dans INDICATORS.
+            **params: paramètres remplaçant les valeurs par défaut.
+
+        Returns:
+            dict: {sortie: np.ndarray de longueur len(candles)}.
+        """
+        try:
+            indicator = INDICATORS[name]
+        except KeyError:
+            raise ValueError(f"Indicateur inconnu : {name}")
+        params = {**indicator.defaults, **params}
+        key = ("indicator", name, tuple(sorted(params.items())))
+        return self._memo(key, lambda: indicator.kernel(self, **params))
+
+
+# --- Sources dérivées partagées ---
+
+@register_source("change")
+def _change(ctx):
+    close = ctx.source("close")
+    return np.diff(close, prepend=close[:1])  # Variation nulle sur la première bougie
+
+
+@register_source("gain")
+def _gain(ctx):
+    return np.maximum(ctx.source("change"), 0.0)
+
+
+@register_source("loss")
+def _loss(ctx):
+    return np.maximum(-ctx.source("change"), 0.0)
+
+
+@register_source("true_range")
+def _true_range(ctx):
+    high, low, close = ctx.source("high"), ctx.source("low"), ctx.source("close")
+    previous = np.concatenate((close[:1], close[:-1]))  # Première bougie : simple écart haut - bas
+    return np.maximum(high - low, np.maximum(np.abs(high - previous), np.abs(low - previous)))
+
+
+@register_source("typical_price")
+def _typical_price(ctx):
+    return (ctx.source("high") + ctx.source("low") + ctx.source("close")) / 3
+
+
+# --- États incrémentaux ---
+
+class _EMA:
+    # EMA incrémentale avec les mêmes opérations flottantes que pandas (voir analysis_tools._ewm_step)
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.value = None
+
+    def next(self, cur):
+        return _ewm_step(self.value, cur, self.alpha)
+
+
+class _Window:
+    # Fenêtre glissante des `size` dernières valeurs, avec leur somme et leur somme des carrés
+    # tenues à jour en O(1) par bougie (recalculées depuis la fenêtre toutes les `size` bougies,
+    # centrées sur une valeur récente pour limiter les erreurs d'arrondi) ; NaN comptés à part
+    __slots__ = ("values", "shift", "total", "squares", "nans", "since")
+
+    def __init__(self, size):
+        self.values = deque(maxlen=size)
+        self.shift = 0.0
+        self.total = self.squares = 0.0
+        self.nans = 0
+        self.since = 0
+
+    def ready(self):
+        # Fenêtre complète une fois la prochaine valeur ajoutée
+        return len(self.values) + 1 >= self.values.maxlen
+
+    def _with(self, cur):
+        # (n, somme, somme des carrés, NaN) de la fenêtre où `cur` remplace la plus ancienne valeur
+        total, squares, nans = self.total, self.squares, self.nans
+        changes = [(cur, 1)]
+        if len(self.values) == self.values.maxlen:
+            changes.append((self.values[0], -1))
+        for value, sign in changes:
+            if value != value:  # NaN
+                nans += sign
+            else:
+                total += sign * (value - self.shift)
+                squares += sign * (value - self.shift) ** 2
+        return min(len(self.values) + 1, self.values.maxlen), total, squares, nans
+
+    def mean(self, cur):
+        n, total, _, nans = self._with(cur)
+        return np.nan if nans else self.shift + total / n
+
+    def moments(self, cur):
+        # Moyenne et écart-type (ddof=0, comme np.std)
+        n, total, squares, nans = self._with(cur)
+        if nans:
+            return np.nan, np.nan
+        mean = total / n
+        return self.shift + mean, np.sqrt(max(squares / n - mean * mean, 0.0))
+
+    def append(self, cur):
+        _, self.total, self.squares, self.nans = self._with(cur)
+        self.values.append(cur)
+        self.since += 1
+        if self.since >= self.values.maxlen:
+            finite = [value for value in self.values if value == value]
+            self.shift = finite[-1] if finite else 0.0
+            self.total = sum(value - self.shift for value in finite)
+            self.squares = sum((value - self.shift) ** 2 for value in finite)
+            self.nans = len(self.values) - len(finite)
+            self.since = 0
+
+
+class _Extremum:
+    # Maximum (ou minimum) glissant des `size` dernières valeurs : file monotone (indice, valeur),
+    # O(1) amorti par bougie
+    __slots__ = ("size", "largest", "queue", "count")
+
+    def __init__(self, size, largest=True):
+        self.size = size
+        self.largest = largest
+        self.queue = deque()
+        self.count = 0
+
+    def _beats(self, a, b):
+        return a >= b if self.largest else a <= b
+
+    def peek(self, cur):
+        # Extrême de la fenêtre où `cur` remplace la plus ancienne valeur (None si incomplète)
+        if self.count + 1 < self.size:
+            return None
+        leaving = self.count - self.size  # Indice qui sort de la fenêtre
+        best = cur
+        for index, value in self.queue:
+            if index > leaving:
+                if self._beats(value, best):
+                    best = value
+                break
+        return best
+
+    def append(self, cur):
+        while self.queue and self._beats(cur, self.queue[-1][1]):
+            self.queue.pop()
+        self.queue.append((self.count, cur))
+        self.count += 1
+        while self.queue[0][0] <= self.count - 1 - self.size:
+            self.queue.popleft()
+
+
+class IndicatorState:
+    """
+    Base des états incrémentaux : `update` intègre une bougie clôturée, `peek` évalue une bougie
+    en cours sans modifier l'état. Les deux retournent un tuple dans l'ordre de Indicator.outputs.
+    """
+
+    def peek(self, open_time, high, low, close, volume):
+        return self._step(open_time, float(high), float(low), float(close), float(volume))[0]
+
+    def update(self, open_time, high, low, close, volume):
+        values, state = self._step(open_time, float(high), float(low), float(close), float(volume))
+        self._commit(state)
+        return values
+
+    def _step(self, open_time, high, low, close, volume):
+        raise NotImplementedError
+
+    def _commit(self, state):
+        raise NotImplementedError
+
+
+class RSIState(IndicatorState):
+    """
+    RSI de Wilder incrémental.
+    """
+
+    def __init__(self, period=14):
+        self.gain = _EMA(1. / period)
+        self.loss = _EMA(1. / period)
+        self.previous = None
+
+    def _step(self, open_time, high, low, close, volume):
+        change = close - self.previous if self.previous is not None else 0.0
+        gain, loss = self.gain.next(max(change, 0.0)), self.loss.next(max(-change, 0.0))
+        return (_rsi(gain, loss),), (gain, loss, close)
+
+    def _commit(self, state):
+        self.gain.value, self.loss.value, self.previous = state
+
+
+class BollingerState(IndicatorState):
+    """
+    Bandes de Bollinger incrémentales (fenêtre des `period` dernières clôtures).
+    """
+
+    def __init__(self, period=20, k=2.0):
+        self.window = _Window(period)
+        self.k = k
+
+    def _step(self, open_time, high, low, close, volume):
+        if not self.window.ready():
+            return (np.nan,) * 3, close
+        middle, std = self.window.moments(close)
+        return (middle, middle + self.k * std, middle - self.k * std), close
+
+    def _commit(self, close):
+        self.window.append(close)
+
+
+class ATRState(IndicatorState):
+    """
+    ATR incrémental (true range lissé par Wilder).
+    """
+
+    def __init__(self, period=14):
+        self.atr = _EMA(1. / period)
+        self.previous = None
+
+    def _step(self, open_time, high, low, close, volume):
+        previous = self.previous if self.previous is not None else close
+        true_range = max(high - low, abs(high - previous), abs(low - previous))
+        atr = self.atr.next(true_range)
+        return (atr,), (atr, close)
+
+    def _commit(self, state):
+        self.atr.value, self.previous = state
+
+
+class VWAPState(IndicatorState):
+    """
+    VWAP incrémental, remis à zéro à chaque jour UTC.
+    """
+
+    def __init__(self):
+        self.day = None
+        self.pv = 0.0
+        self.volume = 0.0
+
+    def _step(self, open_time, high, low, close, volume):
+        day = int(open_time) // DAY_MS
+        pv, total = (self.pv, self.volume) if day == self.day else (0.0, 0.0)
+        pv += (high + low + close) / 3 * volume
+        total += volume
+        vwap = pv / total if total > 0 else np.nan
+        return (vwap,), (day, pv, total)
+
+    def _commit(self, state):
+        self.day, self.pv, self.volume = state
+
+
+class StochasticState(IndicatorState):
+    """
+    Oscillateur stochastique incrémental (%K sur `k` bougies, %D moyenne de `d` valeurs de %K).
+    """
+
+    def __init__(self, k=14, d=3):
+        self.highs = _Extremum(k, largest=True)
+        self.lows = _Extremum(k, largest=False)
+        self.ks = _Window(d)
+
+    def _step(self, open_time, high, low, close, volume):
+        highest, lowest = self.highs.peek(high), self.lows.peek(low)
+        stoch_k = np.nan if highest is None else float(_stochastic(close, lowest, highest))
+        stoch_d = float(self.ks.mean(stoch_k)) if self.ks.ready() else np.nan
+        return (stoch_k, stoch_d), (high, low, stoch_k)
+
+    def _commit(self, state):
+        high, low, stoch_k = state
+        self.highs.append(high)
+        self.lows.append(low)
+        self.ks.append(stoch_k)
+
+
+class OBVState(IndicatorState):
+    """
+    On-balance volume incrémental.
+    """
+
+    def __init__(self):
+        self.obv = 0.0
+        self.previous = None
+
+    def _step(self, open_time, high, low, close, volume):
+        change = close - self.previous if self.previous is not None else 0.0
+        obv = self.obv + np.sign(change) * volume
+        return (obv,), (obv, close)
+
+    def _commit(self, state):
+        self.obv, self.previous = state
+
+
+class MACDIndicatorState(IndicatorState):
+    """
+    MACD incrémental (analysis_tools.MACDState) avec l'interface commune des indicateurs.
+    """
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.macd = MACDState(fast, slow, signal)
+
+    def peek(self, open_time, high, low, close, volume):
+        return self.macd.peek(close)
+
+    def update(self, open_time, high, low, close, volume):
+        return self.macd.update(close)
+
+
+def _rsi(gain, loss):
+    # Avec des tableaux ou des scalaires ; aucune perte -> 100, aucune variation -> NaN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + np.divide(gain, loss))
+
+
+def _stochastic(close, lowest, highest):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 * np.divide(close - lowest, highest - lowest)
+
+
+# --- Noyaux vectorisés ---
+
+@register_indicator("rsi", "RSI", ("rsi",), RSIState, period=14)
+def rsi(ctx, period):
+    return {"rsi": _rsi(ctx.rma("gain", period), ctx.rma("loss", period))}
+
+
+@register_indicator("bollinger", "Bandes de Bollinger", ("bb_middle", "bb_upper", "bb_lower"), BollingerState,
+                    overlay=True, period=20, k=2.0)
+def bollinger(ctx, period, k):
+    middle, std = ctx.sma("close", period), ctx.rolling_std("close", period)
+    return {"bb_middle": middle, "bb_upper": middle + k * std, "bb_lower": middle - k * std}
+
+
+@register_indicator("atr", "ATR", ("atr",), ATRState, period=14)
+def atr(ctx, period):
+    return {"atr": ctx.rma("true_range", period)}
+
+
+@register_indicator("vwap", "VWAP (journalier)", ("vwap",), VWAPState, overlay=True)
+def vwap(ctx):
+    open_time = ctx.candles.open_time
+    pv = np.cumsum(ctx.source("typical_price") * ctx.source("volume"))
+    volume = np.cumsum(ctx.source("volume"))
+    # Cumuls remis à zéro au début de chaque jour UTC : on retranche le cumul avant la première bougie du jour
+    day = open_time // DAY_MS
+    first = np.searchsorted(day, day)
+    pv_before = np.where(first > 0, pv[first - 1], 0.0)
+    volume_before = np.where(first > 0, volume[first - 1], 0.0)
+    day_volume = volume - volume_before
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {"vwap": np.where(day_volume > 0, (pv - pv_before) / day_volume, np.nan)}
+
+
+@register_indicator("stochastic", "Stochastique", ("stoch_k", "stoch_d"), StochasticState, k=14, d=3)
+def stochastic(ctx, k, d):
+    stoch_k = _stochastic(ctx.source("close"), ctx.rolling_min("low", k), ctx.rolling_max("high", k))
+    return {"stoch_k": stoch_k, "stoch_d": _pad(_rolling_window(stoch_k, d).mean(axis=1), len(stoch_k))}
+
+
+@register_indicator("obv", "OBV", ("obv",), OBVState)
+def obv(ctx):
+    return {"obv": np.cumsum(np.sign(ctx.source("change")) * ctx.source("volume"))}
+
+
+@register_indicator("macd", "MACD", ("macd_diff", "macd_dea", "Histogram"), MACDIndicatorState,
+                    fast=12, slow=26, signal=9)
+def macd(ctx, fast, slow, signal):
+    import pandas as pd  # Import différé (démarrage rapide, voir candles.Candles.to_frame)
+
+    macd_diff = ctx.ema("close", fast) - ctx.ema("close", slow)
+    macd_dea = pd.Series(macd_diff).ewm(span=signal, adjust=False).mean().to_numpy()
+    return {"macd_diff": macd_diff, "macd_dea": macd_dea, "Histogram": macd_diff - macd_dea}
+
+
+def stream(name, candles, **params):
+    """
+    Rejoue des bougies dans l'état incrémental d'un indicateur (toutes clôturées).
+
+    Args:
+        name (str): nom dans INDICATORS.
+        candles (Candles): bougies rejouées.
+        **params: paramètres remplaçant les valeurs par défaut.
+
+    Returns:
+        dict: {sortie: np.ndarray}, mêmes valeurs que IndicatorContext.compute.
+    """
+    indicator = INDICATORS[name]
+    state = indicator.state(**{**indicator.defaults, **params})
+    rows = [state.update(*bar) for bar in zip(candles.open_time, candles.high, candles.low,
+                                              candles.close, candles.volume)]
+    values = np.array(rows, dtype=np.float64).reshape(len(candles), len(indicator.outputs))
+    return {output: values[:, i] for i, output in enumerate(indicator.outputs)}
@@ -0,0 +1,142 @@
+"""
+Processus d'ingestion unique pour le déploiement multi-processus du tableau de bord.
+
+Avec plusieurs processus Dash (ex: gunicorn -w 4 app:server), chaque processus interrogerait
+Binance et écrirait les mêmes partitions du stockage. Ici, un seul processus récupère les bougies
+(flux WebSocket ou interrogation REST), les écrit dans le stockage colonnaire (écritures atomiques,
+voir kline_store.py) et les publie dans un tampon en mémoire partagée (voir shared_buffer.py).
+Les processus Dash, lancés avec SHARED_FEED=1, ne font que lire ce tampon : aucun appel Binance.
+
+Usage :
+    python ingestor.py --mode rest --poll 2
+    SHARED_FEED=1 gunicorn -w 4 -b 127.0.0.1:8050 app:server
+"""
+import argparse
+import signal
+import threading
+
+import kline_store
+from candles import Candles
+from get_daily_prices import BINANCE_API_URL, fetch_klines
+from live_feed import BINANCE_WS_URL, KlineStreamIngestor
+from shared_buffer import SharedCandleRingBuffer, shared_buffer_name
+
+# Capacité du tampon partagé : quelques jours de bougies 1m (le tableau de bord en lit une journée)
+DEFAULT_CAPACITY = 4 * 1440
+
+
+class RestPoller:
+    """
+    Interrogation périodique de /api/v3/klines depuis la dernière bougie du tampon.
+
+    La dernière bougie connue est redemandée à chaque fois (elle était probablement en cours) :
+    sa clôture est corrigée dans le tampon et dans le stockage.
+
+    Args:
+        symbol (str): symbole suivi.
+        interval (str): intervalle des bougies.
+        buffer (CandleRingBuffer): tampon alimenté.
+        rest_url (str): URL de base de l'API REST.
+        poll (float): période d'interrogation (secondes).
+        root (str): racine du stockage colonnaire.
+    """
+
+    def __init__(self, symbol, interval, buffer, rest_url=BINANCE_API_URL, poll=2.0,
+                 root=kline_store.STORE_ROOT):
+        self.symbol = symbol
+        self.interval = interval
+        self.buffer = buffer
+        self.rest_url = rest_url
+        self.poll = poll
+        self.root = root
+        self.polls = 0
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def poll_once(self):
+        """
+        Returns:
+            int: nombre de bougies reçues.
+        """
+        last_open = self.buffer.last_open_time()
+        candles = Candles.from_binance(fetch_klines(
+            symbol=self.symbol, interval=self.interval, limit=1000, start_time=last_open, base_url=self.rest_url,
+        ))
+        if len(candles):
+            kline_store.append_klines(self.symbol, self.interval, candles, self.root)
+            self.buffer.extend(candles)
+        self.polls += 1
+        return len(candles)
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                self.poll_once()
+            except Exception as exc:  # Une erreur réseau ne doit pas arrêter l'ingestion
+                print(f"Interrogation REST en échec ({exc!r}), nouvel essai dans {self.poll}s")
+            self._stopping.wait(self.poll)
+
+    def start_in_thread(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def run_ingestor(symbol="ETHUSDC", interval="1m", mode="rest", capacity=DEFAULT_CAPACITY, poll=2.0,
+                 rest_url=BINANCE_API_URL, ws_url=BINANCE_WS_URL, root=kline_store.STORE_ROOT, unlink=False):
+    """
+    Crée (ou reprend) le tampon partagé, le remplit avec l'historique stocké puis l'alimente
+    jusqu'à SIGINT / SIGTERM.
+
+    Le segment est gardé à l'arrêt : un ingesteur redémarré le reprend et les processus Dash
+    attachés continuent de recevoir les bougies. Avec `unlink`, il est supprimé (arrêt définitif,
+    processus Dash déjà arrêtés).
+    """
+    buffer = SharedCandleRingBuffer.create(shared_buffer_name(symbol, interval), capacity)
+    buffer.extend(kline_store.load_latest(symbol, interval, capacity, root))
+    if mode == "ws":
+        feed = KlineStreamIngestor(symbol, interval, buffer, ws_url=ws_url, rest_url=rest_url,
+                                   persist=True, root=root).start_in_thread()
+    else:
+        feed = RestPoller(symbol, interval, buffer, rest_url=rest_url, poll=poll, root=root).start_in_thread()
+
+    stopped = threading.Event()
+
+    def shutdown(signum, frame):
+        stopped.set()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    print(f"Ingestion {symbol} {interval} ({mode}) publiée dans le segment {shared_buffer_name(symbol, interval)}")
+    try:
+        stopped.wait()
+    finally:
+        feed.stop()
+        if unlink:
+            buffer.unlink()
+        else:
+            buffer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Processus d'ingestion unique publiant en mémoire partagée")
+    parser.add_argument("--symbol", default="ETHUSDC")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--mode", choices=["rest", "ws"], default="rest",
+                        help="interrogation REST périodique ou flux WebSocket")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="bougies dans le tampon partagé")
+    parser.add_argument("--poll", type=float, default=2.0, help="période d'interrogation REST (secondes)")
+    parser.add_argument("--rest-url", default=BINANCE_API_URL)
+    parser.add_argument("--ws-url", default=BINANCE_WS_URL)
+    parser.add_argument("--root", default=kline_store.STORE_ROOT)
+    parser.add_argument("--unlink", action="store_true",
+                        help="supprime le segment à l'arrêt (sinon gardé pour le prochain ingesteur)")
+    args = parser.parse_args()
+
+    run_ingestor(args.symbol, args.interval, args.mode, args.capacity, args.poll,
+                 args.rest_url, args.ws_url, args.root, args.unlink)
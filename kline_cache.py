@@ -0,0 +1,107 @@
+import threading
+import time
+
+# Durée (en secondes) de chaque intervalle de bougie Binance
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "3m": 3 * 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "1h": 60 * 60,
+    "2h": 2 * 60 * 60,
+    "4h": 4 * 60 * 60,
+    "6h": 6 * 60 * 60,
+    "8h": 8 * 60 * 60,
+    "12h": 12 * 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+
+def interval_to_seconds(interval):
+    """
+    Convertit un intervalle Binance (ex: "1m", "4h") en nombre de secondes.
+
+    Args:
+        interval (str): intervalle de bougie Binance.
+
+    Returns:
+        int: durée de l'intervalle en secondes.
+    """
+    try:
+        return INTERVAL_SECONDS[interval]
+    except KeyError:
+        raise ValueError(f"Intervalle inconnu : {interval}")
+
+
+class KlineCache:
+    """
+    Cache en mémoire des bougies, partagé par toutes les sessions Dash du processus.
+
+    Chaque entrée expire à la clôture de la bougie en cours (TTL aligné sur l'intervalle) :
+    tant que la bougie n'est pas terminée, les callbacks (sliders, bouton des résistances)
+    relisent la valeur en mémoire sans requête réseau ni écriture disque.
+    Un seul chargement est lancé à la fois par clé (single-flight) : les sessions concurrentes
+    attendent le chargement en cours et réutilisent son résultat.
+    """
+
+    def __init__(self, interval="1m"):
+        self.ttl = interval_to_seconds(interval)
+        self._entries = {}  # clé -> (valeur, expiration epoch, début du chargement monotone)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _next_expiry(self, now):
+        # Fin de la bougie en cours : prochain multiple de l'intervalle
+        return (now // self.ttl + 1) * self.ttl
+
+    def get(self, key, loader, force=False):
+        """
+        Retourne la valeur en cache pour `key`, en la (re)chargeant via `loader` si besoin.
+
+        Args:
+            key (hashable): identifiant de l'entrée (ex: chemin du fichier JSON).
+            loader (callable): fonction sans argument qui charge la valeur.
+            force (bool): ignore le TTL et recharge (utilisé par le bouton "Recharger").
+
+        Returns:
+            object: la valeur chargée ou mise en cache.
+        """
+        entry = self._entries.get(key)
+        if not force and entry is not None and time.time() < entry[1]:
+            return entry[0]  # Chemin rapide, sans verrou
+
+        requested_at = time.monotonic()
+        with self._lock_for(key):
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Une autre session a rechargé pendant qu'on attendait le verrou
+                if force and entry[2] >= requested_at:
+                    return entry[0]
+                if not force and time.time() < entry[1]:
+                    return entry[0]
+
+            # Début du chargement : seul un chargement lancé après la demande compte comme récent
+            started_at = time.monotonic()
+            value = loader()
+            self._entries[key] = (value, self._next_expiry(time.time()), started_at)
+            return value
+
+    def invalidate(self, key=None):
+        """
+        Supprime une entrée du cache (ou toutes si `key` vaut None).
+
+        Args:
+            key (hashable, optional): entrée à invalider.
+        """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
@@ -0,0 +1,310 @@
+"""
+Stockage colonnaire des bougies dans prices_history/.
+
+Organisation sur disque (une partition par jour UTC du temps d'ouverture) :
+
+    prices_history/<SYMBOL>/<interval>/<YYYY-MM-DD>/open_time.npy   (int64, ms depuis epoch)
+    prices_history/<SYMBOL>/<interval>/<YYYY-MM-DD>/close.npy       (float64)
+    ...                                                              (un fichier par champ de candles.KLINE_FIELDS)
+
+Chaque colonne est un fichier .npy lisible en mémoire mappée : le chargement ne fait
+aucun travail Python par ligne. Chaque partition a aussi son rapport de qualité (quality.json,
+voir data_quality.py), recalculé à chaque écriture.
+
+Chaque fichier est écrit dans un fichier temporaire puis renommé (jamais de fichier partiel), et la
+relecture-fusion-réécriture d'une partition par append_klines est protégée par un verrou de fichier
+(.lock dans la partition) : plusieurs processus peuvent écrire dans le même stockage sans perdre
+de bougies.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus (un seul processus écrivain, voir ingestor.py)
+    fcntl = None
+
+import data_quality
+from candles import KLINE_FIELDS, Candles
+from kline_cache import interval_to_seconds
+from metrics import timed
+
+STORE_ROOT = "prices_history"
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def partition_dir(symbol, interval, day, root=STORE_ROOT):
+    """
+    Retourne le dossier d'une partition journalière.
+
+    Args:
+        symbol (str): symbole (ex: "ETHUSDC").
+        interval (str): intervalle des bougies (ex: "1m").
+        day (str): jour UTC au format YYYY-MM-DD.
+        root (str): racine du stockage.
+
+    Returns:
+        str: chemin du dossier de la partition.
+    """
+    return os.path.join(root, symbol, interval, day)
+
+
+def day_of(open_time_ms):
+    """
+    Retourne le jour UTC (YYYY-MM-DD) d'un temps d'ouverture en millisecondes.
+    """
+    return str(np.datetime64(int(open_time_ms) // DAY_MS, "D"))
+
+
+def list_partitions(symbol, interval, root=STORE_ROOT):
+    """
+    Liste les jours disponibles pour un symbole et un intervalle, triés chronologiquement.
+
+    Returns:
+        List[str]: jours au format YYYY-MM-DD.
+    """
+    base = os.path.join(root, symbol, interval)
+    if not os.path.isdir(base):
+        return []
+    return sorted(
+        d for d in os.listdir(base)
+        if os.path.exists(os.path.join(base, d, "open_time.npy"))
+    )
+
+
+def read_partition(symbol, interval, day, root=STORE_ROOT, mmap=True, fields=None):
+    """
+    Lit une partition journalière.
+
+    Args:
+        symbol (str): symbole.
+        interval (str): intervalle des bougies.
+        day (str): jour UTC au format YYYY-MM-DD.
+        root (str): racine du stockage.
+        mmap (bool): si vrai, les colonnes sont mappées en mémoire (lecture seule).
+        fields (list of str, optional): colonnes à lire (par défaut toutes) ; open_time est
+            toujours lue, les autres sont complétées par Candles.
+
+    Returns:
+        Candles: bougies de la partition. Les champs absents des partitions écrites avant
+            le passage à l'OHLCV complet sont complétés par Candles (open/high/low = close).
+    """
+    path = partition_dir(symbol, interval, day, root)
+    mode = "r" if mmap else None
+    columns = {}
+    for name in KLINE_FIELDS:
+        if fields is not None and name != "open_time" and name not in fields:
+            continue
+        file = os.path.join(path, f"{name}.npy")
+        if os.path.exists(file):
+            columns[name] = np.load(file, mmap_mode=mode)
+
+    # open_time est écrit en dernier : un lecteur concurrent peut voir des colonnes plus longues
+    n = len(columns["open_time"])
+    return Candles(**{name: col[:n] for name, col in columns.items()})
+
+
+def _save_atomic(file, array):
+    # Écriture dans un fichier temporaire puis renommage : un lecteur ne voit jamais un fichier partiel
+    tmp = f"{file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, file)
+
+
+def write_partition(symbol, interval, day, candles, root=STORE_ROOT):
+    """
+    Écrit (ou remplace) une partition journalière.
+
+    Args:
+        symbol (str): symbole.
+        interval (str): intervalle des bougies.
+        day (str): jour UTC au format YYYY-MM-DD.
+        candles (Candles): bougies à écrire, triées par open_time.
+        root (str): racine du stockage.
+    """
+    path = partition_dir(symbol, interval, day, root)
+    os.makedirs(path, exist_ok=True)
+    for name in KLINE_FIELDS:
+        if name != "open_time":
+            _save_atomic(os.path.join(path, f"{name}.npy"), getattr(candles, name))
+    _save_atomic(os.path.join(path, "open_time.npy"), candles.open_time)
+
+
+@contextmanager
+def partition_lock(symbol, interval, day, root=STORE_ROOT):
+    """
+    Verrou exclusif d'une partition, partagé entre processus (flock sur <partition>/.lock).
+    """
+    path = partition_dir(symbol, interval, day, root)
+    os.makedirs(path, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(path, ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def dedupe_sorted(candles):
+    """
+    Trie les bougies par open_time et supprime les doublons en gardant la dernière occurrence
+    (la version la plus récente d'une bougie l'emporte).
+
+    Args:
+        candles (Candles): bougies éventuellement non triées.
+
+    Returns:
+        Candles: bougies triées, une ligne par open_time.
+    """
+    open_time = candles.open_time
+    # np.unique sur le tableau inversé donne l'indice de la dernière occurrence de chaque open_time
+    _, rev_index = np.unique(open_time[::-1], return_index=True)
+    return candles[len(open_time) - 1 - rev_index]
+
+
+@timed("store.write")
+def append_klines(symbol, interval, candles, root=STORE_ROOT):
+    """
+    Ajoute des bougies au stockage, en les répartissant dans leurs partitions journalières.
+    Les bougies déjà présentes (même open_time) sont remplacées par la nouvelle version, et le
+    rapport de qualité de chaque partition réécrite est mis à jour (voir data_quality.py).
+
+    Args:
+        symbol (str): symbole.
+        interval (str): intervalle des bougies.
+        candles (Candles): bougies à ajouter.
+        root (str): racine du stockage.
+
+    Returns:
+        int: nombre de partitions réécrites.
+    """
+    if len(candles) == 0:
+        return 0
+
+    # Temps reçus avant tri et dédoublonnage : doublons et désordre comptés dans le rapport de qualité
+    received = candles.open_time
+    received_days = received // DAY_MS
+    interval_ms = interval_to_seconds(interval) * 1000
+    now_ms = int(time.time() * 1000)
+
+    candles = dedupe_sorted(candles)
+    days = candles.open_time // DAY_MS
+    bounds = np.flatnonzero(np.diff(days)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(days)]))
+
+    for start, end in zip(starts, ends):
+        day = day_of(candles.open_time[start])
+        new = candles[start:end]
+        path = partition_dir(symbol, interval, day, root)
+        with partition_lock(symbol, interval, day, root):
+            if os.path.exists(os.path.join(path, "open_time.npy")):
+                existing = read_partition(symbol, interval, day, root, mmap=False)
+                new = dedupe_sorted(Candles.concat([existing, new]))
+            write_partition(symbol, interval, day, new, root)
+            data_quality.write_quality(path, data_quality.partition_quality(
+                received[received_days == days[start]], new.open_time, interval_ms, int(days[start]) * DAY_MS,
+                now_ms, previous=data_quality.read_quality(path),
+            ))
+    return len(starts)
+
+
+def quality_index(symbol, interval, root=STORE_ROOT, start_ms=None, end_ms=None):
+    """
+    Rapports de qualité des partitions d'un marché (voir data_quality.py).
+
+    Les partitions écrites avant l'existence des rapports sont contrôlées à la première lecture,
+    sous le verrou de la partition (l'ingesteur peut l'écrire en même temps).
+
+    Args:
+        symbol (str): symbole.
+        interval (str): intervalle des bougies.
+        root (str): racine du stockage.
+        start_ms (int, optional): ne garde que les jours qui finissent après ce temps.
+        end_ms (int, optional): ne garde que les jours qui commencent avant ce temps.
+
+    Returns:
+        dict: {jour YYYY-MM-DD: rapport}
+    """
+    interval_ms = interval_to_seconds(interval) * 1000
+    index = {}
+    for day in list_partitions(symbol, interval, root):
+        day_start = int(np.datetime64(day, "ms").astype(np.int64))
+        if (start_ms is not None and day_start + DAY_MS <= start_ms) or (end_ms is not None and day_start >= end_ms):
+            continue
+        path = partition_dir(symbol, interval, day, root)
+        quality = data_quality.read_quality(path)
+        if quality is None:
+            with partition_lock(symbol, interval, day, root):
+                # Rapport écrit entre-temps par append_klines : il décrit la partition à jour
+                quality = data_quality.read_quality(path)
+                if quality is None:
+                    open_time = read_partition(symbol, interval, day, root, fields=()).open_time
+                    quality = data_quality.partition_quality(open_time, open_time, interval_ms, day_start,
+                                                             int(time.time() * 1000))
+                    data_quality.write_quality(path, quality)
+        index[day] = quality
+    return index
+
+
+def mark_unfillable(symbol, interval, day, gaps, root=STORE_ROOT):
+    """
+    Note des trous de la partition `day` comme absents chez Binance (plus redemandés).
+
+    Args:
+        gaps (list of list): plages [début, fin[ en ms, telles que dans le rapport de la partition.
+    """
+    path = partition_dir(symbol, interval, day, root)
+    with partition_lock(symbol, interval, day, root):
+        quality = data_quality.read_quality(path)
+        if quality is None:
+            return
+        known = {tuple(gap) for gap in quality["gaps"]}
+        unfillable = {tuple(gap) for gap in quality.get("unfillable", [])}
+        unfillable |= {tuple(gap) for gap in gaps if tuple(gap) in known}
+        quality["unfillable"] = sorted(list(gap) for gap in unfillable)
+        data_quality.write_quality(path, quality)
+
+
+def last_open_time(symbol, interval, root=STORE_ROOT):
+    """
+    Retourne le temps d'ouverture (ms) de la dernière bougie stockée, ou None si le stockage est vide.
+    """
+    for day in reversed(list_partitions(symbol, interval, root)):
+        open_time = read_partition(symbol, interval, day, root, fields=()).open_time
+        if len(open_time):
+            return int(open_time[-1])
+    return None
+
+
+@timed("store.read")
+def load_latest(symbol, interval, lookback, root=STORE_ROOT):
+    """
+    Charge les `lookback` dernières bougies en ne lisant que les partitions nécessaires.
+
+    Args:
+        symbol (str): symbole.
+        interval (str): intervalle des bougies.
+        lookback (int): nombre de bougies voulues.
+        root (str): racine du stockage.
+
+    Returns:
+        Candles: dernières bougies, triées par open_time.
+    """
+    parts = []
+    total = 0
+    for day in reversed(list_partitions(symbol, interval, root)):
+        part = read_partition(symbol, interval, day, root)
+        parts.append(part)
+        total += len(part)
+        if total >= lookback:
+            break
+    return Candles.concat(parts[::-1])[-lookback:]
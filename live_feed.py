@@ -0,0 +1,207 @@
+"""
+Ingestion temps réel des bougies via le flux WebSocket kline de Binance.
+
+Le flux alimente un CandleRingBuffer lu par le tableau de bord. En cas de coupure, la connexion
+est rétablie avec un délai exponentiel (avec gigue), et les bougies manquées pendant la coupure
+sont récupérées par l'API REST (/api/v3/klines).
+
+Hors ligne, replay_server.py rejoue l'historique stocké au même format :
+    python replay_server.py --speed 100
+    BINANCE_WS_URL=ws://127.0.0.1:8765 LIVE_FEED=1 python app.py
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+import kline_store
+from batch_fetcher import PAGE_LIMIT
+from candles import Candles
+from get_daily_prices import BINANCE_API_URL, fetch_klines
+from kline_cache import interval_to_seconds
+
+# URL du flux WebSocket Binance (remplaçable par le serveur de rejeu local, voir replay_server.py)
+BINANCE_WS_URL = os.environ.get("BINANCE_WS_URL", "wss://stream.binance.com:9443")
+
+
+def stream_url(symbol, interval, ws_url=BINANCE_WS_URL):
+    """
+    Retourne l'URL du flux kline d'un symbole (ex: wss://.../ws/ethusdc@kline_1m).
+    """
+    return f"{ws_url}/ws/{symbol.lower()}@kline_{interval}"
+
+
+def parse_kline_message(message):
+    """
+    Convertit un message kline Binance en bougie.
+
+    Args:
+        message (str or dict): message {"e": "kline", "E": ..., "k": {"t", "o", "h", ...}}.
+
+    Returns:
+        tuple: (candle, closed, event_time)
+            candle (dict): champs de candles.KLINE_FIELDS.
+            closed (bool): vrai si la bougie est clôturée ("x").
+            event_time (int): horodatage d'émission du message (ms).
+    """
+    if isinstance(message, (str, bytes)):
+        message = json.loads(message)
+    k = message["k"]
+    candle = {
+        "open_time": int(k["t"]),
+        "open": float(k["o"]),
+        "high": float(k["h"]),
+        "low": float(k["l"]),
+        "close": float(k["c"]),
+        "volume": float(k["v"]),
+        "close_time": int(k["T"]),
+        "quote_volume": float(k["q"]),
+        "trades": int(k["n"]),
+        "taker_buy_base": float(k["V"]),
+        "taker_buy_quote": float(k["Q"]),
+    }
+    return candle, bool(k["x"]), int(message.get("E", 0))
+
+
+class KlineStreamIngestor:
+    """
+    Client asyncio du flux kline : alimente un tampon circulaire, se reconnecte et comble les trous.
+
+    Args:
+        symbol (str): symbole suivi (ex: "ETHUSDC").
+        interval (str): intervalle des bougies (ex: "1m").
+        buffer (CandleRingBuffer): tampon alimenté.
+        ws_url (str): URL de base du flux WebSocket.
+        rest_url (str or None): URL de base de l'API REST pour combler les trous (None = désactivé).
+        persist (bool): écrit les bougies clôturées dans le stockage colonnaire.
+        root (str): racine du stockage colonnaire.
+        max_backoff (float): délai maximal entre deux tentatives de reconnexion (secondes).
+    """
+
+    def __init__(self, symbol, interval, buffer, ws_url=BINANCE_WS_URL, rest_url=BINANCE_API_URL,
+                 persist=True, root=kline_store.STORE_ROOT, max_backoff=60.0):
+        self.symbol = symbol
+        self.interval = interval
+        self.interval_ms = interval_to_seconds(interval) * 1000
+        self.buffer = buffer
+        self.url = stream_url(symbol, interval, ws_url)
+        self.rest_url = rest_url
+        self.persist = persist
+        self.root = root
+        self.max_backoff = max_backoff
+
+        self.messages = 0
+        self.reconnects = 0
+        self.gaps_filled = 0
+        self.last_latency_ms = None
+        self._stopping = None
+        self._thread = None
+        self._loop = None
+
+    def _fill_gap(self, until_open_time=None):
+        # Rattrapage REST entre la dernière bougie du tampon et `until_open_time` (exclu)
+        last_open = self.buffer.last_open_time()
+        if self.rest_url is None or last_open is None:
+            return
+        end_time = None if until_open_time is None else until_open_time - 1
+        # Pages successives depuis la dernière bougie : une coupure de plus de PAGE_LIMIT bougies
+        # est comblée en entier (une page incomplète marque la fin du trou)
+        received = 0
+        start_time = last_open
+        while True:
+            raw = fetch_klines(
+                symbol=self.symbol, interval=self.interval, limit=PAGE_LIMIT,
+                start_time=start_time, end_time=end_time, base_url=self.rest_url,
+            )
+            candles = Candles.from_binance(raw)
+            if len(candles):
+                self.buffer.extend(candles)
+                if self.persist:
+                    kline_store.append_klines(self.symbol, self.interval, candles, self.root)
+                received += len(candles)
+            if len(raw) < PAGE_LIMIT:
+                break
+            start_time = int(candles.open_time[-1]) + self.interval_ms
+        if received:
+            self.gaps_filled += 1
+
+    async def _handle(self, message, loop):
+        candle, closed, event_time = parse_kline_message(message)
+        last_open = self.buffer.last_open_time()
+        if last_open is not None and candle["open_time"] > last_open + self.interval_ms:
+            # Bougies manquées (message perdu ou coupure) : rattrapage REST hors de la boucle asyncio
+            await loop.run_in_executor(None, self._fill_gap, candle["open_time"])
+
+        self.buffer.upsert(candle)
+        self.messages += 1
+        if event_time:
+            self.last_latency_ms = time.time() * 1000 - event_time
+        if closed and self.persist:
+            closed_candle = Candles(**{name: [value] for name, value in candle.items()})
+            await loop.run_in_executor(
+                None, kline_store.append_klines, self.symbol, self.interval, closed_candle, self.root
+            )
+
+    async def run(self):
+        """
+        Boucle principale : connexion, lecture des messages, reconnexion avec délai exponentiel.
+        """
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._stopping = asyncio.Event()
+        backoff = 1.0
+        while not self._stopping.is_set():
+            try:
+                # Trous éventuels depuis la dernière bougie connue (démarrage ou coupure)
+                await loop.run_in_executor(None, self._fill_gap)
+                async with connect(self.url) as ws:
+                    backoff = 1.0
+                    reader = asyncio.ensure_future(self._read(ws, loop))
+                    stopper = asyncio.ensure_future(self._stopping.wait())
+                    done, pending = await asyncio.wait({reader, stopper}, return_when=asyncio.FIRST_COMPLETED)
+                    for task in pending:
+                        task.cancel()
+                    for task in done:
+                        task.result()  # Propage les erreurs de lecture
+            except (OSError, ConnectionClosed, InvalidHandshake, asyncio.TimeoutError, requests.RequestException) as exc:
+                if self._stopping.is_set():
+                    break
+                self.reconnects += 1
+                delay = backoff * random.uniform(0.5, 1.5)  # Gigue : évite les reconnexions synchronisées
+                print(f"Flux {self.url} interrompu ({exc!r}), reconnexion dans {delay:.1f}s")
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, self.max_backoff)
+
+    async def _read(self, ws, loop):
+        async for message in ws:
+            await self._handle(message, loop)
+        raise ConnectionError("flux terminé par le serveur")  # On se reconnecte
+
+    def start_in_thread(self):
+        """
+        Lance la boucle asyncio dans un thread démon (pour cohabiter avec le serveur Dash).
+
+        Returns:
+            KlineStreamIngestor: self
+        """
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """
+        Arrête la boucle (et attend la fin du thread s'il a été lancé avec start_in_thread).
+        """
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,269 @@
+"""
+Mesure de la latence de chaque étape du tableau de bord et exposition au format Prometheus.
+
+Les étapes (requête Binance, décodage, écriture / lecture du stockage, MACD, niveaux, construction
+des figures, callbacks Dash, requêtes HTTP) sont chronométrées par des spans :
+
+    with span("macd"):
+        ...
+
+    @timed("callback.update_macd")
+    def update_macd(...):
+        ...
+
+Chaque durée alimente l'histogramme de son étape (seaux cumulatifs, somme, nombre), lu sur la route
+/metrics du serveur Flask de l'application (voir install). Le coût d'un span est de l'ordre de la
+microseconde : l'instrumentation reste active en permanence.
+
+Profilage à la demande, désactivé par défaut (un client anonyme ne doit pas pouvoir charger le CPU
+ni remplir le disque) : l'opérateur l'active avec PROFILE_REQUESTS=1 (ou en mode debug). Une requête
+avec `?profile=1`, l'en-tête `X-Profile: 1` ou le cookie `profile` (posé par /profile?enable=1, pour
+profiler aussi les callbacks envoyés par le navigateur) est alors profilée avec cProfile, ou
+pyinstrument s'il est installé et demandé (`profile=pyinstrument`). PROFILE_REQUESTS=all profile
+toutes les requêtes. Les profils sont écrits dans profiles/, où seuls les MAX_PROFILES plus récents
+sont gardés.
+"""
+import cProfile
+import functools
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Bornes supérieures des seaux des histogrammes (secondes)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_NAME = "dashboard_stage_seconds"
+PROFILE_DIR = "profiles"
+MAX_PROFILES = 50  # Profils gardés dans PROFILE_DIR (les plus anciens sont supprimés)
+
+
+class Histogram:
+    """
+    Histogramme cumulatif de durées (format Prometheus).
+
+    Args:
+        buckets (tuple of float): bornes supérieures des seaux, croissantes (+Inf est implicite).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Dernier seau : au-delà de la plus grande borne
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """
+        Returns:
+            tuple: (seaux cumulés [(borne, nombre)], somme, nombre), +Inf en dernier.
+        """
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            cumulative.append((bound, running))
+        return cumulative, total, count
+
+
+class MetricsRegistry:
+    """
+    Histogrammes de durée par étape.
+
+    Args:
+        name (str): nom de la métrique exposée.
+        buckets (tuple of float): seaux des histogrammes.
+    """
+
+    def __init__(self, name=METRIC_NAME, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+
+    def stages(self):
+        with self._lock:
+            return sorted(self._histograms)
+
+    def render(self):
+        """
+        Texte d'exposition Prometheus (version 0.0.4) de tous les histogrammes.
+        """
+        lines = [f"# HELP {self.name} Durée de chaque étape du tableau de bord, en secondes.",
+                 f"# TYPE {self.name} histogram"]
+        for stage in self.stages():
+            buckets, total, count = self._histograms[stage].snapshot()
+            label = _escape(stage)
+            for bound, n in buckets:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{stage="{label}",le="{le}"}} {n}')
+            lines.append(f'{self.name}_sum{{stage="{label}"}} {total!r}')
+            lines.append(f'{self.name}_count{{stage="{label}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Registre partagé par tout le processus
+registry = MetricsRegistry()
+
+
+@contextmanager
+def span(stage):
+    """
+    Chronomètre le bloc et ajoute sa durée à l'histogramme de `stage` (même en cas d'exception).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(stage, time.perf_counter() - start)
+
+
+def timed(stage):
+    """
+    Décorateur chronométrant chaque appel de la fonction dans l'histogramme de `stage`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _profiling_allowed(server):
+    # Déclencheurs par requête honorés seulement sur choix de l'opérateur
+    return os.environ.get("PROFILE_REQUESTS", "0") != "0" or server.debug
+
+
+def _profile_mode(request, server):
+    # "cprofile", "pyinstrument" ou None selon la requête (paramètre, en-tête, cookie) et PROFILE_REQUESTS
+    if not _profiling_allowed(server):
+        return None
+    value = request.args.get("profile") or request.headers.get("X-Profile") or request.cookies.get("profile")
+    if not value and os.environ.get("PROFILE_REQUESTS") == "all":
+        value = "1"
+    if not value or value == "0":
+        return None
+    return "pyinstrument" if value == "pyinstrument" else "cprofile"
+
+
+def _start_profiler(mode):
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:  # Dépendance optionnelle : on se rabat sur cProfile
+            mode = "cprofile"
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return mode, profiler
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return mode, profiler
+
+
+def _prune_profiles(profile_dir, keep):
+    # Les noms commencent par l'horodatage : l'ordre alphabétique est l'ordre chronologique
+    files = sorted(name for name in os.listdir(profile_dir) if name.endswith((".prof", ".html")))
+    for name in files[:max(len(files) - keep, 0)]:
+        try:
+            os.remove(os.path.join(profile_dir, name))
+        except FileNotFoundError:  # Déjà supprimé par une requête concurrente
+            pass
+
+
+def _save_profile(mode, profiler, path, profile_dir):
+    os.makedirs(profile_dir, exist_ok=True)
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}"
+    slug = re.sub(r"[^\w.-]+", "_", path).strip("_") or "index"
+    name = f"{stamp}-{slug}"
+    if mode == "pyinstrument":
+        profiler.stop()
+        file = os.path.join(profile_dir, name + ".html")
+        with open(file, "w") as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.disable()
+        file = os.path.join(profile_dir, name + ".prof")
+        profiler.dump_stats(file)  # Lecture : python -m pstats <fichier> ou snakeviz
+    return file
+
+
+def install(server, profile_dir=PROFILE_DIR, max_profiles=MAX_PROFILES):
+    """
+    Ajoute la route /metrics, la durée de chaque requête HTTP et le profilage à la demande
+    au serveur Flask de l'application (app.server).
+
+    Args:
+        server (flask.Flask): serveur de l'application Dash.
+        profile_dir (str): répertoire des profils écrits.
+        max_profiles (int): nombre de profils gardés dans `profile_dir`.
+    """
+    from flask import Response, g, request
+
+    @server.before_request
+    def _start_request():
+        g.metrics_start = time.perf_counter()
+        mode = _profile_mode(request, server) if request.path not in ("/metrics", "/profile") else None
+        g.profiler = _start_profiler(mode) if mode else None
+
+    @server.after_request
+    def _end_request(response):
+        if getattr(g, "profiler", None) is not None:
+            mode, profiler = g.profiler
+            g.profiler = None
+            response.headers["X-Profile-File"] = _save_profile(mode, profiler, request.path, profile_dir)
+            _prune_profiles(profile_dir, max_profiles)
+        start = getattr(g, "metrics_start", None)
+        if start is not None:
+            # Règle de routage plutôt que chemin : une seule série pour tous les fichiers statiques
+            rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            registry.observe(f"http {request.method} {rule}", time.perf_counter() - start)
+        return response
+
+    @server.route("/metrics")
+    def _metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+    @server.route("/profile")
+    def _profile_toggle():
+        # /profile?enable=1 (cProfile), ?enable=pyinstrument ou ?enable=0 : cookie lu à chaque requête
+        if not _profiling_allowed(server):
+            return Response("profilage désactivé (PROFILE_REQUESTS)\n", status=403, mimetype="text/plain")
+        enable = request.args.get("enable", "1")
+        response = Response(f"profilage : {'désactivé' if enable == '0' else enable}\n", mimetype="text/plain")
+        if enable == "0":
+            response.delete_cookie("profile")
+        else:
+            response.set_cookie("profile", "pyinstrument" if enable == "pyinstrument" else "1")
+        return response
+
+    return server
@@ -0,0 +1,74 @@
+"""
+Migration ponctuelle des anciens fichiers prices_history/*.json vers le stockage colonnaire.
+
+Les anciens fichiers contiennent une liste de {"time": str ISO (heure locale), "price": float}.
+Les fichiers se recouvrent (chaque récupération couvrait les dernières 24h) : les doublons
+sont fusionnés par open_time lors de l'écriture.
+
+Usage :
+    python migrate_prices_history.py [--symbol ETHUSDC] [--interval 1m] [--delete]
+"""
+import argparse
+import glob
+import os
+from datetime import datetime
+
+import numpy as np
+
+import kline_store
+from candles import Candles
+from data_utils import load_data_from_json
+
+
+def json_to_candles(entries):
+    """
+    Convertit une liste de {"time", "price"} en série de bougies.
+
+    Les heures ISO des anciens fichiers sont naïves et exprimées en heure locale
+    (datetime.fromtimestamp) : elles sont reconverties en millisecondes depuis epoch.
+
+    Args:
+        entries (list of dict): entrées de l'ancien format JSON.
+
+    Returns:
+        Candles: bougies de clôture seule (open/high/low = close, volumes inconnus).
+    """
+    open_time = np.array(
+        [int(datetime.fromisoformat(e["time"]).timestamp() * 1000) for e in entries], dtype=np.int64
+    )
+    close = np.array([float(e["price"]) for e in entries], dtype=np.float64)
+    return Candles(open_time=open_time, close=close)
+
+
+def migrate(symbol="ETHUSDC", interval="1m", root=kline_store.STORE_ROOT, delete=False):
+    """
+    Convertit tous les fichiers JSON de `root` et les ajoute au stockage colonnaire.
+
+    Args:
+        symbol (str): symbole des données migrées.
+        interval (str): intervalle des bougies migrées.
+        root (str): dossier contenant les fichiers JSON (et racine du stockage).
+        delete (bool): supprime les fichiers JSON une fois migrés.
+
+    Returns:
+        int: nombre de fichiers migrés.
+    """
+    files = sorted(glob.glob(os.path.join(root, "*.json")))
+    for filename in files:
+        candles = json_to_candles(load_data_from_json(filename))
+        kline_store.append_klines(symbol, interval, candles, root)
+        print(f"{filename} : {len(candles)} bougies migrées")
+        if delete:
+            os.remove(filename)
+    return len(files)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migre prices_history/*.json vers le stockage colonnaire")
+    parser.add_argument("--symbol", default="ETHUSDC")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--root", default=kline_store.STORE_ROOT)
+    parser.add_argument("--delete", action="store_true", help="supprime les fichiers JSON après migration")
+    args = parser.parse_args()
+
+    migrate(args.symbol, args.interval, args.root, args.delete)
@@ -0,0 +1,192 @@
+"""
+Serveur HTTP local imitant l'endpoint /api/v3/klines de Binance.
+
+Sert des bougies synthétiques déterministes (le prix ne dépend que du temps d'ouverture),
+ce qui permet de tester l'ingestion sans accès réseau et de mesurer le volume servi.
+
+Usage :
+    python mock_binance.py --port 8000
+puis passer base_url="http://127.0.0.1:8000" aux fonctions de get_daily_prices.py,
+ou lancer l'application avec la variable d'environnement BINANCE_API_URL=http://127.0.0.1:8000.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from kline_cache import interval_to_seconds
+
+MAX_LIMIT = 1000  # Limite imposée par Binance sur /api/v3/klines
+
+
+def synthetic_candles(symbol, open_times_ms, interval_ms):
+    """
+    Construit des bougies synthétiques au format Binance pour des temps d'ouverture donnés.
+    Le calcul est vectorisé : le serveur reste rapide même pour des pages de 1000 bougies.
+
+    Args:
+        symbol (str): symbole (sert à décaler le niveau de prix d'un symbole à l'autre).
+        open_times_ms (np.ndarray): temps d'ouverture en millisecondes.
+        interval_ms (int): durée d'une bougie en millisecondes.
+
+    Returns:
+        list of list: [open_time, open, high, low, close, volume, close_time, quote_volume,
+                       trades, taker_buy_base, taker_buy_quote, ignore] pour chaque bougie.
+    """
+    open_times_ms = np.asarray(open_times_ms, dtype=np.int64)
+    base = 1000 + (sum(map(ord, symbol)) % 50) * 100
+    minute = open_times_ms / 60000
+
+    def price_at(m):
+        return base + 0.05 * base * np.sin(m / 720) + 0.005 * base * np.sin(m / 13)
+
+    open_price = price_at(minute)
+    close_price = price_at(minute + interval_ms / 60000)
+    high = np.maximum(open_price, close_price) * 1.0005
+    low = np.minimum(open_price, close_price) * 0.9995
+    volume = 10 + 5 * (1 + np.sin(minute / 37))
+    trades = (50 + 40 * (1 + np.sin(minute / 11))).astype(np.int64)
+
+    def fmt(values, digits):
+        pattern = f"{{:.{digits}f}}".format
+        return [pattern(v) for v in values.tolist()]
+
+    return [list(row) for row in zip(
+        open_times_ms.tolist(), fmt(open_price, 2), fmt(high, 2), fmt(low, 2), fmt(close_price, 2),
+        fmt(volume, 4), (open_times_ms + interval_ms - 1).tolist(), fmt(volume * close_price, 4),
+        trades.tolist(), fmt(volume / 2, 4), fmt(volume * close_price / 2, 4), ["0"] * len(open_times_ms),
+    )]
+
+
+def synthetic_klines(symbol, interval, limit=500, start_time=None, end_time=None, now_ms=None):
+    """
+    Reproduit la sémantique de pagination de /api/v3/klines sur des données synthétiques.
+
+    Sans startTime, on renvoie les `limit` dernières bougies jusqu'à maintenant (la dernière
+    étant en cours) ; avec startTime, les bougies à partir de celui-ci.
+
+    Returns:
+        list of list: bougies au format Binance.
+    """
+    interval_ms = interval_to_seconds(interval) * 1000
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    last_open = now_ms - now_ms % interval_ms
+    if end_time is not None:
+        last_open = min(last_open, end_time - end_time % interval_ms)
+
+    if start_time is not None:
+        first_open = start_time + (-start_time) % interval_ms
+    else:
+        first_open = last_open - (limit - 1) * interval_ms
+
+    opens = np.arange(first_open, last_open + 1, interval_ms, dtype=np.int64)[:limit]
+    return synthetic_candles(symbol, opens, interval_ms)
+
+
+class _KlinesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Connexions persistantes (keep-alive), comme l'API réelle
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/api/v3/klines":
+            self.send_error(404)
+            return
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if self.server.latency:
+            time.sleep(self.server.latency)  # Simule l'aller-retour réseau vers Binance
+        try:
+            candles = synthetic_klines(
+                query.get("symbol", "ETHUSDC"),
+                query.get("interval", "1m"),
+                limit=int(query.get("limit", 500)),
+                start_time=int(query["startTime"]) if "startTime" in query else None,
+                end_time=int(query["endTime"]) if "endTime" in query else None,
+                now_ms=self.server.now_ms,
+            )
+        except ValueError as exc:
+            self.send_error(400, str(exc))
+            return
+
+        body = json.dumps(candles).encode()
+        self.server.record(len(candles), len(body))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Pas de log à chaque requête
+
+
+class MockBinanceServer(ThreadingHTTPServer):
+    """
+    Serveur de test exécuté dans un thread, utilisable comme gestionnaire de contexte :
+
+        with MockBinanceServer() as server:
+            update_daily_prices(base_url=server.url, root=...)
+            print(server.rows_served)
+
+    Args:
+        host (str): adresse d'écoute.
+        port (int): port d'écoute (0 = port libre choisi par le système).
+        now_ms (int, optional): horloge figée pour des réponses reproductibles.
+        latency (float): délai ajouté à chaque réponse, en secondes (simule le réseau).
+    """
+
+    daemon_threads = True
+
+    request_queue_size = 128
+
+    def __init__(self, host="127.0.0.1", port=0, now_ms=None, latency=0.0):
+        super().__init__((host, port), _KlinesHandler)
+        self.now_ms = now_ms
+        self.latency = latency
+        self.requests_served = 0
+        self.rows_served = 0
+        self.bytes_served = 0
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, rows, nbytes):
+        with self._stats_lock:
+            self.requests_served += 1
+            self.rows_served += rows
+            self.bytes_served += nbytes
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur local imitant /api/v3/klines de Binance")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="délai par réponse (secondes)")
+    args = parser.parse_args()
+
+    server = MockBinanceServer(args.host, args.port, latency=args.latency)
+    print(f"Mock Binance en écoute sur {server.url}")
+    server.serve_forever()
@@ -0,0 +1,235 @@
+"""
+Recherche des meilleurs paramètres MACD / niveaux par grille ou tirage aléatoire, en parallèle.
+
+Chaque combinaison (fast, slow, signal, n, precision, seuil) est évaluée par backtest.py sur
+l'historique stocké. Les évaluations sont réparties sur un ProcessPoolExecutor :
+    - les prix ne sont pas envoyés à chaque tâche : ils sont écrits une fois dans un fichier .npy
+      que chaque processus ouvre en mémoire mappée (mêmes pages physiques pour tous) ;
+    - les tâches regroupent les combinaisons qui partagent leurs paramètres de niveaux : les
+      positions sur niveaux (le calcul le plus lourd) sont calculées une fois par tâche, et chaque
+      processus garde les positions MACD de chaque jeu de paramètres déjà vu (1 octet par bougie) ;
+    - l'espace ne contient que les paramètres lus par la stratégie (space_for).
+
+Usage :
+    python optimizer.py --start 2025-01-01 --end 2026-01-01 --samples 2000 --workers 8 --out sweep.csv
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from backtest import (DEFAULT_FEE, DEFAULT_SLIPPAGE, LEVEL_PARAMS, MACD_PARAMS, combined_positions,
+                      hold_positions, level_signals, macd_positions, simulate)
+from kline_cache import interval_to_seconds
+
+# Espace de recherche par défaut (les valeurs des sliders du tableau de bord pour n et precision)
+DEFAULT_SPACE = {
+    "fast": [6, 8, 10, 12, 15],
+    "slow": [20, 26, 30, 35],
+    "signal": [5, 7, 9, 12],
+    "n": [3, 5, 10, 20],
+    "precision": [1, 2, 5, 10, 15, 20],
+    "seuil": [0.0005, 0.001, 0.002],
+}
+
+# État propre à chaque processus de calcul (voir _init_worker)
+_worker = {}
+
+
+def space_for(space, strategy):
+    """
+    Espace restreint aux paramètres lus par `strategy` : les paramètres MACD pour "macd", ceux des
+    niveaux pour "levels" (les autres ne feraient que multiplier des combinaisons identiques).
+    """
+    used = {"macd": MACD_PARAMS, "levels": LEVEL_PARAMS}.get(strategy)
+    if used is None:
+        return dict(space)
+    return {name: values for name, values in space.items() if name in used}
+
+
+def grid_space(space):
+    """
+    Toutes les combinaisons d'un espace {paramètre: valeurs}, sans les MACD où fast >= slow.
+
+    Returns:
+        list of dict: combinaisons, dans l'ordre du produit cartésien.
+    """
+    names = list(space)
+    combos = (dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names)))
+    return [c for c in combos if c.get("fast", 0) < c.get("slow", 1)]
+
+
+def random_space(space, samples, seed=0):
+    """
+    `samples` combinaisons distinctes tirées au hasard dans l'espace (recherche aléatoire), triées.
+    """
+    combos = grid_space(space)
+    rng = random.Random(seed)
+    chosen = rng.sample(combos, min(samples, len(combos)))
+    return sorted(chosen, key=lambda c: [c[name] for name in space])
+
+
+def _init_worker(prices_file, strategy, options):
+    _worker["close"] = np.load(prices_file, mmap_mode="r")
+    _worker["strategy"] = strategy
+    _worker["options"] = options
+    _worker["macd"] = {}
+    _levels.cache_clear()
+
+
+def _macd_params(params):
+    macd = {"fast": 12, "slow": 26, "signal": 9, "invert": False}
+    macd.update({k: params[k] for k in MACD_PARAMS if k in params})
+    return macd
+
+
+def _level_params(params):
+    levels = {"n": 5, "precision": 10, "seuil": 0.001, "window": 1440}
+    levels.update({k: params[k] for k in LEVEL_PARAMS if k in params})
+    return levels
+
+
+def _tasks(combos, strategy, chunksize):
+    """
+    Paquets de (indice, combinaison) partageant leurs paramètres de niveaux (MACD pour la stratégie
+    "macd"), d'au plus `chunksize` combinaisons : la position commune est calculée une fois par paquet.
+    """
+    shared = _macd_params if strategy == "macd" else _level_params
+    groups = {}
+    for i, params in enumerate(combos):
+        groups.setdefault(tuple(shared(params).values()), []).append((i, params))
+    return [group[start:start + chunksize] for group in groups.values()
+            for start in range(0, len(group), chunksize)]
+
+
+def _macd(fast, slow, signal, invert, allow_short):
+    key = (fast, slow, signal, invert, allow_short)
+    cache = _worker["macd"]
+    if key in cache:
+        return cache[key]
+    positions = macd_positions(np.asarray(_worker["close"]), fast=fast, slow=slow, signal=signal,
+                               invert=invert, allow_short=allow_short)
+    # Stratégie combinée : chaque jeu MACD revient dans chaque paquet de niveaux, il est gardé
+    # pour tout le balayage en int8 (positions 1, 0 ou -1 : 1 octet par bougie au lieu de 8)
+    if _worker["strategy"] == "combined":
+        cache[key] = positions = positions.astype(np.int8)
+    return positions
+
+
+# Paquets regroupés par paramètres de niveaux (voir _tasks) : seule la position du paquet courant est gardée
+@lru_cache(maxsize=1)
+def _levels(n, precision, seuil, window, allow_short):
+    return hold_positions(level_signals(np.asarray(_worker["close"]), n=n, precision=precision,
+                                        seuil=seuil, window=window), allow_short=allow_short)
+
+
+def evaluate(params):
+    """
+    Backtest d'une combinaison dans un processus de calcul (prix lus dans le fichier partagé).
+
+    Returns:
+        dict: paramètres + rapport de simulate (sans la courbe de capital).
+    """
+    options = _worker["options"]
+    strategy = _worker["strategy"]
+    allow_short = options["allow_short"]
+    macd = _macd_params(params)
+    levels = _level_params(params)
+
+    if strategy == "macd":
+        positions = _macd(**macd, allow_short=allow_short)
+    elif strategy == "levels":
+        positions = _levels(**levels, allow_short=allow_short)
+    else:
+        positions = combined_positions(_macd(**macd, allow_short=allow_short),
+                                       _levels(**levels, allow_short=allow_short))
+    report = simulate(_worker["close"], positions, fee=options["fee"], slippage=options["slippage"],
+                      periods_per_year=options["periods_per_year"])
+    report.pop("equity")
+    return {**params, **report}
+
+
+def _evaluate_task(task):
+    return [(i, evaluate(params)) for i, params in task]
+
+
+def optimize(close, combos, strategy="combined", workers=None, fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE,
+             interval="1m", allow_short=False, sort_by="sharpe", chunksize=None):
+    """
+    Évalue toutes les combinaisons en parallèle et retourne le tableau des résultats.
+
+    Args:
+        close (np.ndarray): prix de clôture de l'historique.
+        combos (list of dict): combinaisons à évaluer (voir grid_space / random_space).
+        strategy (str): "macd", "levels" ou "combined" (voir backtest.py).
+        workers (int, optional): nombre de processus (par défaut un par cœur).
+        fee (float): frais relatifs par unité échangée.
+        slippage (float): glissement relatif par unité échangée.
+        interval (str): intervalle des bougies (pour annualiser).
+        allow_short (bool): autorise les positions vendeuses.
+        sort_by (str): colonne de tri (décroissant).
+        chunksize (int, optional): nombre maximal de combinaisons par tâche envoyée à un processus.
+
+    Returns:
+        pd.DataFrame: une ligne par combinaison, triée par `sort_by` décroissant.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = chunksize or max(1, len(combos) // (workers * 4))
+    options = {"fee": fee, "slippage": slippage, "allow_short": allow_short,
+               "periods_per_year": 365 * 24 * 3600 // interval_to_seconds(interval)}
+
+    # /dev/shm (mémoire) si disponible : le fichier de prix n'est jamais écrit sur disque
+    tmp_root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    with tempfile.TemporaryDirectory(dir=tmp_root) as tmp:
+        prices_file = os.path.join(tmp, "close.npy")
+        np.save(prices_file, np.ascontiguousarray(close, dtype=np.float64))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(prices_file, strategy, options)) as executor:
+            rows = [None] * len(combos)
+            for results in executor.map(_evaluate_task, _tasks(combos, strategy, chunksize)):
+                for i, row in results:
+                    rows[i] = row
+
+    table = pd.DataFrame(rows)
+    if len(table) and sort_by in table:
+        table = table.sort_values(sort_by, ascending=False, ignore_index=True)
+    return table
+
+
+if __name__ == "__main__":
+    from history_index import load_range
+
+    parser = argparse.ArgumentParser(description="Optimisation des paramètres MACD / niveaux")
+    parser.add_argument("--symbol", default="ETHUSDC")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--start", required=True, help="début (ex: 2025-01-01)")
+    parser.add_argument("--end", required=True, help="fin exclue (ex: 2026-01-01)")
+    parser.add_argument("--strategy", default="combined", choices=["macd", "levels", "combined"])
+    parser.add_argument("--samples", type=int, default=0, help="recherche aléatoire (0 = grille complète)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--sort", default="sharpe", help="colonne de tri (ex: total_return, max_drawdown)")
+    parser.add_argument("--short", action="store_true", help="autorise les positions vendeuses")
+    parser.add_argument("--out", help="fichier CSV des résultats")
+    args = parser.parse_args()
+
+    close = load_range(args.symbol, args.start, args.end, args.interval).close
+    space = space_for(DEFAULT_SPACE, args.strategy)
+    combos = random_space(space, args.samples) if args.samples else grid_space(space)
+    print(f"{len(combos)} combinaisons sur {len(close)} bougies {args.symbol} {args.interval}")
+
+    start = time.perf_counter()
+    table = optimize(close, combos, strategy=args.strategy, workers=args.workers, interval=args.interval,
+                     allow_short=args.short, sort_by=args.sort)
+    print(f"terminé en {time.perf_counter() - start:.1f} s")
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(table.head(20))
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"résultats complets : {args.out}")
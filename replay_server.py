@@ -0,0 +1,173 @@
+"""
+Serveur WebSocket local qui rejoue l'historique de prices_history/ au format du flux kline Binance.
+
+Chaque client connecté sur /ws/<symbole>@kline_<intervalle> reçoit l'historique stocké depuis le
+début, à `speed` fois la vitesse réelle : pour chaque bougie, `ticks` messages "en cours"
+(x = false) dont le dernier est la bougie clôturée (x = true). Le champ "E" contient l'heure
+d'envoi, ce qui permet de mesurer la latence côté client.
+
+Usage :
+    python replay_server.py --speed 100 --port 8765
+    BINANCE_WS_URL=ws://127.0.0.1:8765 LIVE_FEED=1 python app.py
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+import kline_store
+from candles import Candles
+from kline_cache import interval_to_seconds
+
+
+def kline_message(symbol, interval, candle, closed, event_time_ms):
+    """
+    Construit un message au format du flux kline Binance.
+
+    Args:
+        symbol (str): symbole.
+        interval (str): intervalle.
+        candle (dict): champs de la bougie (candles.KLINE_FIELDS).
+        closed (bool): bougie clôturée.
+        event_time_ms (int): horodatage d'émission.
+
+    Returns:
+        str: message JSON.
+    """
+    return json.dumps({
+        "e": "kline",
+        "E": event_time_ms,
+        "s": symbol,
+        "k": {
+            "t": candle["open_time"], "T": candle["close_time"], "s": symbol, "i": interval,
+            "o": f"{candle['open']:.2f}", "c": f"{candle['close']:.2f}",
+            "h": f"{candle['high']:.2f}", "l": f"{candle['low']:.2f}",
+            "v": f"{candle['volume']:.4f}", "n": candle["trades"], "x": closed,
+            "q": f"{candle['quote_volume']:.4f}", "V": f"{candle['taker_buy_base']:.4f}",
+            "Q": f"{candle['taker_buy_quote']:.4f}",
+        },
+    })
+
+
+def load_history(symbol, interval, root=kline_store.STORE_ROOT):
+    """
+    Charge tout l'historique stocké d'un symbole (toutes les partitions journalières).
+    """
+    parts = [kline_store.read_partition(symbol, interval, day, root)
+             for day in kline_store.list_partitions(symbol, interval, root)]
+    return Candles.concat(parts)
+
+
+class KlineReplayServer:
+    """
+    Serveur de rejeu exécutable dans un thread (pour les tests) ou en script.
+
+    Args:
+        symbol (str): symbole rejoué.
+        interval (str): intervalle des bougies.
+        speed (float): facteur d'accélération (100 = une bougie 1m toutes les 0,6 s).
+        ticks (int): messages envoyés par bougie (le dernier étant la clôture).
+        candles (Candles, optional): bougies à rejouer (par défaut l'historique stocké).
+        root (str): racine du stockage colonnaire.
+        host (str): adresse d'écoute.
+        port (int): port d'écoute (0 = port libre).
+    """
+
+    def __init__(self, symbol="ETHUSDC", interval="1m", speed=1.0, ticks=1, candles=None,
+                 root=kline_store.STORE_ROOT, host="127.0.0.1", port=0):
+        self.symbol = symbol
+        self.interval = interval
+        self.speed = speed
+        self.ticks = max(1, ticks)
+        self.candles = candles if candles is not None else load_history(symbol, interval, root)
+        self.host = host
+        self.port = port
+        self.messages_sent = 0
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def _rows(self):
+        # Dictionnaires construits à la volée : pas de copie de tout l'historique
+        columns = self.candles.columns()
+        for i in range(len(self.candles)):
+            yield {name: column[i].item() for name, column in columns.items()}
+
+    async def _handler(self, ws):
+        expected = f"/ws/{self.symbol.lower()}@kline_{self.interval}"
+        if ws.request.path != expected:
+            await ws.close(code=1008, reason=f"flux inconnu, attendu {expected}")
+            return
+
+        delay = interval_to_seconds(self.interval) / self.speed / self.ticks
+        try:
+            for candle in self._rows():
+                for tick in range(1, self.ticks + 1):
+                    closed = tick == self.ticks
+                    await ws.send(kline_message(self.symbol, self.interval, candle, closed,
+                                                int(time.time() * 1000)))
+                    self.messages_sent += 1
+                    await asyncio.sleep(delay)
+        except ConnectionClosed:
+            pass
+
+    async def serve_forever(self):
+        """
+        Démarre le serveur et tourne jusqu'à l'appel de stop().
+        """
+        self._loop = asyncio.get_running_loop()
+        async with serve(self._handler, self.host, self.port) as server:
+            self._server = server
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await server.wait_closed()
+
+    def start(self):
+        """
+        Lance le serveur dans un thread démon et attend qu'il écoute.
+
+        Returns:
+            KlineReplayServer: self
+        """
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.serve_forever()), daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rejoue prices_history/ au format du flux kline Binance")
+    parser.add_argument("--symbol", default="ETHUSDC")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--speed", type=float, default=1.0, help="facteur d'accélération (ex: 100)")
+    parser.add_argument("--ticks", type=int, default=1, help="messages par bougie")
+    parser.add_argument("--root", default=kline_store.STORE_ROOT)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = KlineReplayServer(args.symbol, args.interval, args.speed, args.ticks,
+                               root=args.root, host=args.host, port=args.port)
+    print(f"Rejeu de {len(server.candles)} bougies sur {server.url} (x{args.speed})")
+    asyncio.run(server.serve_forever())
@@ -0,0 +1,135 @@
+"""
+Bougies d'unités de temps supérieures (5m, 15m, 1h, 4h...) dérivées des bougies 1m stockées.
+
+Une bougie de l'unité cible regroupe les bougies 1m dont le temps d'ouverture tombe dans le même
+intervalle aligné sur epoch (UTC, comme Binance) : ouverture de la première, plus haut / plus bas
+du groupe, clôture de la dernière, volumes et nombre de transactions additionnés.
+L'agrégation est vectorisée (np.ufunc.reduceat sur les frontières de groupes), sans boucle par bougie.
+
+ResampledSeries tient une unité de temps à jour au fil des bougies 1m : à chaque mise à jour,
+seul le dernier groupe (encore incomplet) et les suivants sont ré-agrégés.
+"""
+import numpy as np
+
+from candles import Candles
+from kline_cache import interval_to_seconds
+
+BASE_INTERVAL = "1m"
+
+# Unités de temps proposées par le tableau de bord
+TIMEFRAMES = ("1m", "5m", "15m", "1h", "4h")
+
+# Colonnes additionnées lors de l'agrégation
+SUM_FIELDS = ("volume", "quote_volume", "trades", "taker_buy_base", "taker_buy_quote")
+
+
+def interval_ms(interval):
+    """
+    Durée d'un intervalle Binance en millisecondes.
+    """
+    return interval_to_seconds(interval) * 1000
+
+
+def timeframe_factor(interval, base_interval=BASE_INTERVAL):
+    """
+    Nombre de bougies de base par bougie de l'unité `interval` (ex: 60 pour "1h" depuis "1m").
+    """
+    factor, remainder = divmod(interval_to_seconds(interval), interval_to_seconds(base_interval))
+    if factor < 1 or remainder:
+        raise ValueError(f"L'intervalle {interval} n'est pas un multiple de {base_interval}")
+    return factor
+
+
+def resample_candles(candles, interval):
+    """
+    Agrège des bougies dans une unité de temps supérieure.
+
+    Args:
+        candles (Candles): bougies de base triées par open_time, sans doublon.
+        interval (str): unité de temps cible (ex: "15m", "4h").
+
+    Returns:
+        Candles: une bougie par intervalle cible présent dans les données ; la dernière peut être
+            incomplète (intervalle en cours).
+    """
+    if len(candles) == 0:
+        return Candles.empty()
+    step = interval_ms(interval)
+    bucket = candles.open_time // step
+    # Début de chaque groupe de bougies consécutives du même intervalle
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    ends = np.append(starts[1:], len(candles)) - 1
+    open_time = bucket[starts] * step
+
+    columns = {
+        "open_time": open_time,
+        "open": candles.open[starts],
+        "high": np.maximum.reduceat(candles.high, starts),
+        "low": np.minimum.reduceat(candles.low, starts),
+        "close": candles.close[ends],
+        "close_time": open_time + step - 1,
+    }
+    for name in SUM_FIELDS:
+        columns[name] = np.add.reduceat(getattr(candles, name), starts)
+    return Candles(**columns)
+
+
+class ResampledSeries:
+    """
+    Série d'une unité de temps supérieure, mise à jour incrémentalement à partir des bougies 1m.
+
+    Les mises à jour reçoivent une fenêtre récente de bougies de base (ex: le tampon temps réel) :
+    les bougies agrégées antérieures au dernier intervalle connu sont conservées telles quelles,
+    seuls le dernier intervalle (éventuellement incomplet) et les suivants sont recalculés.
+    La fenêtre doit commencer au plus tard au début du dernier intervalle ; sinon celui-ci est
+    considéré comme terminé et seuls les intervalles suivants sont agrégés.
+
+    Args:
+        interval (str): unité de temps cible (ex: "1h").
+        maxlen (int): nombre maximal de bougies agrégées conservées.
+    """
+
+    def __init__(self, interval, maxlen=10_000):
+        timeframe_factor(interval)  # Vérifie que l'unité est un multiple de la base
+        self.interval = interval
+        self.maxlen = maxlen
+        self.candles = Candles.empty()
+        self.updates = 0
+
+    def __len__(self):
+        return len(self.candles)
+
+    def update(self, base):
+        """
+        Intègre une fenêtre de bougies de base.
+
+        Args:
+            base (Candles): bougies de base triées par open_time (seule la fin est lue).
+
+        Returns:
+            bool: True si la série agrégée a changé.
+        """
+        if len(base) == 0:
+            return False
+        if len(self.candles) == 0:
+            self.candles = resample_candles(base, self.interval)[-self.maxlen:]
+            self.updates += 1
+            return True
+
+        last_start = int(self.candles.open_time[-1])
+        if base.open_time[0] > last_start:
+            last_start += interval_ms(self.interval)
+        lo = np.searchsorted(base.open_time, last_start)
+        if lo == len(base):
+            return False
+
+        tail = resample_candles(base[lo:], self.interval)
+        keep = np.searchsorted(self.candles.open_time, tail.open_time[0])
+        previous = self.candles[keep:]
+        if len(previous) == len(tail) and all(np.array_equal(getattr(previous, name), getattr(tail, name),
+                                                             equal_nan=True)
+                                              for name in ("open_time", "high", "low", "close", "volume")):
+            return False  # Aucune nouvelle bougie ni variation de la bougie en cours
+        self.candles = Candles.concat([self.candles[:keep], tail])[-self.maxlen:]
+        self.updates += 1
+        return True
@@ -0,0 +1,104 @@
+"""
+Tampon circulaire de bougies, alimenté par le flux temps réel et lu par le tableau de bord.
+"""
+import threading
+
+import numpy as np
+
+from candles import KLINE_FIELDS, Candles
+
+
+class CandleRingBuffer:
+    """
+    Tampon circulaire de capacité fixe, une colonne NumPy préallouée par champ de bougie.
+
+    Les écritures (flux WebSocket, rattrapage REST) et les lectures (callbacks Dash) peuvent venir
+    de threads différents : toutes passent par un verrou. `version` est incrémenté à chaque
+    modification, ce qui permet aux lecteurs de savoir si quelque chose a changé.
+
+    Args:
+        capacity (int): nombre maximal de bougies conservées (les plus anciennes sont écrasées).
+    """
+
+    def __init__(self, capacity=1440):
+        self.capacity = capacity
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in KLINE_FIELDS.items()}
+        self._count = 0  # Nombre total de bougies écrites depuis la création
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def last_open_time(self):
+        """
+        Temps d'ouverture (ms) de la bougie la plus récente, ou None si le tampon est vide.
+        """
+        with self._lock:
+            if self._count == 0:
+                return None
+            return int(self._columns["open_time"][(self._count - 1) % self.capacity])
+
+    def upsert(self, candle):
+        """
+        Ajoute une bougie, ou met à jour la dernière si elle a le même temps d'ouverture.
+        Les bougies plus anciennes que la dernière sont ignorées.
+
+        Args:
+            candle (dict): valeurs des champs de KLINE_FIELDS pour une bougie.
+
+        Returns:
+            bool: True si le tampon a été modifié.
+        """
+        with self._lock:
+            open_time = candle["open_time"]
+            last = (self._count - 1) % self.capacity
+            if self._count and open_time < self._columns["open_time"][last]:
+                return False
+            if self._count and open_time == self._columns["open_time"][last]:
+                slot = last  # Bougie en cours : mise à jour sur place
+            else:
+                slot = self._count % self.capacity
+                self._count += 1
+            for name, column in self._columns.items():
+                column[slot] = candle.get(name, 0)
+            self.version += 1
+            return True
+
+    def extend(self, candles):
+        """
+        Ajoute une série de bougies triées (ex: rattrapage REST) ; seules celles au moins aussi
+        récentes que la dernière bougie du tampon sont prises en compte.
+
+        Args:
+            candles (Candles): bougies à ajouter.
+        """
+        with self._lock:
+            if self._count:
+                last_open = self._columns["open_time"][(self._count - 1) % self.capacity]
+                start = np.searchsorted(candles.open_time, last_open)
+                if start < len(candles) and candles.open_time[start] == last_open:
+                    self._count -= 1  # La dernière bougie est remplacée par sa version à jour
+                candles = candles[start:]
+            candles = candles[-self.capacity:]
+            if len(candles) == 0:
+                return
+
+            slots = (self._count + np.arange(len(candles))) % self.capacity
+            for name, column in self._columns.items():
+                column[slots] = getattr(candles, name)
+            self._count += len(candles)
+            self.version += 1
+
+    def snapshot(self):
+        """
+        Copie ordonnée (de la plus ancienne à la plus récente) des bougies du tampon.
+
+        Returns:
+            Candles: contenu du tampon.
+        """
+        with self._lock:
+            n = min(self._count, self.capacity)
+            start = (self._count - n) % self.capacity
+            order = (start + np.arange(n)) % self.capacity
+            return Candles(**{name: column[order] for name, column in self._columns.items()})
@@ -0,0 +1,202 @@
+"""
+Tampon circulaire de bougies en mémoire partagée, écrit par un seul processus (ingestor.py) et lu
+par tous les processus du serveur Dash.
+
+Le segment contient un en-tête de quatre entiers (séquence, nombre de bougies écrites, version,
+capacité) suivi d'une colonne par champ de bougie. Les écritures sont encadrées par un compteur de
+séquence (seqlock) : impair pendant une écriture, pair sinon. Un lecteur copie les colonnes puis
+vérifie que la séquence n'a pas changé ; sinon il recommence. Les lecteurs ne prennent aucun verrou
+et ne bloquent jamais l'écrivain.
+"""
+import threading
+import time
+
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+from candles import KLINE_FIELDS, Candles
+from ring_buffer import CandleRingBuffer
+
+# En-tête du segment : indices des champs
+_SEQ, _COUNT, _VERSION, _CAPACITY = range(4)
+_HEADER_BYTES = 4 * 8
+
+
+def shared_buffer_name(symbol="ETHUSDC", interval="1m"):
+    """
+    Nom du segment de mémoire partagée d'un marché (identique dans l'ingesteur et les lecteurs).
+    """
+    return f"klines_{symbol.lower()}_{interval}"
+
+
+def _segment_size(capacity):
+    return _HEADER_BYTES + sum(capacity * np.dtype(dtype).itemsize for dtype in KLINE_FIELDS.values())
+
+
+class SharedCandleRingBuffer(CandleRingBuffer):
+    """
+    CandleRingBuffer dont les colonnes et les compteurs vivent dans un segment de mémoire partagée.
+
+    À construire avec `create` (processus écrivain) ou `attach` (lecteurs).
+
+    Args:
+        shm (shared_memory.SharedMemory): segment ouvert.
+        owner (bool): True si ce processus a créé le segment (et doit le supprimer avec `unlink`).
+    """
+
+    def __init__(self, shm, owner=False):
+        self._shm = shm
+        self.owner = owner
+        self._header = np.ndarray(4, dtype=np.int64, buffer=shm.buf)
+        # Pas de CandleRingBuffer.__init__ : il remettrait à zéro les compteurs du segment
+        self.capacity = capacity = int(self._header[_CAPACITY])
+        self._lock = threading.RLock()  # Repris par upsert / extend de CandleRingBuffer dans _write
+        self._columns = {}
+        offset = _HEADER_BYTES
+        for name, dtype in KLINE_FIELDS.items():
+            self._columns[name] = np.ndarray(capacity, dtype=dtype, buffer=shm.buf, offset=offset)
+            offset += capacity * np.dtype(dtype).itemsize
+
+    @classmethod
+    def create(cls, name, capacity=1440):
+        """
+        Crée le segment `name`, ou le réutilise s'il existe déjà (redémarrage de l'ingesteur : les
+        lecteurs déjà attachés continuent de le lire et voient les nouvelles bougies).
+
+        Le segment survit à l'arrêt de l'ingesteur ; seul `unlink` le supprime. Un segment existant
+        garde sa capacité (le recréer laisserait les lecteurs sur l'ancien, figé) : pour en changer,
+        arrêter les processus Dash puis lancer `ingestor.py --unlink`.
+
+        Returns:
+            SharedCandleRingBuffer: tampon écrivain.
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+            header = np.ndarray(4, dtype=np.int64, buffer=shm.buf)
+            existing = int(header[_CAPACITY])
+            if existing > 0 and shm.size >= _segment_size(existing):
+                if existing != capacity:
+                    print(f"Segment {name} réutilisé avec sa capacité de {existing} bougies "
+                          f"(demandée : {capacity})")
+                header[_SEQ] += header[_SEQ] % 2  # Écriture interrompue par l'arrêt de l'ancien ingesteur
+                del header
+                return cls._owned(shm)
+            # En-tête invalide (création interrompue) : aucun lecteur n'a pu s'y attacher
+            del header
+            shm.close()
+            shm.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+        header = np.ndarray(4, dtype=np.int64, buffer=shm.buf)
+        header[:] = (0, 0, 0, capacity)
+        del header
+        return cls._owned(shm)
+
+    @classmethod
+    def _owned(cls, shm):
+        # Avant Python 3.13, le resource_tracker supprimerait le segment à la sortie de l'ingesteur
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name, timeout=0.0):
+        """
+        Ouvre en lecture un segment créé par l'ingesteur.
+
+        Args:
+            name (str): nom du segment (voir shared_buffer_name).
+            timeout (float): attente maximale de la création du segment (secondes).
+
+        Returns:
+            SharedCandleRingBuffer: tampon lecteur.
+
+        Raises:
+            FileNotFoundError: si le segment n'existe pas au bout de `timeout`.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+                break
+            except FileNotFoundError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.2)
+        # Avant Python 3.13, le resource_tracker supprime à la sortie tout segment ouvert, même
+        # simplement attaché : seul l'ingesteur doit le supprimer
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def _count(self):
+        return int(self._header[_COUNT])
+
+    @_count.setter
+    def _count(self, value):
+        self._header[_COUNT] = value
+
+    @property
+    def version(self):
+        return int(self._header[_VERSION])
+
+    @version.setter
+    def version(self, value):
+        self._header[_VERSION] = value
+
+    def _write(self, method, *args):
+        # Séquence impaire pendant l'écriture : les lecteurs recommencent leur copie
+        with self._lock:
+            self._header[_SEQ] += 1
+            try:
+                return method(*args)
+            finally:
+                self._header[_SEQ] += 1
+
+    def upsert(self, candle):
+        return self._write(super().upsert, candle)
+
+    def extend(self, candles):
+        return self._write(super().extend, candles)
+
+    def _read(self, func):
+        # Copie cohérente : recommence tant qu'une écriture a eu lieu pendant la lecture
+        while True:
+            seq = int(self._header[_SEQ])
+            if seq % 2 == 0:
+                result = func()
+                if int(self._header[_SEQ]) == seq:
+                    return result
+            time.sleep(0)
+
+    def last_open_time(self):
+        def read():
+            count = self._count
+            return None if count == 0 else int(self._columns["open_time"][(count - 1) % self.capacity])
+        return self._read(read)
+
+    def snapshot(self):
+        def read():
+            count = self._count
+            n = min(count, self.capacity)
+            order = ((count - n) + np.arange(n)) % self.capacity
+            return Candles(**{name: column[order] for name, column in self._columns.items()})
+        return self._read(read)
+
+    def close(self):
+        """
+        Détache le segment de ce processus (les vues NumPy sont libérées d'abord).
+        """
+        self._columns = {}
+        self._header = None
+        self._shm.close()
+
+    def unlink(self):
+        """
+        Supprime le segment (les lecteurs encore attachés gardent l'ancien, figé).
+        """
+        self.close()
+        # SharedMemory.unlink le retire du resource_tracker : il doit y être inscrit
+        resource_tracker.register(self._shm._name, "shared_memory")
+        self._shm.unlink()
+